@@ -0,0 +1,28 @@
+"""add position column to queue entries
+
+Revision ID: 20261017_add_queue_entry_position
+Revises: 20261017_add_queue_waiting_index
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_queue_entry_position'
+down_revision = '20261017_add_queue_waiting_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    columns = {col['name'] for col in inspector.get_columns('queue_entries')}
+    if 'position' not in columns:
+        # Existing rows stay NULL; the API falls back to counting for them
+        op.add_column('queue_entries', sa.Column('position', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('queue_entries', 'position')
@@ -0,0 +1,34 @@
+"""add partial index for waiting queue entries
+
+Revision ID: 20261017_add_queue_waiting_index
+Revises: 4b5e7dad69d9
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_queue_waiting_index'
+down_revision = '4b5e7dad69d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    existing = {ix['name'] for ix in inspector.get_indexes('queue_entries')}
+    if 'ix_qe_waiting_fifo' not in existing:
+        op.create_index(
+            'ix_qe_waiting_fifo',
+            'queue_entries',
+            ['service_id', 'created_at'],
+            unique=False,
+            postgresql_where=sa.text("status = 'waiting'"),
+            sqlite_where=sa.text("status = 'waiting'")
+        )
+
+
+def downgrade():
+    op.drop_index('ix_qe_waiting_fifo', table_name='queue_entries')
@@ -0,0 +1,37 @@
+"""add indexes for schedule lookups
+
+Revision ID: 20261017_add_schedule_indexes
+Revises: 20261017_schedule_times_as_time
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_schedule_indexes'
+down_revision = '20261017_schedule_times_as_time'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    existing = {ix['name'] for ix in inspector.get_indexes('schedules')}
+    if 'ix_schedule_dow_avail' not in existing:
+        op.create_index(
+            'ix_schedule_dow_avail',
+            'schedules',
+            ['day_of_week'],
+            unique=False,
+            postgresql_where=sa.text("is_available"),
+            sqlite_where=sa.text("is_available = 1")
+        )
+    if 'ix_schedule_staff_id' not in existing:
+        op.create_index('ix_schedule_staff_id', 'schedules', ['staff_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_schedule_staff_id', table_name='schedules')
+    op.drop_index('ix_schedule_dow_avail', table_name='schedules')
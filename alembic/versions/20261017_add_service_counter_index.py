@@ -0,0 +1,27 @@
+"""add index for service counter lookups
+
+Revision ID: 20261017_add_service_counter_index
+Revises: 20261017_add_schedule_indexes
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_service_counter_index'
+down_revision = '20261017_add_schedule_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    existing = {ix['name'] for ix in inspector.get_indexes('service_counters')}
+    if 'ix_service_counters_service_id' not in existing:
+        op.create_index('ix_service_counters_service_id', 'service_counters', ['service_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_service_counters_service_id', table_name='service_counters')
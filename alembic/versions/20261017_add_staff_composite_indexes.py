@@ -0,0 +1,36 @@
+"""add composite indexes for staff list lookups
+
+Revision ID: 20261017_add_staff_composite_indexes
+Revises: 20261017_add_service_counter_index
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_staff_composite_indexes'
+down_revision = '20261017_add_service_counter_index'
+branch_labels = None
+depends_on = None
+
+STAFF_INDEXES = (
+    ('ix_schedule_staff_date', 'staff_schedules', ['staff_id', 'shift_date']),
+    ('ix_performance_staff_date', 'staff_performance', ['staff_id', 'date']),
+    ('ix_msg_recipient_unread', 'staff_communications', ['recipient_id', 'is_read']),
+    ('ix_task_assignee_status', 'staff_tasks', ['assigned_to', 'status']),
+)
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    for name, table, columns in STAFF_INDEXES:
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(STAFF_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,44 @@
+"""store schedule start/end times as TIME
+
+Revision ID: 20261017_schedule_times_as_time
+Revises: 20261017_add_queue_entry_position
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_schedule_times_as_time'
+down_revision = '20261017_add_queue_entry_position'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        # SQLite keeps the existing 'HH:MM[:SS]' text values, which the
+        # Time type reads back as-is
+        return
+
+    for column in ('start_time', 'end_time'):
+        op.alter_column(
+            'schedules', column,
+            type_=sa.Time(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::time'
+        )
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+
+    for column in ('start_time', 'end_time'):
+        op.alter_column(
+            'schedules', column,
+            type_=sa.String(),
+            existing_nullable=False,
+            postgresql_using=f"to_char({column}, 'HH24:MI:SS')"
+        )
@@ -16,6 +16,15 @@ from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    from sklearn.multioutput import MultiOutputRegressor
+    from sklearn.pipeline import Pipeline
+except ImportError:
+    # skl2onnx is optional; without it only the pickled models are written
+    convert_sklearn = None
+
 class AdvancedStaffOptimizer:
     """Advanced staff optimization system for hospital queue management"""
     
@@ -255,12 +264,12 @@ class AdvancedStaffOptimizer:
         """Save trained models and components"""
         os.makedirs('models', exist_ok=True)
         
-        # Save models
+        # Save models uncompressed so the API can memory-map their arrays (joblib mmap_mode='r')
         for name, model in self.models.items():
-            joblib.dump(model, f'models/staff_optimizer_{name}.pkl')
+            joblib.dump(model, f'models/staff_optimizer_{name}.pkl', compress=0)
         
         # Save scaler
-        joblib.dump(self.scalers['standard'], 'models/staff_optimizer_scaler.pkl')
+        joblib.dump(self.scalers['standard'], 'models/staff_optimizer_scaler.pkl', compress=0)
         
         # Save metadata
         metadata = {
@@ -274,6 +283,25 @@ class AdvancedStaffOptimizer:
         
         joblib.dump(metadata, 'models/staff_optimization_metadata.pkl')
         print("   ✅ Models and metadata saved")
+        
+        self._export_onnx_models()
+    
+    def _export_onnx_models(self):
+        """Export the scaler and both regressors as one ONNX graph for the API's onnxruntime predict path"""
+        if convert_sklearn is None:
+            print("   ⚠️ skl2onnx not installed - skipping ONNX export")
+            return
+        
+        # Wrap the two fitted models as one two-output regressor: column 0 wait time, column 1 efficiency
+        predictors = MultiOutputRegressor(self.models['wait_time_predictor'])
+        predictors.estimators_ = [self.models['wait_time_predictor'], self.models['efficiency_predictor']]
+        pipeline = Pipeline([('scaler', self.scalers['standard']), ('model', predictors)])
+        
+        initial_types = [('X', FloatTensorType([None, self.scalers['standard'].n_features_in_]))]
+        onnx_model = convert_sklearn(pipeline, initial_types=initial_types)
+        with open('models/staff_optimizer_predictors.onnx', 'wb') as f:
+            f.write(onnx_model.SerializeToString())
+        print("   ✅ ONNX predictor graph exported")
     
     def optimize_staffing(self, 
                          department: str,
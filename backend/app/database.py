@@ -1,16 +1,95 @@
+import asyncio
+import logging
 import os
-from sqlalchemy import create_engine
+from contextlib import AsyncExitStack, asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # Allow overriding the DB URL via environment variable for tests and deployments
 SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./queue_management.db")
 
-# SQLite specific: disable same-thread check for SQLAlchemy usage across threads
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Compiled SQL kept per engine; the default 500 statement shapes is easily outgrown by the routes
+QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "2000"))
+
+def _engine_options(url: str) -> dict:
+    """Connection/pool options for the configured database"""
+    if url.startswith("sqlite"):
+        # SQLite specific: disable same-thread check for SQLAlchemy usage across threads
+        return {"connect_args": {"check_same_thread": False}, "query_cache_size": QUERY_CACHE_SIZE}
+    # Server databases: size the pool for concurrent requests and drop stale connections
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "40")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "3600")),
+        "pool_pre_ping": True,
+        "query_cache_size": QUERY_CACHE_SIZE,
+    }
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the writer, NORMAL
+# sync is still crash-safe under WAL, and a larger page cache/mmap keeps hot pages in memory
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def configure_sqlite_engine(sync_engine):
+    """Register the SQLite connection pragmas on an engine (no-op for other databases)"""
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL))
+configure_sqlite_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _async_database_url(url: str) -> str:
+    """Map a sync driver URL onto the matching asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    for prefix in ("postgresql+psycopg2:", "postgresql:", "postgres:"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+asyncpg:", 1)
+    return url
+
+# Async engine for routes that use AsyncSession; same database as the sync engine
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv(
+    "ASYNC_SQLALCHEMY_DATABASE_URL", _async_database_url(SQLALCHEMY_DATABASE_URL)
+)
+def _async_engine_options(url: str) -> dict:
+    options = _engine_options(url)
+    if url.startswith("sqlite") and ":memory:" not in url:
+        # aiosqlite defaults to NullPool; pool file connections so their page cache survives requests
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=int(os.getenv("SQLITE_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("SQLITE_MAX_OVERFLOW", "10")),
+        )
+    return options
+
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **_async_engine_options(ASYNC_SQLALCHEMY_DATABASE_URL))
+configure_sqlite_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+# Number of async connections opened at startup so early requests skip the connect handshake
+ASYNC_POOL_WARM_SIZE = int(os.getenv("DB_POOL_WARM_SIZE", "5"))
+
 def get_db():
     db = SessionLocal()
     try:
@@ -18,6 +97,40 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@asynccontextmanager
+async def unit_of_work(db):
+    """Commit the async session when the block succeeds, roll it back if it raises"""
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+async def warm_async_pool(connections: int = ASYNC_POOL_WARM_SIZE):
+    """Pre-open pooled async connections so they are ready for the first requests (no-op for SQLite)"""
+    if async_engine.dialect.name == "sqlite" or connections <= 0:
+        return
+    try:
+        # Hold all connections at once so the pool has to open distinct ones
+        async with AsyncExitStack() as stack:
+            conns = await asyncio.gather(
+                *(stack.enter_async_context(async_engine.connect()) for _ in range(connections))
+            )
+            await asyncio.gather(*(conn.exec_driver_sql("SELECT 1") for conn in conns))
+    except Exception as e:
+        logger.warning("Async connection pool warm-up failed", exc_info=e)
+
+def dialect_insert(db, entity):
+    """Return an INSERT for the session's dialect that supports ON CONFLICT clauses"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(entity)
+    return sqlite.insert(entity)
+
 def create_tables():
     # Import models so they are registered on the Base metadata before creating tables
     try:
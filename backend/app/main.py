@@ -1,10 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.routes import queue, users, services, analytics, auth, ai, appointments, notifications, checkin, scheduling, navigation, emergency, patient_history, uploads, payments, staff, admin, file_uploads, reports, websocket_enhanced, analytics_dashboard, prescriptions, inventory, patient_portal, enhanced_ai
 # Temporarily disabled integration routes that reference missing models
 # from app.routes import hl7_integration, fhir_integration, ehr_integration
-from app.database import create_tables
+from app.database import async_engine, create_tables, warm_async_pool
 from app import ws
 import os
 
@@ -51,6 +52,9 @@ if SecurityConfig.RATE_LIMIT_ENABLED:
         requests_per_minute=SecurityConfig.RATE_LIMIT_PER_MINUTE
     )
 
+# 5. Response compression for larger JSON payloads (schedule and slot listings)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(queue.router, prefix="/api/queue", tags=["queue"])
@@ -114,6 +118,7 @@ async def startup_event():
         raise ValueError("Required environment variables not set. See error above.")
     
     create_tables()
+    await warm_async_pool()
     
     # Print security configuration
     print("\n" + "=" * 60)
@@ -143,6 +148,8 @@ async def shutdown_event():
     print(f"   - Staff: {stats['sessions_by_role']['staff']}")
     print(f"   - Admin: {stats['sessions_by_role']['admin']}")
     
+    await async_engine.dispose()
+    
     print("✅ Shutdown complete\n")
 
 @app.get("/api/health")
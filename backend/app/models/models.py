@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Float, Boolean, Text, Time, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -40,10 +40,20 @@ class QueueEntry(Base):
     completed_at = Column(DateTime, nullable=True)
     estimated_wait_time = Column(Integer)
     ai_predicted_wait = Column(Integer)
+    position = Column(Integer, nullable=True)  # Place in the service's waiting line, kept up to date on status changes
 
     patient = relationship("User")
     service = relationship("Service")
 
+    __table_args__ = (
+        # Partial FIFO index for popping the next waiting patient of a service
+        Index(
+            "ix_qe_waiting_fifo", "service_id", "created_at",
+            postgresql_where=text("status = 'waiting'"),
+            sqlite_where=text("status = 'waiting'")
+        ),
+    )
+
 class Appointment(Base):
     __tablename__ = "appointments"
 
@@ -100,15 +110,19 @@ class Service(Base):
     current_wait_time = Column(Integer)
     queue_length = Column(Integer, default=0)
 
+    counters = relationship("ServiceCounter", back_populates="service")
+
 class ServiceCounter(Base):
     __tablename__ = "service_counters"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
-    service_id = Column(Integer, ForeignKey("services.id"))
+    service_id = Column(Integer, ForeignKey("services.id"), index=True)
     is_active = Column(Integer, default=1)  # SQLite doesn't have boolean
     current_queue_entry_id = Column(Integer, ForeignKey("queue_entries.id"), nullable=True)
     staff_member = Column(String, nullable=True)
+
+    service = relationship("Service", back_populates="counters")
     
 class Analytics(Base):
     __tablename__ = "analytics"
@@ -152,14 +166,24 @@ class Schedule(Base):
     id = Column(Integer, primary_key=True, index=True)
     staff_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     day_of_week = Column(Integer, nullable=False)  # 0-6 (Monday-Sunday)
-    start_time = Column(String, nullable=False)  # Store as HH:MM format
-    end_time = Column(String, nullable=False)  # Store as HH:MM format
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
     is_available = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     staff = relationship("User", backref="schedules")
 
+    __table_args__ = (
+        # Partial index for the available-slot lookup by weekday
+        Index(
+            "ix_schedule_dow_avail", "day_of_week",
+            postgresql_where=text("is_available"),
+            sqlite_where=text("is_available = 1")
+        ),
+        Index("ix_schedule_staff_id", "staff_id"),
+    )
+
 
 # ==================== PRESCRIPTION MANAGEMENT ====================
 
@@ -1,7 +1,7 @@
 """
 Staff management models for Healthcare Queue Management System
 """
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Boolean, Text, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -38,6 +38,10 @@ class StaffProfile(Base):
 class StaffSchedule(Base):
     """Staff scheduling and shift management."""
     __tablename__ = "staff_schedules"
+    __table_args__ = (
+        # Staff schedule lookups filter by staff member and shift date range
+        Index("ix_schedule_staff_date", "staff_id", "shift_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     staff_id = Column(Integer, ForeignKey("users.id"))
@@ -61,6 +65,10 @@ class StaffSchedule(Base):
 class StaffPerformance(Base):
     """Staff performance tracking and metrics."""
     __tablename__ = "staff_performance"
+    __table_args__ = (
+        # Performance history is read per staff member over a date range
+        Index("ix_performance_staff_date", "staff_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     staff_id = Column(Integer, ForeignKey("users.id"))
@@ -84,6 +92,10 @@ class StaffPerformance(Base):
 class StaffCommunication(Base):
     """Staff communication and messaging system."""
     __tablename__ = "staff_communications"
+    __table_args__ = (
+        # Inbox reads filter by recipient and, for unread views, read state
+        Index("ix_msg_recipient_unread", "recipient_id", "is_read"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"))
@@ -107,6 +119,10 @@ class StaffCommunication(Base):
 class StaffTask(Base):
     """Staff task management and assignments."""
     __tablename__ = "staff_tasks"
+    __table_args__ = (
+        # Task lists filter by assignee and optionally status
+        Index("ix_task_assignee_status", "assigned_to", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)
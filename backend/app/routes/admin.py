@@ -459,6 +459,7 @@ async def create_permission(
     db.add(new_perm)
     db.commit()
     db.refresh(new_perm)
+    await staff_service.invalidate_permissions()
 
     # Log audit event
     staff_service.log_audit_event(db, {
@@ -490,6 +491,7 @@ async def update_permission(
     permission.allowed = allowed
     permission.conditions = conditions
     db.commit()
+    await staff_service.invalidate_permissions()
 
     # Log audit event
     staff_service.log_audit_event(db, {
@@ -1,10 +1,12 @@
 from datetime import timedelta, datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.services.auth_service import (
     authenticate_user,
     create_access_token,
@@ -76,12 +78,50 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     return user
 
+# Dependency to get current user for routes running on AsyncSession; the lookup
+# is awaited on the event loop and shares the request's async session
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    from app.services.auth_service import decode_token
+    email = decode_token(token)
+    if email is None:
+        raise credentials_exception
+
+    user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+    if user is None:
+        raise credentials_exception
+    return user
+
+def require_roles(*roles: str, self_param: Optional[str] = None):
+    """
+    Dependency factory restricting a route to the given roles
+
+    If self_param names a path parameter, a user whose id matches it is
+    also allowed (e.g. staff viewing their own schedule).
+    """
+    async def _require_roles(request: Request, current_user: User = Depends(get_current_user_async)):
+        if current_user.role in roles:
+            return current_user
+        if self_param is not None and request.path_params.get(self_param) == str(current_user.id):
+            return current_user
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return _require_roles
+
 # Dependency to get current active user
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_current_active_user_async(current_user: User = Depends(get_current_user_async)):
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
 # WebSocket authentication (no Depends)
 async def get_current_user_ws(token: str, db: Session):
     """Get current user from token for WebSocket connections"""
@@ -1,21 +1,72 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
-from app.database import get_db
+from app.database import dialect_insert, get_db
 from app.models.models import QueueEntry, User, Service
+from app.services.cache_service import SERVICES_CACHE_TAG, response_cache
 from datetime import datetime
+import logging
 import random
+import threading
 
-# Import wait time prediction
+# Import wait time prediction. The predictor instance is shared with the
+# wait-time routes: prediction only reads the fitted model, so concurrent
+# requests can use it without a lock or a second copy of the model in memory.
 try:
-    from app.routes.wait_time_prediction import PracticalWaitTimePredictor, WaitTimePredictionRequest
-    wait_time_predictor = PracticalWaitTimePredictor()
+    from app.routes.wait_time_prediction import WaitTimePredictionRequest
+    from app.routes.wait_time_prediction import predictor as wait_time_predictor
 except ImportError:
     wait_time_predictor = None
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Service name -> department used by the wait time model
+DEPARTMENT_MAPPING = {
+    'Emergency': 'Emergency',
+    'Cardiology': 'Cardiology',
+    'General': 'Internal Medicine',
+    'Pediatrics': 'Pediatrics',
+    'Surgery': 'General Surgery'
+}
+
+# Priority multipliers applied to model predictions and to the heuristic fallback
+AI_PRIORITY_MULTIPLIER = {
+    "urgent": 0.5,
+    "high": 0.7,
+    "medium": 1.0,
+    "low": 1.3
+}
+HEURISTIC_PRIORITY_MULTIPLIER = {
+    "urgent": 0.5,
+    "high": 0.8,
+    "medium": 1.0,
+    "low": 1.2
+}
+
+# Statuses shown in queue listings and the columns those listings need
+ACTIVE_STATUSES = ("waiting", "called", "serving")
+QUEUE_LIST_COLUMNS = (
+    QueueEntry.id,
+    QueueEntry.queue_number,
+    QueueEntry.service_id,
+    QueueEntry.patient_id,
+    QueueEntry.status,
+    QueueEntry.priority,
+    QueueEntry.estimated_wait_time,
+    QueueEntry.ai_predicted_wait,
+    QueueEntry.created_at
+)
+
+# Model features only change hourly, so predictions are reused within the hour.
+# Keys embed the date and hour, so entries from past hours simply stop matching.
+PREDICTION_CACHE_MAX_SIZE = 512
+_prediction_cache: Dict[Tuple, int] = {}
+_prediction_cache_lock = threading.Lock()
+
 class PatientDetails(BaseModel):
     name: str
     email: str
@@ -66,54 +117,72 @@ async def join_queue(
     if priority == "normal":
         priority = "medium"
     
-    # Create or update user
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        user = User(
-            name=name,
-            email=email,
-            phone=phone,
-            date_of_birth=datetime.strptime(dob_str, "%Y-%m-%d")
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
     # Get service
     service = db.query(Service).filter(Service.id == request.service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
 
-    # Calculate queue number
-    last_queue = db.query(QueueEntry).order_by(QueueEntry.queue_number.desc()).first()
-    new_queue_number = (last_queue.queue_number + 1) if last_queue else 1
-
-    # Create queue entry
-    queue_entry = QueueEntry(
-        patient_id=user.id,
-        service_id=request.service_id,
-        queue_number=new_queue_number,
-        status="waiting",
-        priority=priority,
-        estimated_wait_time=service.current_wait_time or 30,
-        ai_predicted_wait=predict_wait_time(service, priority)
+    # Create the patient or reuse the existing one atomically; the no-op update
+    # keeps an existing profile untouched while still returning its id
+    user_insert = dialect_insert(db, User).values(
+        name=name,
+        email=email,
+        phone=phone,
+        date_of_birth=datetime.strptime(dob_str, "%Y-%m-%d")
     )
-    db.add(queue_entry)
+    user_id = db.execute(
+        user_insert.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={"email": user_insert.excluded.email}
+        ).returning(User.id)
+    ).scalar_one()
 
-    # Update service queue length
-    service.queue_length += 1
-    db.commit()
-    db.refresh(queue_entry)
+    # Create queue entry; the next queue number and the position behind the
+    # patients already waiting for this service are computed inside the INSERT
+    next_queue_number = select(
+        func.coalesce(func.max(QueueEntry.queue_number), 0) + 1
+    ).scalar_subquery()
+    waiting_ahead = select(func.count()).select_from(QueueEntry).where(
+        QueueEntry.service_id == request.service_id,
+        QueueEntry.status == "waiting"
+    ).scalar_subquery()
+    queue_entry = db.execute(
+        insert(QueueEntry)
+        .values(
+            patient_id=user_id,
+            service_id=request.service_id,
+            queue_number=next_queue_number,
+            status="waiting",
+            priority=priority,
+            estimated_wait_time=service.current_wait_time or 30,
+            ai_predicted_wait=predict_wait_time(service, priority),
+            position=waiting_ahead + 1
+        )
+        .returning(QueueEntry)
+    ).scalar_one()
 
-    return {
+    # Update service queue length atomically in the database
+    db.execute(
+        update(Service)
+        .where(Service.id == request.service_id)
+        .values(queue_length=func.coalesce(Service.queue_length, 0) + 1)
+    )
+
+    # Build the response before commit so the entry isn't reloaded afterwards
+    response = {
         "id": queue_entry.id,
-        "queue_number": new_queue_number,
+        "queue_number": queue_entry.queue_number,
         "service_id": request.service_id,
         "estimated_wait_time": queue_entry.estimated_wait_time,
-        "position": get_position(queue_entry, db),
+        "position": queue_entry.position,
         "ai_predicted_wait": queue_entry.ai_predicted_wait,
         "status": queue_entry.status
     }
+    db.commit()
+    # Cached service listings carry queue_length, so they are stale now
+    await response_cache.invalidate_tag(SERVICES_CACHE_TAG)
+
+    return response
 
 @router.get("/status/{queue_number}")
 async def get_queue_status(queue_number: int, db: Session = Depends(get_db)):
@@ -124,7 +193,7 @@ async def get_queue_status(queue_number: int, db: Session = Depends(get_db)):
     return {
         "queue_number": queue_entry.queue_number,
         "status": queue_entry.status,
-        "position": get_position(queue_entry, db),
+        "position": current_position(queue_entry, db),
         "estimated_wait_time": queue_entry.ai_predicted_wait
     }
 
@@ -133,19 +202,16 @@ def predict_wait_time(service: Service, priority: str) -> int:
     
     # Try using AI prediction if available
     if wait_time_predictor and wait_time_predictor.model is not None:
+        now = datetime.now()
+        cache_key = (service.id, priority, now.date(), now.hour)
+        with _prediction_cache_lock:
+            cached = _prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            now = datetime.now()
-            
             # Map service to department
-            department_mapping = {
-                'Emergency': 'Emergency',
-                'Cardiology': 'Cardiology', 
-                'General': 'Internal Medicine',
-                'Pediatrics': 'Pediatrics',
-                'Surgery': 'General Surgery'
-            }
-            
-            department = department_mapping.get(service.name, 'Internal Medicine')
+            department = DEPARTMENT_MAPPING.get(service.name, 'Internal Medicine')
             
             # Create prediction request
             prediction_request = WaitTimePredictionRequest(
@@ -163,67 +229,97 @@ def predict_wait_time(service: Service, priority: str) -> int:
             prediction = wait_time_predictor.predict_wait_time(prediction_request)
             
             # Apply priority multiplier
-            priority_multiplier = {
-                "urgent": 0.5,
-                "high": 0.7,
-                "medium": 1.0,
-                "low": 1.3
-            }
-            
-            return int(prediction.predicted_wait_time * priority_multiplier.get(priority, 1.0))
+            predicted = int(prediction.predicted_wait_time * AI_PRIORITY_MULTIPLIER.get(priority, 1.0))
+
+            with _prediction_cache_lock:
+                if len(_prediction_cache) >= PREDICTION_CACHE_MAX_SIZE:
+                    _prediction_cache.clear()
+                _prediction_cache[cache_key] = predicted
+            return predicted
             
         except Exception as e:
-            print(f"AI prediction failed, using fallback: {e}")
+            logger.warning("AI prediction failed, using fallback", exc_info=e)
     
     # Fallback to heuristic
     # Use current_wait_time if available, otherwise estimated_time, or default to 30 minutes
     base_time = service.current_wait_time or service.estimated_time or 30
-    priority_multiplier = {
-        "urgent": 0.5,
-        "high": 0.8,
-        "medium": 1.0,
-        "low": 1.2
-    }
-    return int(base_time * priority_multiplier.get(priority, 1.0))
+    return int(base_time * HEURISTIC_PRIORITY_MULTIPLIER.get(priority, 1.0))
 
 def get_position(queue_entry: QueueEntry, db: Session) -> int:
-    earlier_entries = db.query(QueueEntry).filter(
-        QueueEntry.service_id == queue_entry.service_id,
-        QueueEntry.status == "waiting",
-        QueueEntry.created_at < queue_entry.created_at
-    ).count()
+    # Plain SELECT count(*) so the planner can use the waiting-entries index
+    # instead of counting over a wrapped subquery as Query.count() does
+    earlier_entries = db.execute(
+        select(func.count())
+        .select_from(QueueEntry)
+        .where(
+            QueueEntry.service_id == queue_entry.service_id,
+            QueueEntry.status == "waiting",
+            QueueEntry.created_at < queue_entry.created_at
+        )
+    ).scalar()
     return earlier_entries + 1
 
+def current_position(queue_entry: QueueEntry, db: Session) -> int:
+    """Stored position, falling back to counting for entries created before it was tracked"""
+    if queue_entry.position is not None:
+        return queue_entry.position
+    return get_position(queue_entry, db)
+
+def shift_waiting_positions(queue_entry: QueueEntry, delta: int, db: Session) -> None:
+    """Move every waiting entry that arrived after queue_entry by delta places"""
+    db.execute(
+        update(QueueEntry)
+        .where(
+            QueueEntry.service_id == queue_entry.service_id,
+            QueueEntry.status == "waiting",
+            QueueEntry.created_at > queue_entry.created_at,
+            QueueEntry.position.isnot(None)
+        )
+        .values(position=QueueEntry.position + delta)
+    )
+
+def _serialize_queue_row(row, **extra) -> dict:
+    return {
+        "id": row.id,
+        "queue_number": row.queue_number,
+        "service_id": row.service_id,
+        "patient_id": row.patient_id,
+        "status": row.status,
+        "priority": row.priority,
+        "estimated_wait_time": row.estimated_wait_time,
+        "ai_predicted_wait": row.ai_predicted_wait,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        **extra
+    }
+
 @router.get("/")
 async def get_all_queues(db: Session = Depends(get_db)):
     """Get all active queue entries"""
-    queues = db.query(QueueEntry).filter(
-        QueueEntry.status.in_(["waiting", "called", "serving"])
+    rows = db.execute(
+        select(*QUEUE_LIST_COLUMNS).where(QueueEntry.status.in_(ACTIVE_STATUSES))
     ).all()
-    return queues
+    return [_serialize_queue_row(row) for row in rows]
 
 @router.get("/service/{service_id}")
 async def get_service_queue(service_id: int, db: Session = Depends(get_db)):
     """Get queue entries for a specific service"""
-    queues = db.query(QueueEntry).filter(
-        QueueEntry.service_id == service_id,
-        QueueEntry.status.in_(["waiting", "called", "serving"])
-    ).order_by(QueueEntry.created_at).all()
+    rows = db.execute(
+        select(*QUEUE_LIST_COLUMNS)
+        .where(
+            QueueEntry.service_id == service_id,
+            QueueEntry.status.in_(ACTIVE_STATUSES)
+        )
+        .order_by(QueueEntry.created_at)
+    ).all()
     
-    # Format response with position for each entry
+    # Rows are in arrival order, so each position is one more than the
+    # number of waiting entries seen before it
     formatted_queues = []
-    for queue in queues:
-        formatted_queues.append({
-            "id": queue.id,
-            "queue_number": queue.queue_number,
-            "service_id": queue.service_id,
-            "patient_id": queue.patient_id,
-            "status": queue.status,
-            "priority": queue.priority,
-            "position": get_position(queue, db),
-            "estimated_wait_time": queue.estimated_wait_time,
-            "created_at": queue.created_at.isoformat() if queue.created_at else None
-        })
+    waiting_ahead = 0
+    for row in rows:
+        formatted_queues.append(_serialize_queue_row(row, position=waiting_ahead + 1))
+        if row.status == "waiting":
+            waiting_ahead += 1
     
     return formatted_queues
 
@@ -234,25 +330,46 @@ async def update_queue_status(
     db: Session = Depends(get_db)
 ):
     """Update queue entry status"""
-    queue_entry = db.query(QueueEntry).filter(QueueEntry.id == queue_id).first()
-    if not queue_entry:
+    # The previous status decides whether the positions behind this entry move
+    previous_status = db.execute(
+        select(QueueEntry.status).where(QueueEntry.id == queue_id)
+    ).scalar_one_or_none()
+    if previous_status is None:
         raise HTTPException(status_code=404, detail="Queue entry not found")
     
     # Map "in_progress" to "serving" for compatibility
     status = "serving" if request.status == "in_progress" else request.status
     
-    queue_entry.status = status
+    values = {"status": status}
     if status == "completed":
-        queue_entry.completed_at = datetime.utcnow()
+        # Naive UTC like created_at's default; the database's now() would be server-local on PostgreSQL
+        values["completed_at"] = datetime.utcnow()
     
-    db.commit()
-    db.refresh(queue_entry)
+    queue_entry = db.execute(
+        update(QueueEntry)
+        .where(QueueEntry.id == queue_id)
+        .values(**values)
+        .returning(QueueEntry)
+    ).scalar_one()
     
-    return {
+    # Keep the stored positions of later waiting patients in step
+    was_waiting = previous_status == "waiting"
+    if was_waiting and status != "waiting":
+        shift_waiting_positions(queue_entry, -1, db)
+    elif not was_waiting and status == "waiting":
+        queue_entry.position = get_position(queue_entry, db)
+        shift_waiting_positions(queue_entry, 1, db)
+    
+    # Build the response before commit so the entry isn't reloaded afterwards
+    response = {
         "id": queue_entry.id,
         "status": request.status,  # Return what the test expects
         "queue_number": queue_entry.queue_number
     }
+    db.commit()
+    await response_cache.invalidate_tag(SERVICES_CACHE_TAG)
+    
+    return response
 
 @router.post("/call-next")
 async def call_next_patient(
@@ -260,19 +377,39 @@ async def call_next_patient(
     db: Session = Depends(get_db)
 ):
     """Call next patient in queue"""
-    # Get next waiting patient for this service
-    next_patient = db.query(QueueEntry).filter(
-        QueueEntry.service_id == request.service_id,
-        QueueEntry.status == "waiting"
-    ).order_by(QueueEntry.created_at).first()
+    # Pick the oldest waiting patient for this service and flip it to called in
+    # one statement; rows already locked by a concurrent counter are skipped
+    next_waiting_id = (
+        select(QueueEntry.id)
+        .where(
+            QueueEntry.service_id == request.service_id,
+            QueueEntry.status == "waiting"
+        )
+        .order_by(QueueEntry.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    next_patient = db.execute(
+        update(QueueEntry)
+        .where(QueueEntry.id == next_waiting_id, QueueEntry.status == "waiting")
+        .values(status="called")
+        .returning(
+            QueueEntry.id,
+            QueueEntry.queue_number,
+            QueueEntry.service_id,
+            QueueEntry.status,
+            QueueEntry.created_at
+        )
+    ).first()
     
     if not next_patient:
         raise HTTPException(status_code=404, detail="No patients waiting")
     
-    # Update status to called
-    next_patient.status = "called"
+    # Everyone behind the called patient moves up one place
+    shift_waiting_positions(next_patient, -1, db)
     db.commit()
-    db.refresh(next_patient)
+    await response_cache.invalidate_tag(SERVICES_CACHE_TAG)
     
     return {
         "called_patient": {
@@ -6,6 +6,7 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
+from functools import lru_cache
 import io
 
 from app.database import get_db
@@ -17,6 +18,12 @@ from app.services.reporting_service import ReportingService
 router = APIRouter()
 
 
+@lru_cache(maxsize=1024)
+def _parse_iso_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an optional ISO date query parameter, memoized per string"""
+    return datetime.fromisoformat(value) if value else None
+
+
 @router.get("/patient/{patient_id}")
 def get_patient_report(
     patient_id: int,
@@ -38,8 +45,8 @@ def get_patient_report(
     """
     try:
         # Parse dates
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_iso_date(start_date)
+        end_dt = _parse_iso_date(end_date)
         
         # Generate report
         reporting_service = ReportingService(db)
@@ -78,8 +85,8 @@ def export_patient_report_csv(
     """
     try:
         # Parse dates
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_iso_date(start_date)
+        end_dt = _parse_iso_date(end_date)
         
         # Generate report
         reporting_service = ReportingService(db)
@@ -124,8 +131,8 @@ def get_queue_analytics(
     """
     try:
         # Parse dates
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_iso_date(start_date)
+        end_dt = _parse_iso_date(end_date)
         
         # Generate report
         reporting_service = ReportingService(db)
@@ -159,8 +166,8 @@ def export_queue_analytics_csv(
     """
     try:
         # Parse dates
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_iso_date(start_date)
+        end_dt = _parse_iso_date(end_date)
         
         # Generate report
         reporting_service = ReportingService(db)
@@ -209,8 +216,8 @@ def get_staff_performance(
             staff_id = current_user.id
         
         # Parse dates
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_iso_date(start_date)
+        end_dt = _parse_iso_date(end_date)
         
         # Generate report
         reporting_service = ReportingService(db)
@@ -255,8 +262,8 @@ def get_financial_report(
             )
         
         # Parse dates
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_iso_date(start_date)
+        end_dt = _parse_iso_date(end_date)
         
         # Generate report
         reporting_service = ReportingService(db)
@@ -301,8 +308,8 @@ def export_financial_report_csv(
             )
         
         # Parse dates
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_iso_date(start_date)
+        end_dt = _parse_iso_date(end_date)
         
         # Generate report
         reporting_service = ReportingService(db)
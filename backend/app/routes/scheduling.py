@@ -1,13 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Boolean, Integer, Time, exists, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from functools import lru_cache
+from typing import Annotated, List, Optional, Tuple
+from app.database import get_async_db, unit_of_work
 from app.models.models import User, Schedule
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_user_async, require_roles
+from app.services.cache_service import response_cache
 from pydantic import BaseModel
-from datetime import datetime, time, timedelta
+from datetime import date as _date, datetime, time
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+CurrentUser = Annotated[User, Depends(get_current_user_async)]
+
+# Slot listings are cached briefly and dropped whenever a schedule for that weekday changes
+SLOT_CACHE_TTL_SECONDS = 30
+
+def _slot_cache_tag(day_of_week: int) -> str:
+    return f"slots:dow:{day_of_week}"
+
+SLOT_SECONDS = 30 * 60
+
+def _format_hhmm(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}"
+
+@lru_cache(maxsize=256)
+def _slot_template(start: time, end: time) -> Tuple[Tuple[str, str], ...]:
+    """30-minute (start, end) slot labels for one shift; shifts repeat across staff and days"""
+    start_seconds = start.hour * 3600 + start.minute * 60 + start.second
+    end_seconds = end.hour * 3600 + end.minute * 60 + end.second
+    return tuple(
+        (_format_hhmm(slot_start), _format_hhmm(slot_start + SLOT_SECONDS))
+        for slot_start in range(start_seconds, end_seconds - SLOT_SECONDS + 1, SLOT_SECONDS)
+    )
 
 class ScheduleCreate(BaseModel):
     staff_id: int
@@ -21,6 +48,19 @@ class ScheduleUpdate(BaseModel):
     end_time: time = None
     is_available: bool = None
 
+class ScheduleOut(BaseModel):
+    id: int
+    staff_id: int
+    day_of_week: int
+    start_time: time
+    end_time: time
+    is_available: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
 # Note: This is a simplified scheduling system. In a real application,
 # you might want a more complex Schedule model in the database.
 # For now, we'll use a simple in-memory approach or extend the User model.
@@ -28,96 +68,118 @@ class ScheduleUpdate(BaseModel):
 @router.post("/", response_model=dict)
 async def create_schedule(
     schedule: ScheduleCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Only admin can create schedules for others
     if current_user.role != "admin" and schedule.staff_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to create schedules")
 
-    # Check if staff exists and is staff/admin
-    staff = db.query(User).filter(User.id == schedule.staff_id).first()
-    if not staff or staff.role not in ["admin", "staff"]:
-        raise HTTPException(status_code=404, detail="Staff member not found")
-
-    # For now, we'll store schedule info in a simple way
-    # In a real app, you'd have a Schedule model
-    schedule_data = {
-        "staff_id": schedule.staff_id,
-        "day_of_week": schedule.day_of_week,
-        "start_time": schedule.start_time.isoformat(),
-        "end_time": schedule.end_time.isoformat(),
-        "is_available": schedule.is_available
-    }
+    # Insert only if the staff member exists and is staff/admin, in one statement
+    staff_exists = exists().where(
+        User.id == schedule.staff_id,
+        User.role.in_(["admin", "staff"])
+    )
+    schedule_values = select(
+        literal(schedule.staff_id, Integer),
+        literal(schedule.day_of_week, Integer),
+        literal(schedule.start_time, Time),
+        literal(schedule.end_time, Time),
+        literal(schedule.is_available, Boolean)
+    ).where(staff_exists)
 
     # Create and save schedule to database
-    try:
-        db_schedule = Schedule(
-            staff_id=schedule.staff_id,
-            day_of_week=schedule.day_of_week,
-            start_time=schedule.start_time.isoformat(),
-            end_time=schedule.end_time.isoformat(),
-            is_available=schedule.is_available
-        )
-        db.add(db_schedule)
-        db.commit()
-        db.refresh(db_schedule)
-        
-        return {
-            "message": "Schedule created successfully",
-            "schedule": {
-                "id": db_schedule.id,
-                "staff_id": db_schedule.staff_id,
-                "day_of_week": db_schedule.day_of_week,
-                "start_time": db_schedule.start_time,
-                "end_time": db_schedule.end_time,
-                "is_available": db_schedule.is_available
-            }
+    async with unit_of_work(db):
+        db_schedule = (await db.execute(
+            insert(Schedule)
+            .from_select(
+                ["staff_id", "day_of_week", "start_time", "end_time", "is_available"],
+                schedule_values
+            )
+            .returning(Schedule)
+        )).scalar_one_or_none()
+        if db_schedule is None:
+            raise HTTPException(status_code=404, detail="Staff member not found")
+    await response_cache.invalidate_tag(_slot_cache_tag(db_schedule.day_of_week))
+
+    return {
+        "message": "Schedule created successfully",
+        "schedule": {
+            "id": db_schedule.id,
+            "staff_id": db_schedule.staff_id,
+            "day_of_week": db_schedule.day_of_week,
+            "start_time": db_schedule.start_time,
+            "end_time": db_schedule.end_time,
+            "is_available": db_schedule.is_available
         }
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to create schedule: {str(e)}")
+    }
+
+@router.post("/bulk", response_model=dict)
+async def create_schedules_bulk(
+    schedules: List[ScheduleCreate],
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create several schedules (e.g. a staff member's week) in one statement"""
+    if not schedules:
+        raise HTTPException(status_code=400, detail="No schedules provided")
 
-@router.get("/staff/{staff_id}", response_model=List[dict])
+    staff_ids = {s.staff_id for s in schedules}
+
+    # Only admin can create schedules for others
+    if current_user.role != "admin" and staff_ids != {current_user.id}:
+        raise HTTPException(status_code=403, detail="Not authorized to create schedules")
+
+    # Validate every referenced staff member with a single query
+    valid_ids = set((await db.execute(
+        select(User.id).where(User.id.in_(staff_ids), User.role.in_(["admin", "staff"]))
+    )).scalars().all())
+    missing = staff_ids - valid_ids
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Staff member(s) not found: {sorted(missing)}")
+
+    async with unit_of_work(db):
+        # One row per schedule in request order, even when the INSERT is batched
+        created = (await db.execute(
+            insert(Schedule).returning(Schedule, sort_by_parameter_order=True),
+            [s.model_dump() for s in schedules]
+        )).scalars().all()
+
+    for day_of_week in {s.day_of_week for s in schedules}:
+        await response_cache.invalidate_tag(_slot_cache_tag(day_of_week))
+
+    return {
+        "message": f"{len(created)} schedules created successfully",
+        "schedules": [ScheduleOut.model_validate(s) for s in created]
+    }
+
+@router.get("/staff/{staff_id}", response_model=List[ScheduleOut])
 async def get_staff_schedule(
     staff_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Annotated[User, Depends(require_roles("admin", "staff", self_param="staff_id"))],
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Check permissions
-    if current_user.role not in ["admin", "staff"] and current_user.id != staff_id:
-        raise HTTPException(status_code=403, detail="Not authorized to view this schedule")
+    schedules = (await db.execute(
+        select(Schedule).where(Schedule.staff_id == staff_id)
+    )).scalars().all()
 
-    staff = db.query(User).filter(User.id == staff_id).first()
-    if not staff:
-        raise HTTPException(status_code=404, detail="Staff member not found")
+    # Rows imply the staff member exists (FK); only probe users to tell 404 from "no schedules"
+    if not schedules:
+        staff_exists = (await db.execute(select(exists().where(User.id == staff_id)))).scalar()
+        if not staff_exists:
+            raise HTTPException(status_code=404, detail="Staff member not found")
 
-    # Fetch actual schedule data from database
-    schedules = db.query(Schedule).filter(Schedule.staff_id == staff_id).all()
-    
-    return [
-        {
-            "id": s.id,
-            "staff_id": s.staff_id,
-            "day_of_week": s.day_of_week,
-            "start_time": s.start_time,
-            "end_time": s.end_time,
-            "is_available": s.is_available,
-            "created_at": s.created_at.isoformat() if s.created_at else None,
-            "updated_at": s.updated_at.isoformat() if s.updated_at else None
-        }
-        for s in schedules
-    ]
+    return schedules
 
 @router.put("/{schedule_id}", response_model=dict)
 async def update_schedule(
     schedule_id: int,
     schedule_update: ScheduleUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Fetch the schedule
-    schedule = db.query(Schedule).filter(Schedule.id == schedule_id).first()
+    schedule = (await db.execute(select(Schedule).where(Schedule.id == schedule_id))).scalar_one_or_none()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     
@@ -126,79 +188,75 @@ async def update_schedule(
         raise HTTPException(status_code=403, detail="Not authorized to update this schedule")
     
     # Update fields
-    try:
+    async with unit_of_work(db):
         if schedule_update.start_time is not None:
-            schedule.start_time = schedule_update.start_time.isoformat()
+            schedule.start_time = schedule_update.start_time
         if schedule_update.end_time is not None:
-            schedule.end_time = schedule_update.end_time.isoformat()
+            schedule.end_time = schedule_update.end_time
         if schedule_update.is_available is not None:
             schedule.is_available = schedule_update.is_available
-        
-        db.commit()
-        db.refresh(schedule)
-        
-        return {
-            "message": "Schedule updated successfully",
-            "schedule": {
-                "id": schedule.id,
-                "staff_id": schedule.staff_id,
-                "day_of_week": schedule.day_of_week,
-                "start_time": schedule.start_time,
-                "end_time": schedule.end_time,
-                "is_available": schedule.is_available
-            }
+    await response_cache.invalidate_tag(_slot_cache_tag(schedule.day_of_week))
+
+    return {
+        "message": "Schedule updated successfully",
+        "schedule": {
+            "id": schedule.id,
+            "staff_id": schedule.staff_id,
+            "day_of_week": schedule.day_of_week,
+            "start_time": schedule.start_time,
+            "end_time": schedule.end_time,
+            "is_available": schedule.is_available
         }
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to update schedule: {str(e)}")
+    }
 
-@router.get("/available/{service_id}", response_model=List[dict])
+@router.get(
+    "/available/{service_id}",
+    response_model=List[dict],
+    description="30-minute slots for the date; an empty list means no staff are scheduled that day"
+)
 async def get_available_slots(
     service_id: int,
     date: str,  # YYYY-MM-DD format
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Get available time slots for a service on a specific date
     try:
-        target_date = datetime.strptime(date, "%Y-%m-%d")
+        target_date = _date.fromisoformat(date)
         day_of_week = target_date.weekday()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
-    # Query database for available schedules on this day of week
-    schedules = db.query(Schedule).filter(
-        Schedule.day_of_week == day_of_week,
-        Schedule.is_available == True
-    ).all()
+    cache_key = f"slots:{service_id}:{target_date.isoformat()}"
+    cached_slots = await response_cache.get(cache_key)
+    if cached_slots is not None:
+        return cached_slots
     
-    # Generate time slots from schedules
-    available_slots = []
-    for schedule in schedules:
-        try:
-            start = datetime.strptime(schedule.start_time, "%H:%M:%S").time()
-            end = datetime.strptime(schedule.end_time, "%H:%M:%S").time()
-            
-            # Create 30-minute slots
-            current_time = datetime.combine(target_date, start)
-            end_time = datetime.combine(target_date, end)
-            
-            while current_time < end_time:
-                slot_end = current_time + timedelta(minutes=30)
-                if slot_end <= end_time:
-                    available_slots.append({
-                        "start_time": current_time.strftime("%H:%M"),
-                        "end_time": slot_end.strftime("%H:%M"),
-                        "available": True,
-                        "staff_id": schedule.staff_id
-                    })
-                current_time = slot_end
-        except Exception:
-            continue
+    # Query only the columns slot generation needs for this day of week, with the
+    # staff name joined in so no per-row staff lookups are needed
+    schedules = (await db.execute(
+        select(Schedule.staff_id, User.name, Schedule.start_time, Schedule.end_time)
+        .join(User, User.id == Schedule.staff_id)
+        .where(
+            Schedule.day_of_week == day_of_week,
+            Schedule.is_available == True
+        )
+    )).all()
+    
+    # Stitch the cached 30-minute templates of each shift together
+    available_slots = [
+        {
+            "start_time": slot_start,
+            "end_time": slot_end,
+            "available": True,
+            "staff_id": staff_id,
+            "staff_name": staff_name
+        }
+        for staff_id, staff_name, start, end in schedules
+        for slot_start, slot_end in _slot_template(start, end)
+    ]
     
-    return available_slots if available_slots else [
-        {"start_time": "09:00", "end_time": "09:30", "available": True},
-        {"start_time": "09:30", "end_time": "10:00", "available": True},
-        {"start_time": "10:00", "end_time": "10:30", "available": False},
-        {"start_time": "10:30", "end_time": "11:00", "available": True},
-    ]
\ No newline at end of file
+    await response_cache.set(
+        cache_key, available_slots, SLOT_CACHE_TTL_SECONDS, tags=(_slot_cache_tag(day_of_week),)
+    )
+    return available_slots
@@ -3,17 +3,61 @@ Service Recommendation API Routes
 AI suggests appropriate department based on symptoms using ML and medical knowledge
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+import asyncio
 import joblib
+import numpy as np
+import orjson
 import os
-from app.database import get_db
-from app.models.models import Service
+import queue
+import re
+import sys
+import threading
+import time
 
-router = APIRouter()
+try:
+    import ahocorasick
+except ImportError:
+    # pyahocorasick is optional; phrase scanning falls back to a precompiled regex
+    ahocorasick = None
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; department scoring falls back to np.bincount
+    njit = None
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+MODEL_PATH = 'models/symptom_classifier.pkl'
+VECTORIZER_PATH = 'models/symptom_tfidf_vectorizer.pkl'
+ENCODER_PATH = 'models/department_encoder.pkl'
+RESULTS_PATH = 'models/service_recommendation_results.pkl'
+
+RECOMMENDATION_CACHE_SIZE = 4096
+
+# Worker processes for recommendation inference (bypasses the GIL); 0 keeps it on the thread pool
+RECOMMENDER_PROCESS_WORKERS = int(os.getenv("RECOMMENDER_PROCESS_WORKERS", "0"))
+
+# Largest number of queued symptom strings vectorized and classified together
+INFERENCE_BATCH_SIZE = 32
+
+# Knowledge base entry kinds and their rule-scoring weights
+TERM_KEYWORD = 0
+TERM_SYMPTOM = 1
+KEYWORD_WEIGHT = 0.1
+SYMPTOM_WEIGHT = 0.2
+
+EMERGENCY_KEYWORDS = frozenset(['emergency', 'urgent', 'trauma', 'accident', 'severe', 'critical', 'life-threatening'])
+# Same word-start matching as the knowledge base scan, checked before any model work
+EMERGENCY_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in sorted(EMERGENCY_KEYWORDS)) + ")")
 
 class ServiceRecommendationRequest(BaseModel):
     """Request model for service recommendation"""
@@ -43,6 +87,90 @@ class DepartmentInfoResponse(BaseModel):
     priority_level: str
     description: str
 
+def _score_departments(entry_ids, entry_dept_idx, entry_weight, n_depts):
+    """Summed weight per department of the given knowledge base entries"""
+    return np.bincount(entry_dept_idx[entry_ids], weights=entry_weight[entry_ids], minlength=n_depts)
+
+if njit is not None:
+    @njit(cache=True)
+    def _score_departments(entry_ids, entry_dept_idx, entry_weight, n_depts):
+        scores = np.zeros(n_depts, np.float64)
+        for entry_id in entry_ids:
+            scores[entry_dept_idx[entry_id]] += entry_weight[entry_id]
+        return scores
+
+# Response timestamps are shared for this long instead of formatting a datetime per request
+TIMESTAMP_RESOLUTION_SECONDS = 0.1
+_timestamp_cache = (float("-inf"), "")
+
+def _now_iso() -> str:
+    """datetime.now().isoformat(), refreshed at most every TIMESTAMP_RESOLUTION_SECONDS"""
+    global _timestamp_cache
+    refreshed_at, stamp = _timestamp_cache
+    now = time.monotonic()
+    if now - refreshed_at >= TIMESTAMP_RESOLUTION_SECONDS:
+        stamp = datetime.now().isoformat()
+        _timestamp_cache = (now, stamp)
+    return stamp
+
+def _normalize(symptoms: str) -> str:
+    """Lowercase and collapse whitespace once, interned so equal queries share one cache key object"""
+    return sys.intern(" ".join(symptoms.lower().split()))
+
+def _is_word_char(char: str) -> bool:
+    """Whether the character counts as a word character for regex \\b"""
+    return char.isalnum() or char == "_"
+
+class InferenceBatcher:
+    """
+    Coalesces concurrent single-row predictions into batched model calls
+
+    Callers block in predict() while a background thread drains the queue
+    and runs predict_batch once for everything waiting (up to max_batch_size),
+    so requests arriving while a batch is running share the next one. An
+    idle queue adds no delay to a lone request.
+    """
+
+    def __init__(self, predict_batch: Callable[[List[str]], List], max_batch_size: int = INFERENCE_BATCH_SIZE):
+        self._predict_batch = predict_batch
+        self._max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def predict(self, text: str):
+        """Return predict_batch([text])[0], batched with any concurrent callers"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                results = self._predict_batch([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
 class IntelligentServiceRecommender:
     """AI-powered service recommendation based on symptoms and patient data"""
     
@@ -54,26 +182,42 @@ class IntelligentServiceRecommender:
         self.symptom_keywords = {}
         self.department_specialties = {}
         self.confidence_threshold = 0.6
-        self._load_model()
+        # Repeat queries (retries, autocomplete) are served from memory; cleared on model reload
+        self._recommend_cached = lru_cache(maxsize=RECOMMENDATION_CACHE_SIZE)(self._recommend)
+        self._batcher = InferenceBatcher(self._predict_proba_batch)
+        # (analyzer, vocabulary, idf, sublinear_tf, norm) exported from the fitted vectorizer
+        self._tfidf_params = None
+        # The model is loaded on first use (see _ensure_model_loaded), not at import
+        self._model_lock = threading.Lock()
+        self._model_ready = False
         self._build_medical_knowledge_base()
     
     def _load_model(self):
         """Load the trained model and components"""
         try:
-            model_path = 'models/symptom_classifier.pkl'
-            vectorizer_path = 'models/symptom_tfidf_vectorizer.pkl'
-            encoder_path = 'models/department_encoder.pkl'
-            
-            if all(os.path.exists(path) for path in [model_path, vectorizer_path, encoder_path]):
-                self.symptom_classifier = joblib.load(model_path)
-                self.tfidf_vectorizer = joblib.load(vectorizer_path)
-                self.department_encoder = joblib.load(encoder_path)
+            if all(os.path.exists(path) for path in [MODEL_PATH, VECTORIZER_PATH, ENCODER_PATH]):
+                # Memory-map the NumPy arrays: pages load lazily and are shared across forked workers
+                self.symptom_classifier = joblib.load(MODEL_PATH, mmap_mode='r')
+                self.tfidf_vectorizer = joblib.load(VECTORIZER_PATH, mmap_mode='r')
+                self.department_encoder = joblib.load(ENCODER_PATH, mmap_mode='r')
+                self._tfidf_params = self._export_tfidf(self.tfidf_vectorizer)
+                # Prefault the hot pages so the first request doesn't pay for them
+                self._predict_proba_batch([""])
+                self._recommend_cached.cache_clear()
                 print("✅ Service recommendation model loaded successfully")
             else:
                 print("⚠️ Service recommendation model not found. Using rule-based fallback.")
         except Exception as e:
             print(f"❌ Error loading service recommendation model: {e}")
     
+    def _ensure_model_loaded(self):
+        """Load the model on first use; concurrent first callers wait for a single load"""
+        if not self._model_ready:
+            with self._model_lock:
+                if not self._model_ready:
+                    self._load_model()
+                    self._model_ready = True
+    
     def _build_medical_knowledge_base(self):
         """Build comprehensive medical knowledge base for symptom-department mapping"""
         
@@ -138,24 +282,133 @@ class IntelligentServiceRecommender:
                 if keyword not in self.symptom_keywords:
                     self.symptom_keywords[keyword] = []
                 self.symptom_keywords[keyword].append(dept)
+        
+        # Flatten the knowledge base into parallel arrays with one slot per (department, phrase)
+        # entry in knowledge base order: phrase, department index, kind and rule weight
+        self._dept_names = list(self.department_specialties)
+        entry_terms, entry_dept, entry_kind = [], [], []
+        for dept_idx, info in enumerate(self.department_specialties.values()):
+            for kind in (TERM_KEYWORD, TERM_SYMPTOM):
+                for term in info['keywords' if kind == TERM_KEYWORD else 'symptoms']:
+                    entry_terms.append(term)
+                    entry_dept.append(dept_idx)
+                    entry_kind.append(kind)
+        self._entry_terms = entry_terms
+        self._entry_dept_idx = np.array(entry_dept, dtype=np.int32)
+        self._entry_kind = np.array(entry_kind, dtype=np.int8)
+        self._entry_weight = np.where(self._entry_kind == TERM_KEYWORD, KEYWORD_WEIGHT, SYMPTOM_WEIGHT)
+        self._entry_keyword_weight = np.where(self._entry_kind == TERM_KEYWORD, KEYWORD_WEIGHT, 0.0)
+        
+        # Compile the scoring kernel now rather than on the first request
+        _score_departments(np.empty(0, dtype=np.intp), self._entry_dept_idx, self._entry_weight, len(self._dept_names))
+        
+        # Entry ids of each distinct phrase (a phrase may belong to several departments)
+        self._term_entries = {}
+        for entry_id, term in enumerate(entry_terms):
+            self._term_entries.setdefault(term, []).append(entry_id)
+        
+        # Longest phrases first so each position reports its longest match. The lookahead is
+        # zero-width, so overlapping phrases ("chest", "chest pain", "pain") are all seen; a match
+        # must start on a word boundary but may run into a longer word ("seizures", "fractured")
+        terms = sorted(self._term_entries, key=len, reverse=True)
+        self._term_pattern = re.compile(r"\b(?=(" + "|".join(re.escape(term) for term in terms) + "))")
+        # A phrase matching at a position implies every phrase that is its prefix matches there too
+        self._term_prefixes = {term: [other for other in terms if term.startswith(other)] for term in terms}
+        
+        # With pyahocorasick installed, one linear pass over the text reports every
+        # (overlapping) phrase occurrence regardless of knowledge base size
+        self._term_automaton = None
+        if ahocorasick is not None:
+            self._term_automaton = ahocorasick.Automaton()
+            for term in terms:
+                self._term_automaton.add_word(term, term)
+            self._term_automaton.make_automaton()
+        
+        # The department listings are static: serialize them once
+        self._departments_json = orjson.dumps(self.get_all_departments())
+        self._keywords_json = orjson.dumps(self.get_symptom_keywords())
+    
+    def _scan_terms(self, symptoms: str) -> Set[str]:
+        """Return every knowledge base phrase found in the (lowercased) symptoms"""
+        found = set()
+        if self._term_automaton is not None:
+            for end, term in self._term_automaton.iter(symptoms):
+                start = end - len(term) + 1
+                # Same rule as the regex: a phrase must start on a word boundary
+                if start == 0 or not _is_word_char(symptoms[start - 1]):
+                    found.add(term)
+            return found
+        for match in self._term_pattern.finditer(symptoms):
+            found.update(self._term_prefixes[match.group(1)])
+        return found
+    
+    def _entry_ids(self, found: Set[str]) -> np.ndarray:
+        """Knowledge base entry ids of the found phrases, in knowledge base order"""
+        return np.array(sorted(entry_id for term in found for entry_id in self._term_entries[term]), dtype=np.intp)
+    
+    def _department_scores(self, found: Set[str], keywords_only: bool = False) -> np.ndarray:
+        """Summed rule weight (KEYWORD_WEIGHT per keyword, SYMPTOM_WEIGHT per symptom) per department"""
+        weights = self._entry_keyword_weight if keywords_only else self._entry_weight
+        return _score_departments(self._entry_ids(found), self._entry_dept_idx, weights, len(self._dept_names))
+    
+    def _department_matches(self, found: Set[str]) -> Dict[str, Tuple[List[str], List[str]]]:
+        """Group found phrases into {department: (keywords, symptoms)} in knowledge base order"""
+        matches = {}
+        for entry_id in self._entry_ids(found):
+            dept = self._dept_names[self._entry_dept_idx[entry_id]]
+            keywords, symptoms = matches.setdefault(dept, ([], []))
+            (keywords if self._entry_kind[entry_id] == TERM_KEYWORD else symptoms).append(self._entry_terms[entry_id])
+        return matches
     
     def recommend_service(self, request: ServiceRecommendationRequest) -> ServiceRecommendationResponse:
         """Recommend appropriate department based on symptoms"""
         
+        self._ensure_model_loaded()
+        
         # Clean and preprocess symptoms
-        symptoms_clean = request.symptoms.lower().strip()
+        symptoms_clean = _normalize(request.symptoms)
+        
+        department, confidence, reasoning, alternatives, method = self._recommend_cached(
+            symptoms_clean, request.age_group, request.urgency_level
+        )
         
-        # Get ML prediction if model is available
-        if self.symptom_classifier is not None:
+        return ServiceRecommendationResponse(
+            recommended_department=department,
+            confidence=confidence,
+            reasoning=reasoning,
+            alternative_departments=[
+                {'department': dept, 'confidence': conf} for dept, conf in alternatives
+            ],
+            urgency_level=request.urgency_level or 'medium',
+            symptoms_analyzed=symptoms_clean,
+            age_group=request.age_group,
+            recommendation_method=method,
+            timestamp=_now_iso()
+        )
+    
+    def _recommend(self, symptoms_clean: str, age_group: Optional[str], urgency_level: Optional[str]) -> Tuple:
+        """
+        Compute (department, confidence, reasoning, alternatives, method) for cleaned symptoms
+        
+        Pure with respect to its arguments once the model is loaded, so results are
+        memoized through _recommend_cached as immutable tuples.
+        """
+        # Get ML prediction if model is available; clear-cut emergencies are decided
+        # by the emergency rule regardless, so they skip the model entirely
+        if self.symptom_classifier is not None and not EMERGENCY_PATTERN.search(symptoms_clean):
             ml_recommendation = self._get_ml_recommendation(symptoms_clean)
         else:
             ml_recommendation = None
         
+        # Find knowledge base phrases once for all rule-based helpers
+        found = self._scan_terms(symptoms_clean)
+        
         # Apply medical knowledge base rules
         knowledge_recommendation = self._apply_medical_rules(
             symptoms_clean, 
-            request.age_group, 
-            request.urgency_level
+            age_group, 
+            urgency_level,
+            found
         )
         
         # Combine ML and rule-based recommendations
@@ -167,45 +420,102 @@ class IntelligentServiceRecommender:
         
         # Get confidence and reasoning
         confidence = final_recommendation['confidence']
-        reasoning = self._generate_reasoning(symptoms_clean, final_recommendation['department'])
+        reasoning = self._generate_reasoning(symptoms_clean, final_recommendation['department'], found)
         
         # Get alternative departments
-        alternatives = self._get_alternative_departments(symptoms_clean, final_recommendation['department'])
+        alternatives = self._get_alternative_departments(
+            symptoms_clean, final_recommendation['department'], found, ml_recommendation
+        )
         
-        return ServiceRecommendationResponse(
-            recommended_department=final_recommendation['department'],
-            confidence=round(confidence, 3),
-            reasoning=reasoning,
-            alternative_departments=alternatives,
-            urgency_level=request.urgency_level or 'medium',
-            symptoms_analyzed=symptoms_clean,
-            age_group=request.age_group,
-            recommendation_method=final_recommendation.get('method', 'rule_based'),
-            timestamp=datetime.now().isoformat()
+        return (
+            final_recommendation['department'],
+            round(float(confidence), 3),
+            reasoning,
+            tuple((alt['department'], float(alt['confidence'])) for alt in alternatives),
+            final_recommendation.get('method', 'rule_based')
         )
     
+    @staticmethod
+    def _export_tfidf(vectorizer) -> Optional[Tuple]:
+        """
+        Pull what serving needs out of a fitted TfidfVectorizer, or None to keep using transform
+        
+        _tfidf_transform only reproduces word analysis with the default tokenizer and
+        preprocessor, raw term counts, idf weighting, l1/l2/no norm and float64 output
+        (sublinear_tf is supported); any other setting falls back to vectorizer.transform.
+        """
+        try:
+            if (vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None
+                    or vectorizer.preprocessor is not None or vectorizer.binary
+                    or vectorizer.use_idf is False or vectorizer.norm not in ('l1', 'l2', None)
+                    or np.dtype(vectorizer.dtype) != np.float64):
+                return None
+            idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+            return (vectorizer.build_analyzer(), dict(vectorizer.vocabulary_), idf,
+                    vectorizer.sublinear_tf, vectorizer.norm)
+        except AttributeError:
+            return None
+    
+    def _tfidf_transform(self, symptoms_batch: List[str]) -> np.ndarray:
+        """TfidfVectorizer.transform as a dense NumPy batch (at most INFERENCE_BATCH_SIZE short rows)"""
+        analyzer, vocabulary, idf, sublinear_tf, norm = self._tfidf_params
+        n_features = len(idf)
+        X = np.zeros((len(symptoms_batch), n_features), dtype=np.float64)
+        for row, text in enumerate(symptoms_batch):
+            ids = [vocabulary[token] for token in analyzer(text) if token in vocabulary]
+            if ids:
+                X[row] = np.bincount(ids, minlength=n_features)
+        if sublinear_tf:
+            present = X > 0
+            np.log(X, out=X, where=present)
+            X[present] += 1
+        X *= idf
+        if norm is not None:
+            lengths = np.linalg.norm(X, ord=1 if norm == 'l1' else 2, axis=1, keepdims=True)
+            np.divide(X, lengths, out=X, where=lengths > 0)
+        return X
+    
+    def _predict_proba_batch(self, symptoms_batch: List[str]):
+        """Vectorize and classify many symptom strings with one transform + predict_proba"""
+        if self._tfidf_params is not None:
+            return self.symptom_classifier.predict_proba(self._tfidf_transform(symptoms_batch))
+        return self.symptom_classifier.predict_proba(self.tfidf_vectorizer.transform(symptoms_batch))
+    
+    def _predict_proba(self, symptoms: str):
+        """Class probabilities for one symptom string, batched with concurrent requests"""
+        return self._batcher.predict(symptoms)
+    
     def _get_ml_recommendation(self, symptoms: str) -> Optional[Dict]:
-        """Get ML-based recommendation"""
+        """
+        Get ML-based recommendation
+        
+        Also returns the full class probabilities ('all_probs', 'classes') so
+        alternatives can be ranked without running the model again.
+        """
         try:
-            symptoms_tfidf = self.tfidf_vectorizer.transform([symptoms])
-            prediction_proba = self.symptom_classifier.predict_proba(symptoms_tfidf)[0]
-            
-            # Get top prediction
+            prediction_proba = np.asarray(self._predict_proba(symptoms))
             department_names = self.department_encoder.classes_
-            predictions = list(zip(department_names, prediction_proba))
-            predictions.sort(key=lambda x: x[1], reverse=True)
             
-            top_dept, top_conf = predictions[0]
-            return {'department': top_dept, 'confidence': top_conf, 'method': 'ml'}
+            # Get top prediction
+            top = int(np.argmax(prediction_proba))
+            return {
+                'department': department_names[top],
+                'confidence': float(prediction_proba[top]),
+                'method': 'ml',
+                'all_probs': prediction_proba,
+                'classes': department_names
+            }
         except:
             return None
     
-    def _apply_medical_rules(self, symptoms: str, age_group: str = None, urgency_level: str = None) -> Dict:
+    def _apply_medical_rules(self, symptoms: str, age_group: str = None, urgency_level: str = None,
+                             found: Optional[Set[str]] = None) -> Dict:
         """Apply medical knowledge base rules for department recommendation"""
+        if found is None:
+            found = self._scan_terms(symptoms)
         
         # Emergency cases
-        emergency_keywords = ['emergency', 'urgent', 'trauma', 'accident', 'severe', 'critical', 'life-threatening']
-        if any(keyword in symptoms for keyword in emergency_keywords):
+        if not EMERGENCY_KEYWORDS.isdisjoint(found):
             return {'department': 'Emergency', 'confidence': 0.95, 'method': 'emergency_rule'}
         
         # Age-specific rules
@@ -213,14 +523,13 @@ class IntelligentServiceRecommender:
             if any(keyword in symptoms for keyword in ['fever', 'cough', 'cold', 'vaccination']):
                 return {'department': 'Pediatrics', 'confidence': 0.90, 'method': 'age_specific'}
         
-        # Symptom-based rules
-        for dept, info in self.department_specialties.items():
-            keyword_matches = sum(1 for keyword in info['keywords'] if keyword in symptoms)
-            symptom_matches = sum(1 for symptom in info['symptoms'] if symptom in symptoms)
-            
-            if keyword_matches > 0 or symptom_matches > 0:
-                confidence = min(0.9, 0.5 + (keyword_matches * 0.1) + (symptom_matches * 0.2))
-                return {'department': dept, 'confidence': confidence, 'method': 'symptom_matching'}
+        # Symptom-based rules: first department (in knowledge base order) with any match
+        scores = self._department_scores(found)
+        matched = np.flatnonzero(scores)
+        if matched.size:
+            first = matched[0]
+            confidence = min(0.9, 0.5 + float(scores[first]))
+            return {'department': self._dept_names[first], 'confidence': confidence, 'method': 'symptom_matching'}
         
         # Default to Internal Medicine
         return {'department': 'Internal Medicine', 'confidence': 0.3, 'method': 'default'}
@@ -249,50 +558,54 @@ class IntelligentServiceRecommender:
         # Use knowledge base recommendation
         return knowledge_recommendation
     
-    def _generate_reasoning(self, symptoms: str, department: str) -> str:
+    def _generate_reasoning(self, symptoms: str, department: str, found: Optional[Set[str]] = None) -> str:
         """Generate human-readable reasoning for the recommendation"""
+        if found is None:
+            found = self._scan_terms(symptoms)
         
         dept_info = self.department_specialties.get(department, {})
         keywords = dept_info.get('keywords', [])
         
         # Find matching keywords
-        matching_keywords = [kw for kw in keywords if kw in symptoms]
+        matching_keywords = [kw for kw in keywords if kw in found]
         
         if matching_keywords:
             return f"Recommended {department} based on symptoms: {', '.join(matching_keywords[:3])}"
         else:
             return f"Recommended {department} based on general medical assessment and historical patterns"
     
-    def _get_alternative_departments(self, symptoms: str, primary_dept: str) -> List[Dict]:
-        """Get alternative department recommendations"""
+    def _get_alternative_departments(self, symptoms: str, primary_dept: str,
+                                     found: Optional[Set[str]] = None,
+                                     ml_recommendation: Optional[Dict] = None) -> List[Dict]:
+        """Get alternative department recommendations, ranking the ML probabilities already computed"""
         
         alternatives = []
         
         # Get ML alternatives if available
-        if self.symptom_classifier is not None:
-            try:
-                symptoms_tfidf = self.tfidf_vectorizer.transform([symptoms])
-                prediction_proba = self.symptom_classifier.predict_proba(symptoms_tfidf)[0]
-                
-                department_names = self.department_encoder.classes_
-                predictions = list(zip(department_names, prediction_proba))
-                predictions.sort(key=lambda x: x[1], reverse=True)
-                
-                # Get top 3 alternatives (excluding primary)
-                for dept, conf in predictions[1:4]:
-                    if dept != primary_dept:
-                        alternatives.append({'department': dept, 'confidence': round(conf, 3)})
-            except:
-                pass
+        if ml_recommendation is not None:
+            probs = np.asarray(ml_recommendation['all_probs'])
+            # Only the 4 most likely classes matter: select them, then order just those
+            top = min(4, probs.size)
+            idx = np.argpartition(-probs, top - 1)[:top] if top < probs.size else np.arange(probs.size)
+            idx = np.sort(idx)  # equal probabilities keep class order
+            idx = idx[np.argsort(-probs[idx], kind='stable')][1:]
+            
+            # Get top 3 alternatives (excluding primary)
+            classes = np.asarray(ml_recommendation['classes'])[idx]
+            for dept, conf in zip(classes, probs[idx].round(3)):
+                if dept != primary_dept:
+                    alternatives.append({'department': str(dept), 'confidence': float(conf)})
         
         # Add rule-based alternatives if needed
         if len(alternatives) < 2:
-            for dept, info in self.department_specialties.items():
+            if found is None:
+                found = self._scan_terms(symptoms)
+            keyword_scores = self._department_scores(found, keywords_only=True)
+            for dept_idx in np.flatnonzero(keyword_scores):
+                dept = self._dept_names[dept_idx]
                 if dept != primary_dept and len(alternatives) < 3:
-                    keyword_matches = sum(1 for keyword in info['keywords'] if keyword in symptoms)
-                    if keyword_matches > 0:
-                        confidence = min(0.7, 0.3 + (keyword_matches * 0.1))
-                        alternatives.append({'department': dept, 'confidence': round(confidence, 3)})
+                    confidence = min(0.7, 0.3 + float(keyword_scores[dept_idx]))
+                    alternatives.append({'department': dept, 'confidence': round(confidence, 3)})
         
         return alternatives[:3]  # Return max 3 alternatives
     
@@ -322,15 +635,52 @@ class IntelligentServiceRecommender:
             })
         
         return departments
+    
+    def get_symptom_keywords(self) -> Dict:
+        """Get common symptom keywords for each department"""
+        
+        keywords_by_department = {}
+        for dept, info in self.department_specialties.items():
+            keywords_by_department[dept] = {
+                'keywords': info['keywords'],
+                'common_symptoms': info['symptoms'],
+                'priority': info['priority']
+            }
+        
+        return {
+            "keywords_by_department": keywords_by_department,
+            "total_departments": len(keywords_by_department)
+        }
 
 # Initialize recommender
 recommender = IntelligentServiceRecommender()
 
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _load_model_into_worker():
+    """Make sure a worker process has the model loaded before its first request"""
+    recommender._ensure_model_loaded()
+
+def _recommend_in_worker(request: ServiceRecommendationRequest) -> ServiceRecommendationResponse:
+    return recommender.recommend_service(request)
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=RECOMMENDER_PROCESS_WORKERS, initializer=_load_model_into_worker
+        )
+    return _process_pool
+
+@router.on_event("shutdown")
+async def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
 @router.post("/recommend", response_model=ServiceRecommendationResponse)
-async def recommend_service(
-    request: ServiceRecommendationRequest,
-    db: Session = Depends(get_db)
-):
+async def recommend_service(request: ServiceRecommendationRequest):
     """
     Recommend appropriate department based on symptoms using AI and medical knowledge
     
@@ -341,7 +691,12 @@ async def recommend_service(
     - **current_department**: Current department (optional)
     """
     try:
-        recommendation = recommender.recommend_service(request)
+        if RECOMMENDER_PROCESS_WORKERS > 0:
+            loop = asyncio.get_running_loop()
+            recommendation = await loop.run_in_executor(_get_process_pool(), _recommend_in_worker, request)
+        else:
+            # Off the event loop: concurrent requests wait on the shared inference batch
+            recommendation = await run_in_threadpool(recommender.recommend_service, request)
         return recommendation
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Service recommendation failed: {str(e)}")
@@ -352,8 +707,7 @@ async def get_all_departments():
     Get information about all available departments
     """
     try:
-        departments = recommender.get_all_departments()
-        return departments
+        return Response(recommender._departments_json, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get departments: {str(e)}")
 
@@ -368,43 +722,55 @@ async def get_department_info(department: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get department info: {str(e)}")
 
+def _file_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+@lru_cache(maxsize=1)
+def _model_files_snapshot(mtimes: Tuple[Optional[int], ...]) -> Dict:
+    """File-derived part of the model status; recomputed only when a model file changes"""
+    model_mtime, vectorizer_mtime, encoder_mtime, results_mtime = mtimes
+    model_available = None not in (model_mtime, vectorizer_mtime, encoder_mtime)
+    
+    metrics = {}
+    if model_available and results_mtime is not None:
+        # Get model performance metrics
+        results = joblib.load(RESULTS_PATH)
+        performance = results.get('model_performance', {})
+        metrics = {
+            "accuracy": performance.get('accuracy', 'N/A'),
+            "training_date": results.get('training_date', 'N/A'),
+            "dataset_size": results.get('dataset_size', 'N/A')
+        }
+    return {"model_available": model_available, "metrics": metrics}
+
+def _model_status() -> Dict:
+    recommender._ensure_model_loaded()
+    mtimes = tuple(_file_mtime(path) for path in (MODEL_PATH, VECTORIZER_PATH, ENCODER_PATH, RESULTS_PATH))
+    snapshot = _model_files_snapshot(mtimes)
+    
+    status = {
+        "model_available": snapshot["model_available"],
+        "model_loaded": recommender.symptom_classifier is not None,
+        "vectorizer_loaded": recommender.tfidf_vectorizer is not None,
+        "encoder_loaded": recommender.department_encoder is not None,
+        "knowledge_base_size": len(recommender.department_specialties),
+        "departments_available": list(recommender.department_specialties.keys()),
+        "last_checked": _now_iso()
+    }
+    status.update(snapshot["metrics"])
+    return status
+
 @router.get("/model-status")
 async def get_model_status():
     """
     Get the status of the service recommendation model
     """
     try:
-        model_path = 'models/symptom_classifier.pkl'
-        vectorizer_path = 'models/symptom_tfidf_vectorizer.pkl'
-        encoder_path = 'models/department_encoder.pkl'
-        
-        model_exists = os.path.exists(model_path)
-        vectorizer_exists = os.path.exists(vectorizer_path)
-        encoder_exists = os.path.exists(encoder_path)
-        
-        status = {
-            "model_available": model_exists and vectorizer_exists and encoder_exists,
-            "model_loaded": recommender.symptom_classifier is not None,
-            "vectorizer_loaded": recommender.tfidf_vectorizer is not None,
-            "encoder_loaded": recommender.department_encoder is not None,
-            "knowledge_base_size": len(recommender.department_specialties),
-            "departments_available": list(recommender.department_specialties.keys()),
-            "last_checked": datetime.now().isoformat()
-        }
-        
-        if model_exists and vectorizer_exists and encoder_exists:
-            # Get model performance metrics
-            results_path = 'models/service_recommendation_results.pkl'
-            if os.path.exists(results_path):
-                results = joblib.load(results_path)
-                performance = results.get('model_performance', {})
-                status.update({
-                    "accuracy": performance.get('accuracy', 'N/A'),
-                    "training_date": results.get('training_date', 'N/A'),
-                    "dataset_size": results.get('dataset_size', 'N/A')
-                })
-        
-        return status
+        # stat() calls and the results pickle load stay off the event loop
+        return await run_in_threadpool(_model_status)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get model status: {str(e)}")
 
@@ -430,18 +796,7 @@ async def get_symptom_keywords():
     Get common symptom keywords for each department
     """
     try:
-        keywords_by_department = {}
-        for dept, info in recommender.department_specialties.items():
-            keywords_by_department[dept] = {
-                'keywords': info['keywords'],
-                'common_symptoms': info['symptoms'],
-                'priority': info['priority']
-            }
-        
-        return {
-            "keywords_by_department": keywords_by_department,
-            "total_departments": len(keywords_by_department)
-        }
+        return Response(recommender._keywords_json, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get symptom keywords: {str(e)}")
 
@@ -451,22 +806,19 @@ async def validate_symptoms(symptoms: str):
     Validate symptoms and get preliminary department suggestions
     """
     try:
-        symptoms_clean = symptoms.lower().strip()
+        symptoms_clean = _normalize(symptoms)
         
         # Find matching departments
         matching_departments = []
-        for dept, info in recommender.department_specialties.items():
-            keyword_matches = [kw for kw in info['keywords'] if kw in symptoms_clean]
-            symptom_matches = [symptom for symptom in info['symptoms'] if symptom in symptoms_clean]
-            
-            if keyword_matches or symptom_matches:
-                confidence = min(0.9, 0.3 + (len(keyword_matches) * 0.1) + (len(symptom_matches) * 0.2))
-                matching_departments.append({
-                    'department': dept,
-                    'confidence': round(confidence, 3),
-                    'matched_keywords': keyword_matches,
-                    'matched_symptoms': symptom_matches
-                })
+        found = recommender._scan_terms(symptoms_clean)
+        for dept, (keyword_matches, symptom_matches) in recommender._department_matches(found).items():
+            confidence = min(0.9, 0.3 + (len(keyword_matches) * 0.1) + (len(symptom_matches) * 0.2))
+            matching_departments.append({
+                'department': dept,
+                'confidence': round(confidence, 3),
+                'matched_keywords': keyword_matches,
+                'matched_symptoms': symptom_matches
+            })
         
         # Sort by confidence
         matching_departments.sort(key=lambda x: x['confidence'], reverse=True)
@@ -475,7 +827,7 @@ async def validate_symptoms(symptoms: str):
             "symptoms": symptoms_clean,
             "matching_departments": matching_departments[:5],  # Top 5
             "total_matches": len(matching_departments),
-            "validation_timestamp": datetime.now().isoformat()
+            "validation_timestamp": _now_iso()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to validate symptoms: {str(e)}")
@@ -1,12 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from pydantic import BaseModel
-from app.database import get_db
+from app.database import get_async_db, unit_of_work
 from app.models.models import Service, ServiceCounter
+from app.services.cache_service import SERVICES_CACHE_TAG, response_cache
+import hashlib
+import json
 
 router = APIRouter()
 
+# Services change rarely: serialized listings are cached briefly and dropped on any service write
+SERVICES_CACHE_TTL_SECONDS = 30
+
+async def _cached_json(key: str, load: Callable[[], Awaitable[Any]]) -> Dict[str, str]:
+    """Serialized JSON body and ETag for key, computing and caching them on a miss"""
+    entry = await response_cache.get(key)
+    if entry is None:
+        body = json.dumps(jsonable_encoder(await load()), ensure_ascii=False, separators=(",", ":"))
+        entry = {"body": body, "etag": '"' + hashlib.md5(body.encode()).hexdigest() + '"'}
+        await response_cache.set(key, entry, SERVICES_CACHE_TTL_SECONDS, tags=(SERVICES_CACHE_TAG,))
+    return entry
+
+def _json_response(request: Request, entry: Dict[str, str]) -> Response:
+    """Return the cached body, or an empty 304 when the client already has it"""
+    headers = {"ETag": entry["etag"], "Cache-Control": f"public, max-age={SERVICES_CACHE_TTL_SECONDS}"}
+    if request.headers.get("if-none-match") == entry["etag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(entry["body"], media_type="application/json", headers=headers)
+
 class ServiceCreate(BaseModel):
     name: str
     description: str
@@ -14,24 +39,53 @@ class ServiceCreate(BaseModel):
     estimated_wait_time: int = None  # Optional for backward compatibility
     estimated_time: int = None  # Actual field name
 
+class ServiceCounterOut(BaseModel):
+    id: int
+    name: Optional[str]
+    service_id: Optional[int]
+    is_active: Optional[int]
+    current_queue_entry_id: Optional[int]
+    staff_member: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+class ServiceDetailOut(BaseModel):
+    id: int
+    name: Optional[str]
+    description: Optional[str]
+    staff_count: Optional[int]
+    service_rate: Optional[float]
+    department: Optional[str]
+    estimated_time: Optional[int]
+    current_wait_time: Optional[int]
+    queue_length: Optional[int]
+    counters: List[ServiceCounterOut] = []
+
+    class Config:
+        from_attributes = True
+
 @router.post("/")
 async def create_service(
     service_data: ServiceCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new service."""
     # Use estimated_wait_time if provided, otherwise estimated_time
     estimated = service_data.estimated_time or service_data.estimated_wait_time or 30
     
-    service = Service(
-        name=service_data.name,
-        description=service_data.description,
-        department=service_data.department,
-        estimated_time=estimated
-    )
-    db.add(service)
-    db.commit()
-    db.refresh(service)
+    async with unit_of_work(db):
+        service = (await db.execute(
+            insert(Service)
+            .values(
+                name=service_data.name,
+                description=service_data.description,
+                department=service_data.department,
+                estimated_time=estimated
+            )
+            .returning(Service)
+        )).scalar_one()
+    await response_cache.invalidate_tag(SERVICES_CACHE_TAG)
     
     # Return formatted response with both field names for compatibility
     return {
@@ -47,21 +101,38 @@ async def create_service(
     }
 
 @router.get("/")
-@router.get("")  # Handle both /api/services and /api/services/
-async def get_services(db: Session = Depends(get_db)):
-    services = db.query(Service).all()
-    return services
-
-@router.get("/{service_id}")
-async def get_service(service_id: int, db: Session = Depends(get_db)):
-    service = db.query(Service).filter(Service.id == service_id).first()
-    if not service:
-        raise HTTPException(status_code=404, detail="Service not found")
-    return service
+@router.get("", include_in_schema=False)  # /api/services without the trailing slash
+async def get_services(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def load_services():
+        return (await db.execute(
+            select(Service).order_by(Service.id).offset(offset).limit(limit)
+        )).scalars().all()
+
+    return _json_response(request, await _cached_json(f"services:list:{limit}:{offset}", load_services))
+
+@router.get("/{service_id}", response_model=ServiceDetailOut)
+async def get_service(service_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load_service():
+        # Counters come along in one extra IN query, saving clients the /counters round-trip
+        service = (await db.execute(
+            select(Service).options(selectinload(Service.counters)).where(Service.id == service_id)
+        )).scalar_one_or_none()
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+        return ServiceDetailOut.model_validate(service)
+
+    return _json_response(request, await _cached_json(f"services:{service_id}", load_service))
 
 @router.get("/{service_id}/counters")
-async def get_service_counters(service_id: int, db: Session = Depends(get_db)):
-    counters = db.query(ServiceCounter).filter(
-        ServiceCounter.service_id == service_id
-    ).all()
-    return counters
+async def get_service_counters(service_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load_counters():
+        return (await db.execute(
+            select(ServiceCounter).where(ServiceCounter.service_id == service_id)
+        )).scalars().all()
+
+    return _json_response(request, await _cached_json(f"services:{service_id}:counters", load_counters))
@@ -1,20 +1,85 @@
 """
 Staff management routes for Healthcare Queue Management System
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from pydantic import BaseModel, Field
-
-from app.database import get_db
+from enum import Enum
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
+import hashlib
+import json
+import orjson
+
+from app.database import get_async_db, unit_of_work
+from app.routes.auth import get_current_active_user_async
 from app.services.staff_service import staff_service
-from app.services.auth_service import get_current_user, get_current_active_user
 from app.models.models import User
 from app.models.staff_models import StaffProfile, StaffSchedule, StaffPerformance, StaffCommunication, StaffTask
 
 
-router = APIRouter()  # Remove prefix - it's added in main.py
+router = APIRouter(default_response_class=ORJSONResponse)  # Remove prefix - it's added in main.py
+
+# Admin listings stream newline-delimited JSON when the client asks for it
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+ADMIN_LIST_MAX_LIMIT = 5000
+
+
+def _wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def _ndjson_lines(rows, to_dict: Callable[[Any], Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode streamed rows one JSON document per line"""
+    async for row in rows:
+        yield orjson.dumps(to_dict(row)) + b"\n"
+
+
+def require_permission(resource: str, action: str):
+    """
+    Dependency factory allowing the current user only if their role grants
+    the action on the resource
+
+    Results are memoized on request.state for the rest of the request; the
+    role lookup itself is cached by the staff service.
+    """
+    async def _require_permission(
+        request: Request,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user_async)
+    ) -> User:
+        checks = getattr(request.state, "permission_checks", None)
+        if checks is None:
+            checks = request.state.permission_checks = {}
+        key = (resource, action)
+        if key not in checks:
+            checks[key] = await staff_service.role_allows(db, current_user.role, resource, action)
+        if not checks[key]:
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+        return current_user
+    return _require_permission
+
+
+# Admin dashboards poll /stats and the profile list; clients revalidate with If-None-Match
+ADMIN_HTTP_CACHE_CONTROL = "private, max-age=30"
+
+
+def _etag_response(request: Request, body, etag: str) -> Response:
+    """Return the JSON body, or an empty 304 when the client already has this version"""
+    headers = {"ETag": etag, "Cache-Control": ADMIN_HTTP_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _audit_log_dict(log) -> Dict[str, Any]:
+    return {"id": log.id, "user_id": log.user_id, "action": log.action,
+            "resource_type": log.resource_type, "resource_id": log.resource_id,
+            "timestamp": log.timestamp, "success": log.success,
+            "error_message": log.error_message}
 
 
 # Pydantic models for request/response
@@ -35,9 +100,28 @@ class StaffProfileCreate(BaseModel):
     emergency_certified: bool = False
 
 
+class StaffProfileUpdate(BaseModel):
+    department: Optional[str] = None
+    specialization: Optional[str] = None
+    license_number: Optional[str] = None
+    years_experience: Optional[int] = None
+    certifications: Optional[List[str]] = None
+    is_supervisor: Optional[bool] = None
+    supervisor_id: Optional[int] = None
+    hire_date: Optional[datetime] = None
+    contract_type: Optional[str] = None
+    hourly_rate: Optional[float] = None
+    max_patients_per_hour: Optional[int] = None
+    languages_spoken: Optional[List[str]] = None
+    emergency_certified: Optional[bool] = None
+
+    class Config:
+        extra = "forbid"
+
+
 class StaffProfileResponse(BaseModel):
     id: int
-    user_id: int
+    user_id: Optional[int]
     employee_id: str
     department: str
     specialization: Optional[str]
@@ -48,7 +132,7 @@ class StaffProfileResponse(BaseModel):
     is_supervisor: bool
     supervisor_id: Optional[int]
     hire_date: datetime
-    contract_type: str
+    contract_type: Optional[str]
     hourly_rate: Optional[float]
     max_patients_per_hour: int
     languages_spoken: List[str]
@@ -56,6 +140,17 @@ class StaffProfileResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+    class Config:
+        from_attributes = True
+
+    @field_validator("certifications", "languages_spoken", mode="before")
+    @classmethod
+    def _parse_json_list(cls, value):
+        # Stored as JSON text on the profile row
+        if isinstance(value, str):
+            return json.loads(value)
+        return value or []
+
 
 class StaffScheduleCreate(BaseModel):
     staff_id: int
@@ -82,6 +177,9 @@ class StaffScheduleResponse(BaseModel):
     notes: Optional[str]
     created_at: datetime
 
+    class Config:
+        from_attributes = True
+
 
 class StaffPerformanceResponse(BaseModel):
     id: int
@@ -99,6 +197,9 @@ class StaffPerformanceResponse(BaseModel):
     emergency_responses: int
     feedback_count: int
 
+    class Config:
+        from_attributes = True
+
 
 class MessageCreate(BaseModel):
     recipient_id: Optional[int] = None
@@ -125,7 +226,24 @@ class MessageResponse(BaseModel):
     role_filter: Optional[str]
     expires_at: Optional[datetime]
     created_at: datetime
-    sender_name: Optional[str]
+    sender_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TaskStatus(str, Enum):
+    """Task states; parsed at the edge so invalid values are rejected with 422"""
+    pending = "pending"
+    in_progress = "in_progress"
+    completed = "completed"
+    cancelled = "cancelled"
+    overdue = "overdue"
+
+
+class TaskStatusBulkUpdate(BaseModel):
+    task_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    status: TaskStatus
 
 
 class TaskCreate(BaseModel):
@@ -161,8 +279,11 @@ class TaskResponse(BaseModel):
     notes: Optional[str]
     created_at: datetime
     updated_at: datetime
-    assignee_name: Optional[str]
-    assigner_name: Optional[str]
+    assignee_name: Optional[str] = None
+    assigner_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
 
 
 class StaffStatsResponse(BaseModel):
@@ -174,29 +295,42 @@ class StaffStatsResponse(BaseModel):
     emergency_certified: int
 
 
+# List responses are validated from ORM rows and serialized to JSON in one
+# pydantic-core pass each, instead of per-item models re-validated by FastAPI
+_profile_list_adapter = TypeAdapter(List[StaffProfileResponse])
+_schedule_list_adapter = TypeAdapter(List[StaffScheduleResponse])
+_performance_list_adapter = TypeAdapter(List[StaffPerformanceResponse])
+_message_list_adapter = TypeAdapter(List[MessageResponse])
+_task_list_adapter = TypeAdapter(List[TaskResponse])
+
+
+def _json_list(adapter: TypeAdapter, rows) -> Response:
+    items = adapter.validate_python(rows, from_attributes=True)
+    return Response(adapter.dump_json(items), media_type="application/json")
+
+
 # Routes
 
 @router.post("/profile", response_model=StaffProfileResponse)
 async def create_staff_profile(
     profile: StaffProfileCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff_profiles", "create"))
 ):
     """Create a staff profile for the current user."""
-    if not staff_service.check_permission(db, current_user.id, "staff_profiles", "create"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
     try:
-        staff_profile = staff_service.create_staff_profile(db, current_user.id, profile.dict())
-        return StaffProfileResponse(**staff_profile.__dict__)
+        async with unit_of_work(db):
+            staff_profile = await staff_service.create_staff_profile(db, current_user.id, profile.dict())
+        await staff_service.invalidate_staff_stats()
+        return StaffProfileResponse.model_validate(staff_profile)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create staff profile: {str(e)}")
 
 
 @router.get("/roles")
 async def get_available_roles(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Get available staff roles and their permissions."""
     if current_user.role != "admin":
@@ -261,36 +395,36 @@ async def assign_user_role(
     user_id: int,
     role: str,
     department: str = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Assign a role to a user (Admin only)."""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
 
-    # Update user role
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    user.role = role
-    db.commit()
-
-    # Create or update staff profile with department
-    if department and role != "admin":
-        profile = db.query(StaffProfile).filter(StaffProfile.user_id == user_id).first()
-        if profile:
-            profile.department = department
-        else:
-            # Create basic staff profile
-            new_profile = StaffProfile(
-                user_id=user_id,
-                department=department,
-                employee_id=f"EMP{user_id:04d}",
-                hire_date=datetime.utcnow()
-            )
-            db.add(new_profile)
-        db.commit()
+    # Role and staff profile change together in one transaction
+    async with unit_of_work(db):
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        user.role = role
+
+        # Create or update staff profile with department
+        if department and role != "admin":
+            profile = await staff_service.get_staff_profile(db, user_id)
+            if profile:
+                profile.department = department
+            else:
+                # Create basic staff profile
+                new_profile = StaffProfile(
+                    user_id=user_id,
+                    department=department,
+                    employee_id=f"EMP{user_id:04d}",
+                    hire_date=datetime.utcnow()
+                )
+                db.add(new_profile)
+    await staff_service.invalidate_staff_stats()
 
     return {"message": f"Role '{role}' assigned to user successfully", "department": department}
 
@@ -298,19 +432,19 @@ async def assign_user_role(
 @router.get("/permissions/{user_id}")
 async def get_user_permissions(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Get permissions for a specific user."""
     if current_user.role != "admin" and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Get staff profile for department info
-    profile = db.query(StaffProfile).filter(StaffProfile.user_id == user_id).first()
+    profile = await staff_service.get_staff_profile(db, user_id)
 
     # Define role-based permissions
     role_permissions = {
@@ -338,72 +472,68 @@ async def get_user_permissions(
 
 @router.get("/profile", response_model=StaffProfileResponse)
 async def get_my_staff_profile(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Get current user's staff profile."""
-    profile = staff_service.get_staff_profile(db, current_user.id)
+    profile = await staff_service.get_staff_profile(db, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Staff profile not found")
 
-    return StaffProfileResponse(**profile.__dict__)
+    return StaffProfileResponse.model_validate(profile)
 
 
 @router.put("/profile", response_model=StaffProfileResponse)
 async def update_staff_profile(
-    updates: Dict[str, Any],
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    updates: StaffProfileUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff_profiles", "update"))
 ):
-    """Update current user's staff profile."""
-    if not staff_service.check_permission(db, current_user.id, "staff_profiles", "update"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
-    profile = staff_service.update_staff_profile(db, current_user.id, updates)
+    """Update current user's staff profile; only the fields sent are changed."""
+    async with unit_of_work(db):
+        profile = await staff_service.update_staff_profile(
+            db, current_user.id, updates.model_dump(exclude_unset=True)
+        )
     if not profile:
         raise HTTPException(status_code=404, detail="Staff profile not found")
+    await staff_service.invalidate_staff_stats()
 
-    return StaffProfileResponse(**profile.__dict__)
+    return StaffProfileResponse.model_validate(profile)
 
 
 @router.get("/department/{department}")
 async def get_staff_by_department(
     department: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff", "read"))
 ):
     """Get all staff in a department."""
-    if not staff_service.check_permission(db, current_user.id, "staff", "read"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
-    return staff_service.get_staff_by_department(db, department)
+    return await staff_service.get_staff_by_department(db, department)
 
 
 @router.get("/permissions/check")
 async def check_permission(
     resource: str,
     action: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Check if current user has permission for an action."""
-    allowed = staff_service.check_permission(db, current_user.id, resource, action)
+    allowed = await staff_service.role_allows(db, current_user.role, resource, action)
     return {"allowed": allowed, "resource": resource, "action": action}
 
 
 @router.post("/schedule", response_model=StaffScheduleResponse)
 async def create_staff_schedule(
     schedule: StaffScheduleCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff_schedules", "create"))
 ):
     """Create a staff schedule."""
-    if not staff_service.check_permission(db, current_user.id, "staff_schedules", "create"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
     try:
-        staff_schedule = staff_service.create_staff_schedule(db, schedule.dict(), current_user.id)
-        return StaffScheduleResponse(**staff_schedule.__dict__)
+        async with unit_of_work(db):
+            staff_schedule = await staff_service.create_staff_schedule(db, schedule.dict(), current_user.id)
+        return StaffScheduleResponse.model_validate(staff_schedule)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create schedule: {str(e)}")
 
@@ -413,15 +543,12 @@ async def get_staff_schedule(
     staff_id: int,
     start_date: datetime,
     end_date: datetime,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff_schedules", "read"))
 ):
     """Get staff schedule for a date range."""
-    if not staff_service.check_permission(db, current_user.id, "staff_schedules", "read"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
-    schedules = staff_service.get_staff_schedule(db, staff_id, start_date, end_date)
-    return [StaffScheduleResponse(**schedule.__dict__) for schedule in schedules]
+    schedules = await staff_service.get_staff_schedule(db, staff_id, start_date, end_date)
+    return _json_list(_schedule_list_adapter, schedules)
 
 
 @router.get("/performance/{staff_id}", response_model=List[StaffPerformanceResponse])
@@ -429,36 +556,29 @@ async def get_staff_performance(
     staff_id: int,
     start_date: datetime,
     end_date: datetime,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff_performance", "read"))
 ):
     """Get staff performance metrics."""
-    if not staff_service.check_permission(db, current_user.id, "staff_performance", "read"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
-    performance = staff_service.get_staff_performance(db, staff_id, start_date, end_date)
-    return [StaffPerformanceResponse(**perf.__dict__) for perf in performance]
+    performance = await staff_service.get_staff_performance(db, staff_id, start_date, end_date)
+    return _json_list(_performance_list_adapter, performance)
 
 
 @router.post("/messages", response_model=MessageResponse)
 async def send_staff_message(
     message: MessageCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff_communication", "create"))
 ):
     """Send a message to staff member(s)."""
-    if not staff_service.check_permission(db, current_user.id, "staff_communication", "create"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
     try:
         msg_data = message.dict()
         msg_data["sender_id"] = current_user.id
-        staff_message = staff_service.send_staff_message(db, msg_data)
+        async with unit_of_work(db):
+            staff_message = await staff_service.send_staff_message(db, msg_data)
 
         # Add sender name
-        response = MessageResponse(**staff_message.__dict__)
-        response.sender_name = current_user.name
-        return response
+        return MessageResponse.model_validate(staff_message).model_copy(update={"sender_name": current_user.name})
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to send message: {str(e)}")
 
@@ -466,30 +586,27 @@ async def send_staff_message(
 @router.get("/messages", response_model=List[MessageResponse])
 async def get_staff_messages(
     unread_only: bool = False,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Get messages for current user."""
-    messages = staff_service.get_staff_messages(db, current_user.id, unread_only)
+    rows = await staff_service.get_staff_messages(db, current_user.id, unread_only)
 
-    result = []
-    for msg in messages:
-        response = MessageResponse(**msg.__dict__)
-        sender = db.query(User).filter(User.id == msg.sender_id).first()
-        response.sender_name = sender.name if sender else "Unknown"
-        result.append(response)
-
-    return result
+    responses = _message_list_adapter.validate_python([msg for msg, _ in rows], from_attributes=True)
+    for response, (_, sender_name) in zip(responses, rows):
+        response.sender_name = sender_name or "Unknown"
+    return Response(_message_list_adapter.dump_json(responses), media_type="application/json")
 
 
 @router.put("/messages/{message_id}/read")
 async def mark_message_read(
     message_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Mark a message as read."""
-    success = staff_service.mark_message_read(db, message_id, current_user.id)
+    async with unit_of_work(db):
+        success = await staff_service.mark_message_read(db, message_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Message not found or access denied")
 
@@ -499,25 +616,27 @@ async def mark_message_read(
 @router.post("/tasks", response_model=TaskResponse)
 async def create_staff_task(
     task: TaskCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff_tasks", "create"))
 ):
     """Create a task for staff member."""
-    if not staff_service.check_permission(db, current_user.id, "staff_tasks", "create"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
     try:
         task_data = task.dict()
         task_data["assigned_by"] = current_user.id
-        staff_task = staff_service.create_staff_task(db, task_data)
-
-        # Add names
-        response = TaskResponse(**staff_task.__dict__)
-        assignee = db.query(User).filter(User.id == staff_task.assigned_to).first()
-        assigner = db.query(User).filter(User.id == staff_task.assigned_by).first()
-        response.assignee_name = assignee.name if assignee else "Unknown"
-        response.assigner_name = assigner.name if assigner else "Unknown"
-        return response
+        async with unit_of_work(db):
+            staff_task = await staff_service.create_staff_task(db, task_data)
+
+            # The assigner is the current user; only another assignee's name needs a lookup
+            if task.assigned_to == current_user.id:
+                assignee_name = current_user.name
+            else:
+                assignee_name = (await db.execute(
+                    select(User.name).where(User.id == task.assigned_to)
+                )).scalar_one_or_none()
+        return TaskResponse.model_validate(staff_task).model_copy(update={
+            "assignee_name": assignee_name or "Unknown",
+            "assigner_name": current_user.name
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create task: {str(e)}")
 
@@ -525,106 +644,153 @@ async def create_staff_task(
 @router.get("/tasks", response_model=List[TaskResponse])
 async def get_my_tasks(
     status_filter: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Get tasks assigned to current user."""
-    tasks = staff_service.get_staff_tasks(db, current_user.id, status_filter)
+    tasks = await staff_service.get_staff_tasks(db, current_user.id, status_filter)
 
-    result = []
-    for task in tasks:
-        response = TaskResponse(**task.__dict__)
-        assignee = db.query(User).filter(User.id == task.assigned_to).first()
-        assigner = db.query(User).filter(User.id == task.assigned_by).first()
-        response.assignee_name = assignee.name if assignee else "Unknown"
-        response.assigner_name = assigner.name if assigner else "Unknown"
-        result.append(response)
-
-    return result
+    # Every listed task is assigned to the current user, so only assigners need loading
+    responses = _task_list_adapter.validate_python(tasks, from_attributes=True)
+    for response, task in zip(responses, tasks):
+        response.assignee_name = current_user.name
+        response.assigner_name = task.assigner.name if task.assigner else "Unknown"
+    return Response(_task_list_adapter.dump_json(responses), media_type="application/json")
 
 
 @router.put("/tasks/{task_id}/status")
 async def update_task_status(
     task_id: int,
-    status: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    status: TaskStatus,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     """Update task status."""
-    valid_statuses = ["pending", "in_progress", "completed", "cancelled", "overdue"]
-    if status not in valid_statuses:
-        raise HTTPException(status_code=400, detail="Invalid status")
-
-    task = staff_service.update_task_status(db, task_id, status, current_user.id)
+    async with unit_of_work(db):
+        task = await staff_service.update_task_status(db, task_id, status.value, current_user.id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found or access denied")
 
-    return {"message": f"Task status updated to {status}"}
+    return {"message": f"Task status updated to {status.value}"}
+
+
+@router.put("/tasks/status/bulk")
+async def bulk_update_task_status(
+    update: TaskStatusBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    """Update the status of several of the current user's tasks in one statement."""
+    async with unit_of_work(db):
+        updated = await staff_service.bulk_update_task_status(db, update.task_ids, update.status.value, current_user.id)
+    return {"message": f"Task status updated to {update.status.value}", "updated": updated}
 
 
 @router.get("/stats", response_model=StaffStatsResponse)
 async def get_staff_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permission("staff", "read"))
 ):
     """Get staff statistics."""
-    if not staff_service.check_permission(db, current_user.id, "staff", "read"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
-    # Get basic stats
-    total_staff = db.query(StaffProfile).count()
-    active_staff = db.query(StaffProfile).join(User).filter(User.is_active == True).count()
-    supervisors = db.query(StaffProfile).filter(StaffProfile.is_supervisor == True).count()
-    emergency_certified = db.query(StaffProfile).filter(StaffProfile.emergency_certified == True).count()
+    entry = await staff_service.get_cached_staff_stats()
+    if entry is not None:
+        return _etag_response(request, entry["body"], entry["etag"])
+
+    # Counts and average performance in one round-trip via conditional aggregation
+    total_staff, active_staff, supervisors, emergency_certified, avg_perf = (await db.execute(select(
+        func.count(StaffProfile.id),
+        func.sum(case((User.is_active == True, 1), else_=0)),
+        func.sum(case((StaffProfile.is_supervisor == True, 1), else_=0)),
+        func.sum(case((StaffProfile.emergency_certified == True, 1), else_=0)),
+        select(func.avg(StaffPerformance.total_score)).scalar_subquery()
+    ).outerjoin(User, User.id == StaffProfile.user_id))).one()
 
     # Department breakdown
-    from sqlalchemy import func
-    dept_stats = db.query(
+    dept_stats = (await db.execute(select(
         StaffProfile.department,
         func.count(StaffProfile.id).label('count')
-    ).group_by(StaffProfile.department).all()
+    ).group_by(StaffProfile.department))).all()
 
     departments = {stat.department: stat.count for stat in dept_stats}
 
-    # Average performance
-    avg_perf = db.query(func.avg(StaffPerformance.total_score)).scalar() or 0.0
-
-    return StaffStatsResponse(
+    stats = StaffStatsResponse(
         total_staff=total_staff,
-        active_staff=active_staff,
-        supervisors=supervisors,
+        active_staff=active_staff or 0,
+        supervisors=supervisors or 0,
         departments=departments,
-        avg_performance=float(avg_perf),
-        emergency_certified=emergency_certified
+        avg_performance=float(avg_perf or 0.0),
+        emergency_certified=emergency_certified or 0
     )
+    body = stats.model_dump_json()
+    entry = {"body": body, "etag": '"' + hashlib.md5(body.encode()).hexdigest() + '"'}
+    await staff_service.cache_staff_stats(entry)
+    return _etag_response(request, entry["body"], entry["etag"])
 
 
 # Admin-only routes
 @router.get("/admin/all-profiles", response_model=List[StaffProfileResponse])
 async def get_all_staff_profiles(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    after_id: int = 0,
+    limit: int = Query(100, ge=1, le=ADMIN_LIST_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
-    """Get all staff profiles (Admin only)."""
+    """
+    Get staff profiles in id order, a page at a time (Admin only).
+
+    Pass the last id of a page as after_id to get the next one. With
+    Accept: application/x-ndjson the page is streamed as it is read.
+    """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
 
-    profiles = db.query(StaffProfile).all()
-    return [StaffProfileResponse(**profile.__dict__) for profile in profiles]
+    query = select(StaffProfile).where(StaffProfile.id > after_id).order_by(StaffProfile.id).limit(limit)
+
+    if _wants_ndjson(request):
+        rows = await db.stream_scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        return StreamingResponse(
+            _ndjson_lines(rows, lambda profile: StaffProfileResponse.model_validate(profile).model_dump()),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+
+    # Any profile insert, update or delete moves the latest updated_at or the count
+    latest_update, profile_count = (await db.execute(
+        select(func.max(StaffProfile.updated_at), func.count(StaffProfile.id))
+    )).one()
+    etag = 'W/"' + hashlib.blake2s(
+        f"{latest_update}:{profile_count}:{after_id}:{limit}".encode()
+    ).hexdigest() + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": ADMIN_HTTP_CACHE_CONTROL})
+
+    profiles = (await db.execute(query)).scalars().all()
+    response = _json_list(_profile_list_adapter, profiles)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ADMIN_HTTP_CACHE_CONTROL
+    return response
 
 
 @router.get("/admin/audit-logs")
 async def get_audit_logs(
+    request: Request,
     user_id: Optional[int] = None,
     action: Optional[str] = None,
     resource_type: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=ADMIN_LIST_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
-    """Get audit logs (Admin only)."""
+    """
+    Get audit logs newest first (Admin only).
+
+    Pass the smallest id of a page as before_id to get the next one. With
+    Accept: application/x-ndjson the page is streamed as it is read.
+    """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
 
@@ -639,9 +805,13 @@ async def get_audit_logs(
         filters["start_date"] = start_date
     if end_date:
         filters["end_date"] = end_date
+    if before_id:
+        filters["before_id"] = before_id
+
+    if _wants_ndjson(request):
+        query = staff_service.audit_logs_query(filters, limit)
+        rows = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        return StreamingResponse(_ndjson_lines(rows, _audit_log_dict), media_type=NDJSON_MEDIA_TYPE)
 
-    logs = staff_service.get_audit_logs(db, filters, limit)
-    return [{"id": log.id, "user_id": log.user_id, "action": log.action,
-             "resource_type": log.resource_type, "resource_id": log.resource_id,
-             "timestamp": log.timestamp, "success": log.success,
-             "error_message": log.error_message} for log in logs]
\ No newline at end of file
+    logs = await staff_service.get_audit_logs(db, filters, limit)
+    return [_audit_log_dict(log) for log in logs]
\ No newline at end of file
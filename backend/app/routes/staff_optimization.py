@@ -3,20 +3,172 @@ Staff Optimization API Routes
 AI recommendations for optimal staffing levels using ML and operational research
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
 import joblib
 import os
-import pandas as pd
+import threading
+import time
 import numpy as np
+import orjson
 from app.database import get_db
-from app.models.models import Service, QueueEntry
-from sqlalchemy import func
 
-router = APIRouter()
+try:
+    import onnxruntime
+except ImportError:
+    # onnxruntime is optional; predictions fall back to the pickled scikit-learn models
+    onnxruntime = None
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; constraint and score kernels fall back to NumPy expressions
+    njit = None
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Trained artifacts written by advanced_staff_optimizer.py
+MODEL_FILES = {
+    'wait_time_predictor': 'models/staff_optimizer_wait_time_predictor.pkl',
+    'efficiency_predictor': 'models/staff_optimizer_efficiency_predictor.pkl',
+    'scaler': 'models/staff_optimizer_scaler.pkl',
+    'metadata': 'models/staff_optimization_metadata.pkl'
+}
+PREDICTOR_NAMES = ('wait_time_predictor', 'efficiency_predictor')
+
+# /model-status re-checks the model files at most this often
+FILE_STATUS_TTL_SECONDS = 1.0
+
+# Scaler + both regressors as one ONNX graph, exported by advanced_staff_optimizer.py when
+# skl2onnx is installed; its single output has a (wait time, efficiency) column per row
+ONNX_MODEL_FILE = 'models/staff_optimizer_predictors.onnx'
+
+_UTC = timezone.utc
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO 8601 string at second precision"""
+    return datetime.now(_UTC).isoformat(timespec='seconds')
+
+OPTIMIZATION_CACHE_SIZE = 1024
+
+# Metrics /validate-metrics requires, in reporting order
+REQUIRED_METRIC_FIELDS = ('providers_on_shift', 'nurses_on_shift', 'patient_count', 'facility_occupancy')
+_REQUIRED_METRIC_FIELD_SET = frozenset(REQUIRED_METRIC_FIELDS)
+
+# Staffing cost parameters (per hour); also served by /cost-analysis without building the optimizer
+COST_PARAMETERS = {
+    'provider_hourly_cost': 75.0,  # $75/hour for providers
+    'nurse_hourly_cost': 45.0,     # $45/hour for nurses
+    'overtime_multiplier': 1.5,    # 1.5x for overtime
+    'understaffing_cost': 200.0,   # Cost of patient dissatisfaction
+    'overstaffing_cost': 50.0      # Cost of idle staff
+}
+
+# Cost projections assume 8-hour shifts and 22 working days a month
+HOURS_PER_SHIFT = 8
+HOURS_PER_MONTH = HOURS_PER_SHIFT * 22
+
+# Width of the feature vector the staff optimization models were trained on
+FEATURE_COUNT = 15
+# Rows preallocated per thread for the feature matrix; the full search grid is at most 5 x 8
+FEATURE_BUFFER_ROWS = 64
+
+def _fold_scaler_into_models(scaler, models) -> bool:
+    """
+    Fold a fitted StandardScaler into linear regressors, in place
+    
+    Weights become coef / scale with the intercept shifted by -(mean / scale) @ coef, so the
+    models give the same predictions on raw features and the serving path skips
+    scaler.transform. Tree ensembles are not folded: they compare float32-cast features
+    against their split thresholds, and a rescaled threshold can land on the other side of
+    an integer-valued feature. Returns False, leaving every model untouched, unless all of
+    them are linear.
+    """
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    if mean is None or scale is None:
+        return False
+    
+    models = list(models)
+    if not all(np.ndim(getattr(model, 'coef_', None)) == 1 for model in models):
+        return False
+    
+    for model in models:
+        model.intercept_ = model.intercept_ - (mean / scale) @ model.coef_
+        model.coef_ = model.coef_ / scale
+    return True
+
+def _leaf_range(tree) -> Tuple[float, float]:
+    """Smallest and largest leaf value of a fitted single-output regression tree"""
+    leaves = tree.tree_.value[tree.tree_.children_left == -1, 0, 0]
+    return float(leaves.min()), float(leaves.max())
+
+def _output_range(model) -> Optional[Tuple[float, float]]:
+    """
+    Bounds on any prediction of a fitted tree ensemble, or None when unbounded or unknown
+    
+    Forests average their trees, so predictions lie between the mean per-tree minimum and
+    maximum leaf; gradient boosting adds learning_rate times each tree's leaf to a constant init.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if hasattr(model, 'tree_'):
+        return _leaf_range(model)
+    if estimators is None or not all(hasattr(tree, 'tree_') for tree in np.ravel(estimators)):
+        return None
+    ranges = np.array([_leaf_range(tree) for tree in np.ravel(estimators)])
+    if hasattr(model, 'learning_rate'):
+        init_constant = getattr(getattr(model, 'init_', None), 'constant_', None)
+        if init_constant is None:
+            return None
+        init = float(np.ravel(init_constant)[0])
+        return (init + model.learning_rate * float(ranges[:, 0].sum()),
+                init + model.learning_rate * float(ranges[:, 1].sum()))
+    return float(ranges[:, 0].mean()), float(ranges[:, 1].mean())
+
+def _feasible_mask(providers, nurses, patient_count, pn_ratio_min, pn_ratio_max, sp_ratio_min, sp_ratio_max):
+    """Boolean mask of configurations within the provider:nurse and staff:patient ratio bounds"""
+    provider_nurse_ratio = providers / (nurses + 0.1)
+    staff_patient_ratio = (providers + nurses) / (patient_count + 0.1)
+    return (
+        (provider_nurse_ratio >= pn_ratio_min) & (provider_nurse_ratio <= pn_ratio_max)
+        & (staff_patient_ratio >= sp_ratio_min) & (staff_patient_ratio <= sp_ratio_max)
+    )
+
+def _staffing_scores(providers, nurses, wait_time, efficiency, utilization, provider_cost, nurse_cost):
+    """Weighted wait, efficiency, cost and utilization score per configuration (lower is better)"""
+    wait_time_score = wait_time * 0.4
+    efficiency_score = (1.0 - efficiency) * 100 * 0.3
+    hourly_cost = (providers * provider_cost + nurses * nurse_cost) * 0.2
+    utilization_score = np.abs(utilization - 0.8) * 50 * 0.1
+    return wait_time_score + efficiency_score + hourly_cost + utilization_score
+
+if njit is not None:
+    # nogil lets concurrent /optimize requests on the thread pool run these loops in parallel
+    @njit(cache=True, nogil=True)
+    def _feasible_mask(providers, nurses, patient_count, pn_ratio_min, pn_ratio_max, sp_ratio_min, sp_ratio_max):
+        mask = np.empty(providers.size, np.bool_)
+        for i in range(providers.size):
+            provider_nurse_ratio = providers[i] / (nurses[i] + 0.1)
+            staff_patient_ratio = (providers[i] + nurses[i]) / (patient_count + 0.1)
+            mask[i] = (pn_ratio_min <= provider_nurse_ratio <= pn_ratio_max
+                       and sp_ratio_min <= staff_patient_ratio <= sp_ratio_max)
+        return mask
+
+    @njit(cache=True, nogil=True)
+    def _staffing_scores(providers, nurses, wait_time, efficiency, utilization, provider_cost, nurse_cost):
+        scores = np.empty(providers.size, np.float64)
+        for i in range(providers.size):
+            scores[i] = (wait_time[i] * 0.4
+                         + (1.0 - efficiency[i]) * 100 * 0.3
+                         + (providers[i] * provider_cost + nurses[i] * nurse_cost) * 0.2
+                         + abs(utilization[i] - 0.8) * 50 * 0.1)
+        return scores
 
 class StaffOptimizationRequest(BaseModel):
     """Request model for staff optimization"""
@@ -62,24 +214,34 @@ class AdvancedStaffOptimizer:
     def __init__(self):
         self.models = {}
         self.scalers = {}
+        self.onnx_session = None
+        # True once the scaler has been folded into the models, which then take raw features
+        self._scaler_folded = False
+        # (wait min, wait max, efficiency min, efficiency max) over all inputs, for pruning the grid
+        self._prediction_bounds = None
         self.feature_importance = {}
         self.department_baselines = {}
         self.optimization_constraints = {}
         self.cost_parameters = {}
+        # Per-thread scratch feature matrices (see _feature_buffer)
+        self._thread_buffers = threading.local()
+        self._file_status = {}
+        self._file_status_checked_at = float('-inf')
+        # Dashboards poll with identical metrics; results are memoized per (department, metrics, horizon)
+        self._optimize_cached = lru_cache(maxsize=OPTIMIZATION_CACHE_SIZE)(self._optimize)
         self._load_models()
         self._initialize_parameters()
         
+        # Compile the kernels now rather than on the first request (API metrics arrive as floats)
+        warmup = np.ones(1)
+        _feasible_mask(warmup, warmup, 1.0, 0.0, 1.0, 0.0, 1.0)
+        _staffing_scores(warmup, warmup, warmup, warmup, warmup, 1.0, 1.0)
+        
     def _initialize_parameters(self):
         """Initialize optimization parameters and constraints"""
         
         # Cost parameters (per hour)
-        self.cost_parameters = {
-            'provider_hourly_cost': 75.0,  # $75/hour for providers
-            'nurse_hourly_cost': 45.0,     # $45/hour for nurses
-            'overtime_multiplier': 1.5,    # 1.5x for overtime
-            'understaffing_cost': 200.0,   # Cost of patient dissatisfaction
-            'overstaffing_cost': 50.0      # Cost of idle staff
-        }
+        self.cost_parameters = dict(COST_PARAMETERS)
         
         # Optimization constraints
         self.optimization_constraints = {
@@ -106,44 +268,118 @@ class AdvancedStaffOptimizer:
             'Radiology': {'base_providers': 1, 'base_nurses': 2, 'complexity': 0.7, 'avg_wait_time': 32.0, 'patient_volume': 489, 'peak_hours': [9, 13, 15], 'staff_efficiency': 0.9},
             'Oncology': {'base_providers': 2, 'base_nurses': 4, 'complexity': 0.9, 'avg_wait_time': 48.0, 'patient_volume': 530, 'peak_hours': [9, 14, 16], 'staff_efficiency': 0.7}
         }
+        
+        # Department columns as parallel arrays (structure of arrays) indexed through _dept_idx
+        names = list(self.department_baselines)
+        baselines = [self.department_baselines[name] for name in names]
+        self._dept_names = names
+        self._dept_idx = {name: i for i, name in enumerate(names)}
+        self._dept_base_providers = np.array([b['base_providers'] for b in baselines], dtype=np.int64)
+        self._dept_base_nurses = np.array([b['base_nurses'] for b in baselines], dtype=np.int64)
+        self._dept_complexity = np.array([b['complexity'] for b in baselines], dtype=np.float64)
+        self._dept_wait = np.array([b['avg_wait_time'] for b in baselines], dtype=np.float64)
+        self._dept_volume = np.array([b['patient_volume'] for b in baselines], dtype=np.int64)
+        self._dept_efficiency = np.array([b['staff_efficiency'] for b in baselines], dtype=np.float64)
+        self._dept_peak = [b['peak_hours'] for b in baselines]
+        
+        # Department-constant feature columns, one template row per department, filled once
+        # so the grid search only writes the varying columns
+        rows = np.zeros((len(names), FEATURE_COUNT))
+        rows[:, 0] = self._dept_wait  # TotalTimeInHospital (baseline)
+        rows[:, 9] = self._dept_wait  # DeptMeanWait
+        rows[:, 10] = self._dept_wait * 0.2  # DeptStdWait
+        rows[:, 11] = 0.0  # WaitTimeZScore
+        rows[:, 12] = self._dept_volume / 1000  # PatientFlowRate
+        rows.setflags(write=False)
+        self._dept_feature_rows = rows
+        
+        # The department listing is static: serialize it once
+        self._departments_json = orjson.dumps(self.department_listing())
+    
+    def department_listing(self) -> List[Dict]:
+        """Summary of every department for /departments, read from the column arrays"""
+        columns = zip(
+            self._dept_names, self._dept_base_providers.tolist(), self._dept_base_nurses.tolist(),
+            self._dept_complexity.tolist(), self._dept_wait.tolist(), self._dept_volume.tolist(),
+            self._dept_peak, self._dept_efficiency.tolist()
+        )
+        return [
+            {
+                'name': name,
+                'baseline_staffing': {'providers': providers, 'nurses': nurses},
+                'complexity_score': complexity,
+                'average_wait_time': wait,
+                'patient_volume': volume,
+                'peak_hours': peak_hours,
+                'staff_efficiency': efficiency
+            }
+            for name, providers, nurses, complexity, wait, volume, peak_hours, efficiency in columns
+        ]
     
     def _load_models(self):
         """Load trained models and components"""
         try:
-            # Load models
-            model_files = {
-                'wait_time_predictor': 'models/staff_optimizer_wait_time_predictor.pkl',
-                'efficiency_predictor': 'models/staff_optimizer_efficiency_predictor.pkl'
-            }
-            
-            for name, file_path in model_files.items():
-                if os.path.exists(file_path):
-                    self.models[name] = joblib.load(file_path)
+            # Load models; the uncompressed pickles let NumPy arrays map straight from the page cache
+            for name in PREDICTOR_NAMES:
+                if os.path.exists(MODEL_FILES[name]):
+                    self.models[name] = joblib.load(MODEL_FILES[name], mmap_mode='r')
             
             # Load scaler
-            scaler_path = 'models/staff_optimizer_scaler.pkl'
-            if os.path.exists(scaler_path):
-                self.scalers['standard'] = joblib.load(scaler_path)
+            if os.path.exists(MODEL_FILES['scaler']):
+                self.scalers['standard'] = joblib.load(MODEL_FILES['scaler'], mmap_mode='r')
+            
+            wait_range = _output_range(self.models['wait_time_predictor']) if 'wait_time_predictor' in self.models else None
+            efficiency_range = _output_range(self.models['efficiency_predictor']) if 'efficiency_predictor' in self.models else None
+            if wait_range and efficiency_range:
+                self._prediction_bounds = wait_range + efficiency_range
+            
+            if 'standard' in self.scalers and self.models:
+                self._scaler_folded = _fold_scaler_into_models(self.scalers['standard'], self.models.values())
+            
+            # The ONNX graph includes the scaler and both models, so one native call covers the whole grid
+            if onnxruntime is not None and os.path.exists(ONNX_MODEL_FILE):
+                # One thread per run: concurrent requests parallelize across the thread pool instead,
+                # since onnxruntime releases the GIL inside run()
+                session_options = onnxruntime.SessionOptions()
+                session_options.intra_op_num_threads = 1
+                session_options.inter_op_num_threads = 1
+                self.onnx_session = onnxruntime.InferenceSession(
+                    ONNX_MODEL_FILE, session_options, providers=['CPUExecutionProvider']
+                )
             
             # Load metadata
-            metadata_path = 'models/staff_optimization_metadata.pkl'
-            if os.path.exists(metadata_path):
-                metadata = joblib.load(metadata_path)
+            if os.path.exists(MODEL_FILES['metadata']):
+                metadata = joblib.load(MODEL_FILES['metadata'])
                 self.feature_importance = metadata.get('feature_importance', {})
                 self.department_baselines = metadata.get('department_baselines', {})
             
+            self._optimize_cached.cache_clear()
             print("✅ Advanced staff optimization models loaded successfully")
             
         except Exception as e:
             print(f"❌ Error loading staff optimization models: {e}")
             self.models = {}
             self.scalers = {}
+            self.onnx_session = None
+            self._scaler_folded = False
+            self._prediction_bounds = None
     
     def optimize_staffing(self, 
                          department: str,
                          current_metrics: Dict,
                          optimization_horizon: int = 4) -> Dict:
         """Optimize staffing levels for a department"""
+        optimization = self._optimize_cached(department, tuple(sorted(current_metrics.items())), optimization_horizon)
+        return {**optimization, 'optimization_timestamp': _now_iso()}
+    
+    def _optimize(self, department: str, metrics_items: Tuple, optimization_horizon: int) -> Dict:
+        """
+        Optimization result without its timestamp, for sorted (metric, value) pairs
+        
+        Pure with respect to its arguments once the models are loaded, so results are
+        memoized through _optimize_cached; callers must not mutate them.
+        """
+        current_metrics = dict(metrics_items)
         
         # Get department baseline
         dept_baseline = self.department_baselines.get(department, self.department_baselines['Internal Medicine'])
@@ -152,55 +388,60 @@ class AdvancedStaffOptimizer:
         current_providers = current_metrics.get('providers_on_shift', dept_baseline['base_providers'])
         current_nurses = current_metrics.get('nurses_on_shift', dept_baseline['base_nurses'])
         
-        # Try different staffing combinations
-        best_config = None
-        best_score = float('inf')
-        
-        for providers in range(
-            max(self.optimization_constraints['min_providers'], current_providers - 2),
-            min(self.optimization_constraints['max_providers'], current_providers + 3)
-        ):
-            for nurses in range(
+        # Score every candidate (providers, nurses) pair in one vectorized pass
+        providers_grid, nurses_grid = np.meshgrid(
+            np.arange(
+                max(self.optimization_constraints['min_providers'], current_providers - 2),
+                min(self.optimization_constraints['max_providers'], current_providers + 3)
+            ),
+            np.arange(
                 max(self.optimization_constraints['min_nurses'], current_nurses - 3),
                 min(self.optimization_constraints['max_nurses'], current_nurses + 5)
-            ):
-                # Check constraints
-                if not self._check_constraints(providers, nurses, current_metrics):
-                    continue
-                
-                # Predict performance with this staffing
-                performance = self._predict_performance(
-                    department, providers, nurses, current_metrics
-                )
-                
-                # Calculate optimization score
-                score = self._calculate_optimization_score(
-                    providers, nurses, performance, current_metrics
-                )
-                
-                if score < best_score:
-                    best_score = score
-                    best_config = {
-                        'providers': providers,
-                        'nurses': nurses,
-                        'total_staff': providers + nurses,
-                        'performance': performance,
-                        'score': score
-                    }
+            ),
+            indexing='ij'
+        )
+        providers = providers_grid.ravel()
+        nurses = nurses_grid.ravel()
+        feasible = self._check_constraints(providers, nurses, current_metrics)
+        providers, nurses = providers[feasible], nurses[feasible]
+        if not self.models and self.cost_parameters['provider_hourly_cost'] >= self.cost_parameters['nurse_hourly_cost']:
+            providers, nurses = self._cheapest_mix_per_total(providers, nurses)
+        elif self.models and self._prediction_bounds is not None and providers.size:
+            providers, nurses = self._prune_by_score_bounds(providers, nurses, current_metrics)
+        
+        best_config = None
+        if providers.size:
+            performance = self._predict_performance(department, providers, nurses, current_metrics)
+            scores = self._calculate_optimization_score(providers, nurses, performance, current_metrics)
+            # argmin keeps the first minimum, matching the old row-major scan
+            best = int(np.argmin(scores))
+            best_config = {
+                'providers': int(providers[best]),
+                'nurses': int(nurses[best]),
+                'total_staff': int(providers[best] + nurses[best]),
+                'performance': {key: float(values[best]) for key, values in performance.items()},
+                'score': float(scores[best])
+            }
         
         if best_config is None:
             # Fallback to current staffing
+            performance = self._predict_performance(
+                department, np.array([current_providers]), np.array([current_nurses]), current_metrics
+            )
             best_config = {
                 'providers': current_providers,
                 'nurses': current_nurses,
                 'total_staff': current_providers + current_nurses,
-                'performance': self._predict_performance(department, current_providers, current_nurses, current_metrics),
+                'performance': {key: float(values[0]) for key, values in performance.items()},
                 'score': 0
             }
         
+        # Cost analysis is computed once and shared with the recommendations
+        cost_analysis = self._calculate_cost_analysis(current_providers, current_nurses, best_config)
+        
         # Generate recommendations
         recommendations = self._generate_recommendations(
-            department, current_providers, current_nurses, best_config, current_metrics
+            department, current_providers, current_nurses, best_config, current_metrics, cost_analysis['cost_change']
         )
         
         return {
@@ -223,92 +464,129 @@ class AdvancedStaffOptimizer:
             'performance_prediction': best_config['performance'],
             'optimization_score': best_config['score'],
             'recommendations': recommendations,
-            'cost_analysis': self._calculate_cost_analysis(current_providers, current_nurses, best_config),
-            'optimization_timestamp': datetime.now().isoformat()
+            'cost_analysis': cost_analysis
         }
     
-    def _check_constraints(self, providers: int, nurses: int, current_metrics: Dict) -> bool:
-        """Check if staffing configuration meets constraints"""
-        
-        # Provider:nurse ratio constraint
-        provider_nurse_ratio = providers / (nurses + 0.1)
-        if not (self.optimization_constraints['provider_nurse_ratio_min'] <= 
-                provider_nurse_ratio <= self.optimization_constraints['provider_nurse_ratio_max']):
-            return False
-        
-        # Staff:patient ratio constraint
+    @staticmethod
+    def _cheapest_mix_per_total(providers: np.ndarray, nurses: np.ndarray):
+        """Keep the fewest-providers configuration for each total staff count.
+        
+        The heuristic predictions depend only on total staff, so within a total the
+        score differs by cost alone and, with providers costing at least as much as
+        nurses, the nurse-heavy mix always wins.
+        Survivors stay in row-major (providers, nurses) order so ties resolve as before.
+        """
         total_staff = providers + nurses
-        patient_count = current_metrics.get('patient_count', 10)
-        staff_patient_ratio = total_staff / (patient_count + 0.1)
-        
-        if not (self.optimization_constraints['min_staff_to_patient_ratio'] <= 
-                staff_patient_ratio <= self.optimization_constraints['max_staff_to_patient_ratio']):
-            return False
-        
-        return True
+        order = np.lexsort((providers, total_staff))
+        first_of_total = np.ones(order.size, dtype=bool)
+        first_of_total[1:] = total_staff[order][1:] != total_staff[order][:-1]
+        keep = np.sort(order[first_of_total])
+        return providers[keep], nurses[keep]
+    
+    def _prune_by_score_bounds(self, providers: np.ndarray, nurses: np.ndarray, current_metrics: Dict):
+        """
+        Drop configurations that cannot beat the best one, before any model is run
+        
+        Cost and utilization are known exactly; the predictions are bounded by the model
+        output ranges. A configuration whose best-case score exceeds the smallest worst-case
+        score is strictly worse than some other one, so it can never be the optimum.
+        """
+        wait_min, wait_max, efficiency_min, efficiency_max = self._prediction_bounds
+        utilization = self._model_staff_utilization(providers + nurses, current_metrics)
+        provider_cost = float(self.cost_parameters['provider_hourly_cost'])
+        nurse_cost = float(self.cost_parameters['nurse_hourly_cost'])
+        lower = _staffing_scores(providers, nurses, np.full(providers.shape, wait_min),
+                                 np.full(providers.shape, efficiency_max), utilization, provider_cost, nurse_cost)
+        upper = _staffing_scores(providers, nurses, np.full(providers.shape, wait_max),
+                                 np.full(providers.shape, efficiency_min), utilization, provider_cost, nurse_cost)
+        keep = lower <= upper.min()
+        return providers[keep], nurses[keep]
+    
+    @staticmethod
+    def _model_staff_utilization(total_staff: np.ndarray, current_metrics: Dict) -> np.ndarray:
+        """Staff utilization reported alongside model predictions"""
+        staff_patient_ratio = total_staff / (current_metrics.get('patient_count', 10) + 0.1)
+        return np.minimum(1.0, staff_patient_ratio * 0.5)
     
-    def _predict_performance(self, department: str, providers: int, nurses: int, current_metrics: Dict) -> Dict:
-        """Predict performance with given staffing"""
+    def _check_constraints(self, providers: np.ndarray, nurses: np.ndarray, current_metrics: Dict) -> np.ndarray:
+        """Boolean mask of the staffing configurations that meet constraints"""
+        return _feasible_mask(
+            providers, nurses, float(current_metrics.get('patient_count', 10)),
+            self.optimization_constraints['provider_nurse_ratio_min'],
+            self.optimization_constraints['provider_nurse_ratio_max'],
+            self.optimization_constraints['min_staff_to_patient_ratio'],
+            self.optimization_constraints['max_staff_to_patient_ratio']
+        )
+    
+    def _predict_performance(self, department: str, providers: np.ndarray, nurses: np.ndarray, current_metrics: Dict) -> Dict[str, np.ndarray]:
+        """Predict performance for each staffing configuration, one array entry per configuration"""
         
         if not self.models:
             return self._fallback_performance_prediction(providers, nurses, current_metrics)
         
-        # Prepare features for prediction
+        # Prepare the whole feature matrix, then predict in one call per model
         features = self._prepare_prediction_features(department, providers, nurses, current_metrics)
         
-        # Scale features
-        features_scaled = self.scalers['standard'].transform([features])
-        
-        # Predict wait time and efficiency
-        predicted_wait_time = self.models['wait_time_predictor'].predict(features_scaled)[0]
-        predicted_efficiency = self.models['efficiency_predictor'].predict(features_scaled)[0]
+        if self.onnx_session is not None:
+            predictions = self.onnx_session.run(None, {'X': features.astype(np.float32)})[0]
+            predicted_wait_time = predictions[:, 0]
+            predicted_efficiency = predictions[:, 1]
+        else:
+            features_scaled = features if self._scaler_folded else self.scalers['standard'].transform(features)
+            predicted_wait_time = self.models['wait_time_predictor'].predict(features_scaled)
+            predicted_efficiency = self.models['efficiency_predictor'].predict(features_scaled)
         
         # Calculate additional metrics
         total_staff = providers + nurses
-        staff_patient_ratio = total_staff / (current_metrics.get('patient_count', 10) + 0.1)
         
         return {
-            'predicted_wait_time': float(predicted_wait_time),
-            'predicted_efficiency': float(predicted_efficiency),
-            'staff_utilization': float(min(1.0, staff_patient_ratio * 0.5)),
-            'throughput': float(total_staff * predicted_efficiency * 2),  # patients per hour
-            'capacity_utilization': float(min(1.0, current_metrics.get('facility_occupancy', 0.7)))
+            'predicted_wait_time': predicted_wait_time,
+            'predicted_efficiency': predicted_efficiency,
+            'staff_utilization': self._model_staff_utilization(total_staff, current_metrics),
+            'throughput': total_staff * predicted_efficiency * 2,  # patients per hour
+            'capacity_utilization': np.full(total_staff.shape, min(1.0, current_metrics.get('facility_occupancy', 0.7)))
         }
     
-    def _prepare_prediction_features(self, department: str, providers: int, nurses: int, current_metrics: Dict) -> List[float]:
-        """Prepare features for ML prediction"""
+    def _feature_buffer(self, rows: int) -> np.ndarray:
+        """
+        Scratch (rows, FEATURE_COUNT) matrix reused by every call on the current thread
+        
+        Only valid until the thread's next call; predictions copy or convert it before returning.
+        """
+        buffer = getattr(self._thread_buffers, 'features', None)
+        if buffer is None or buffer.shape[0] < rows:
+            buffer = np.empty((max(FEATURE_BUFFER_ROWS, rows), FEATURE_COUNT))
+            self._thread_buffers.features = buffer
+        return buffer[:rows]
+    
+    def _prepare_prediction_features(self, department: str, providers: np.ndarray, nurses: np.ndarray, current_metrics: Dict) -> np.ndarray:
+        """Prepare the ML feature matrix, one row per staffing configuration"""
         
-        # Get department baseline
-        dept_baseline = self.department_baselines.get(department, self.department_baselines['Internal Medicine'])
+        dept_row = self._dept_feature_rows[self._dept_idx.get(department, self._dept_idx['Internal Medicine'])]
         
         # Calculate features
+        patient_count = current_metrics.get('patient_count', 10)
+        occupancy = current_metrics.get('facility_occupancy', 0.7)
         total_staff = providers + nurses
-        provider_nurse_ratio = providers / (nurses + 0.1)
-        staff_efficiency = 1 / (total_staff / (current_metrics.get('patient_count', 10) + 0.1) + 0.1)
-        staff_workload = (total_staff / (current_metrics.get('patient_count', 10) + 0.1)) * current_metrics.get('facility_occupancy', 0.7)
-        
-        # Prepare feature vector (must match training features exactly)
-        features = [
-            dept_baseline['avg_wait_time'],  # TotalTimeInHospital (baseline)
-            current_metrics.get('day_of_week', 1),  # DayOfWeekNumeric
-            current_metrics.get('is_weekend', 0),  # IsWeekend
-            providers,  # ProvidersOnShift
-            nurses,  # NursesOnShift
-            total_staff,  # TotalStaff
-            provider_nurse_ratio,  # ProviderNurseRatio
-            staff_efficiency,  # StaffEfficiency
-            staff_workload,  # StaffWorkload
-            dept_baseline['avg_wait_time'],  # DeptMeanWait
-            dept_baseline['avg_wait_time'] * 0.2,  # DeptStdWait
-            0.0,  # WaitTimeZScore
-            dept_baseline['patient_volume'] / 1000,  # PatientFlowRate
-            current_metrics.get('facility_occupancy', 0.7),  # CapacityUtilization
-            current_metrics.get('facility_occupancy', 0.7) ** 2  # CapacitySquared
-        ]
+        staff_patient_ratio = total_staff / (patient_count + 0.1)
+        
+        # Column order must match training features exactly
+        features = self._feature_buffer(total_staff.size)
+        features[:] = dept_row
+        features[:, 1] = current_metrics.get('day_of_week', 1)  # DayOfWeekNumeric
+        features[:, 2] = current_metrics.get('is_weekend', 0)  # IsWeekend
+        features[:, 3] = providers  # ProvidersOnShift
+        features[:, 4] = nurses  # NursesOnShift
+        features[:, 5] = total_staff  # TotalStaff
+        features[:, 6] = providers / (nurses + 0.1)  # ProviderNurseRatio
+        features[:, 7] = 1 / (staff_patient_ratio + 0.1)  # StaffEfficiency
+        features[:, 8] = staff_patient_ratio * occupancy  # StaffWorkload
+        features[:, 13] = occupancy  # CapacityUtilization
+        features[:, 14] = occupancy ** 2  # CapacitySquared
         
         return features
     
-    def _fallback_performance_prediction(self, providers: int, nurses: int, current_metrics: Dict) -> Dict:
+    def _fallback_performance_prediction(self, providers: np.ndarray, nurses: np.ndarray, current_metrics: Dict) -> Dict[str, np.ndarray]:
         """Fallback performance prediction when ML models unavailable"""
         
         total_staff = providers + nurses
@@ -316,42 +594,32 @@ class AdvancedStaffOptimizer:
         
         # Simple heuristic-based prediction
         base_wait_time = 60  # Base wait time
-        staff_factor = max(0.1, 1.0 / (total_staff / patient_count + 0.1))
+        staff_factor = np.maximum(0.1, 1.0 / (total_staff / patient_count + 0.1))
         predicted_wait_time = base_wait_time * staff_factor
         
-        efficiency = min(1.0, total_staff / (patient_count * 0.3))
+        efficiency = np.minimum(1.0, total_staff / (patient_count * 0.3))
         
         return {
             'predicted_wait_time': predicted_wait_time,
             'predicted_efficiency': efficiency,
-            'staff_utilization': min(1.0, total_staff / patient_count),
+            'staff_utilization': np.minimum(1.0, total_staff / patient_count),
             'throughput': total_staff * efficiency * 1.5,
-            'capacity_utilization': current_metrics.get('facility_occupancy', 0.7)
+            'capacity_utilization': np.full(total_staff.shape, current_metrics.get('facility_occupancy', 0.7))
         }
     
-    def _calculate_optimization_score(self, providers: int, nurses: int, performance: Dict, current_metrics: Dict) -> float:
-        """Calculate optimization score (lower is better)"""
-        
-        # Wait time component (higher weight for longer wait times)
-        wait_time_score = performance['predicted_wait_time'] * 0.4
-        
-        # Efficiency component
-        efficiency_score = (1.0 - performance['predicted_efficiency']) * 100 * 0.3
-        
-        # Cost component
-        hourly_cost = (providers * self.cost_parameters['provider_hourly_cost'] + 
-                      nurses * self.cost_parameters['nurse_hourly_cost']) * 0.2
-        
-        # Utilization component (penalize over/under utilization)
-        utilization = performance['staff_utilization']
-        utilization_score = abs(utilization - 0.8) * 50 * 0.1
-        
-        total_score = wait_time_score + efficiency_score + hourly_cost + utilization_score
-        
-        return total_score
+    def _calculate_optimization_score(self, providers: np.ndarray, nurses: np.ndarray, performance: Dict[str, np.ndarray], current_metrics: Dict) -> np.ndarray:
+        """Calculate the optimization score of each configuration (lower is better)"""
+        return _staffing_scores(
+            providers, nurses,
+            performance['predicted_wait_time'],
+            performance['predicted_efficiency'],
+            performance['staff_utilization'],
+            float(self.cost_parameters['provider_hourly_cost']),
+            float(self.cost_parameters['nurse_hourly_cost'])
+        )
     
     def _generate_recommendations(self, department: str, current_providers: int, current_nurses: int, 
-                                 best_config: Dict, current_metrics: Dict) -> List[str]:
+                                 best_config: Dict, current_metrics: Dict, cost_change: float) -> List[str]:
         """Generate staffing recommendations"""
         
         recommendations = []
@@ -384,11 +652,10 @@ class AdvancedStaffOptimizer:
             recommendations.append("🎯 High staff efficiency - consider maintaining current levels")
         
         # Cost recommendations
-        cost_analysis = self._calculate_cost_analysis(current_providers, current_nurses, best_config)
-        if cost_analysis['cost_change'] > 0:
-            recommendations.append(f"💰 Additional cost: ${cost_analysis['cost_change']:.2f}/hour")
-        elif cost_analysis['cost_change'] < 0:
-            recommendations.append(f"💵 Cost savings: ${abs(cost_analysis['cost_change']):.2f}/hour")
+        if cost_change > 0:
+            recommendations.append(f"💰 Additional cost: ${cost_change:.2f}/hour")
+        elif cost_change < 0:
+            recommendations.append(f"💵 Cost savings: ${abs(cost_change):.2f}/hour")
         
         return recommendations
     
@@ -407,8 +674,8 @@ class AdvancedStaffOptimizer:
             'current_hourly_cost': current_hourly_cost,
             'optimized_hourly_cost': optimized_hourly_cost,
             'cost_change': cost_change,
-            'daily_cost_change': cost_change * 8,  # Assuming 8-hour shifts
-            'monthly_cost_change': cost_change * 8 * 22  # Assuming 22 working days
+            'daily_cost_change': cost_change * HOURS_PER_SHIFT,
+            'monthly_cost_change': cost_change * HOURS_PER_MONTH
         }
     
     def get_department_analysis(self, department: str) -> Dict:
@@ -430,6 +697,14 @@ class AdvancedStaffOptimizer:
             'optimization_constraints': self.optimization_constraints
         }
     
+    def get_file_status(self) -> Dict[str, bool]:
+        """Which model files exist, re-checked at most every FILE_STATUS_TTL_SECONDS"""
+        now = time.monotonic()
+        if now - self._file_status_checked_at >= FILE_STATUS_TTL_SECONDS:
+            self._file_status = {name: os.path.exists(path) for name, path in MODEL_FILES.items()}
+            self._file_status_checked_at = now
+        return self._file_status
+    
     def get_optimization_summary(self) -> Dict:
         """Get summary of staff optimization system"""
         return {
@@ -441,13 +716,16 @@ class AdvancedStaffOptimizer:
             'top_features': dict(sorted(self.feature_importance.items(), key=lambda x: x[1], reverse=True)[:5])
         }
 
-# Initialize optimizer
-optimizer = AdvancedStaffOptimizer()
+@lru_cache(maxsize=1)
+def get_optimizer() -> AdvancedStaffOptimizer:
+    """Shared optimizer, built (and its models loaded) on the first request that needs it"""
+    return AdvancedStaffOptimizer()
 
 @router.post("/optimize", response_model=StaffOptimizationResponse)
 async def optimize_staffing(
     request: StaffOptimizationRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    optimizer: AdvancedStaffOptimizer = Depends(get_optimizer)
 ):
     """
     Optimize staffing levels for a department using AI and operational research
@@ -457,53 +735,43 @@ async def optimize_staffing(
     - **optimization_horizon**: Optimization time horizon in hours
     """
     try:
-        optimization = optimizer.optimize_staffing(
+        # The grid search is CPU-bound; run it on the thread pool so the event loop stays free
+        optimization = await run_in_threadpool(
+            optimizer.optimize_staffing,
             request.department, 
             request.current_metrics, 
             request.optimization_horizon
         )
+        # Validated construction: current_metrics arrive as floats, and the int staffing fields
+        # must be coerced (or a fractional head count rejected) before serialization
         return StaffOptimizationResponse(**optimization)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Staff optimization failed: {str(e)}")
 
 @router.get("/departments/{department}", response_model=DepartmentAnalysisResponse)
-async def get_department_analysis(department: str):
+async def get_department_analysis(department: str, optimizer: AdvancedStaffOptimizer = Depends(get_optimizer)):
     """
     Get detailed analysis for a specific department
     """
     try:
         analysis = optimizer.get_department_analysis(department)
-        return DepartmentAnalysisResponse(**analysis)
+        return DepartmentAnalysisResponse.model_construct(**analysis)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get department analysis: {str(e)}")
 
 @router.get("/departments", response_model=List[Dict])
-async def get_all_departments():
+async def get_all_departments(optimizer: AdvancedStaffOptimizer = Depends(get_optimizer)):
     """
     Get information about all departments
     """
     try:
-        departments = []
-        for dept_name, dept_info in optimizer.department_baselines.items():
-            departments.append({
-                'name': dept_name,
-                'baseline_staffing': {
-                    'providers': dept_info['base_providers'],
-                    'nurses': dept_info['base_nurses']
-                },
-                'complexity_score': dept_info['complexity'],
-                'average_wait_time': dept_info['avg_wait_time'],
-                'patient_volume': dept_info['patient_volume'],
-                'peak_hours': dept_info['peak_hours'],
-                'staff_efficiency': dept_info['staff_efficiency']
-            })
-        return departments
+        return Response(optimizer._departments_json, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get departments: {str(e)}")
 
 @router.get("/summary")
-async def get_optimization_summary():
+async def get_optimization_summary(optimizer: AdvancedStaffOptimizer = Depends(get_optimizer)):
     """
     Get summary of the staff optimization system
     """
@@ -514,36 +782,24 @@ async def get_optimization_summary():
         raise HTTPException(status_code=500, detail=f"Failed to get optimization summary: {str(e)}")
 
 @router.get("/model-status")
-async def get_model_status():
+async def get_model_status(optimizer: AdvancedStaffOptimizer = Depends(get_optimizer)):
     """
     Get the status of staff optimization models
     """
     try:
-        model_files = {
-            'wait_time_predictor': 'models/staff_optimizer_wait_time_predictor.pkl',
-            'efficiency_predictor': 'models/staff_optimizer_efficiency_predictor.pkl',
-            'scaler': 'models/staff_optimizer_scaler.pkl',
-            'metadata': 'models/staff_optimization_metadata.pkl'
-        }
-        
-        status = {
+        return {
             "models_loaded": len(optimizer.models),
             "scalers_loaded": len(optimizer.scalers),
             "departments_analyzed": len(optimizer.department_baselines),
             "feature_count": len(optimizer.feature_importance),
-            "files_status": {},
-            "last_checked": datetime.now().isoformat()
+            "files_status": dict(optimizer.get_file_status()),
+            "last_checked": _now_iso()
         }
-        
-        for name, file_path in model_files.items():
-            status["files_status"][name] = os.path.exists(file_path)
-        
-        return status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get model status: {str(e)}")
 
 @router.get("/constraints")
-async def get_optimization_constraints():
+async def get_optimization_constraints(optimizer: AdvancedStaffOptimizer = Depends(get_optimizer)):
     """
     Get optimization constraints and parameters
     """
@@ -576,15 +832,18 @@ async def validate_metrics(metrics: Dict[str, float]):
     Validate metrics format for staff optimization
     """
     try:
-        required_fields = ['providers_on_shift', 'nurses_on_shift', 'patient_count', 'facility_occupancy']
-        missing_fields = [field for field in required_fields if field not in metrics]
+        # Complete payloads (the common case) pass one C-level subset check
+        if _REQUIRED_METRIC_FIELD_SET.issubset(metrics):
+            missing_fields = []
+        else:
+            missing_fields = [field for field in REQUIRED_METRIC_FIELDS if field not in metrics]
         
         return {
-            "valid": len(missing_fields) == 0,
+            "valid": not missing_fields,
             "missing_fields": missing_fields,
-            "provided_fields": list(metrics.keys()),
-            "required_fields": required_fields,
-            "validation_timestamp": datetime.now().isoformat()
+            "provided_fields": list(metrics),
+            "required_fields": list(REQUIRED_METRIC_FIELDS),
+            "validation_timestamp": _now_iso()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
@@ -596,7 +855,7 @@ async def get_cost_analysis_template():
     """
     try:
         return {
-            "cost_parameters": optimizer.cost_parameters,
+            "cost_parameters": COST_PARAMETERS,
             "cost_calculation_example": {
                 "current_staffing": {"providers": 3, "nurses": 6},
                 "optimized_staffing": {"providers": 4, "nurses": 7},
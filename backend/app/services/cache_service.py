@@ -0,0 +1,133 @@
+"""
+Response Cache Service - Short-lived caching of computed API responses
+Uses Redis when REDIS_URL is configured, otherwise an in-process TTL store
+"""
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bound on the in-process store: keys such as slots:{service_id}:{date} come from
+# request input, so past this many entries the least recently used ones are evicted
+LOCAL_CACHE_MAX_ENTRIES = 10000
+# Expired entries nobody reads again are swept out by set() at most this often
+LOCAL_CACHE_SWEEP_INTERVAL_SECONDS = 60
+
+
+class ResponseCache:
+    """
+    Key/value cache for JSON-serializable responses
+
+    Entries can be registered under tags so that a write affecting many
+    cached keys (e.g. every slot listing for one weekday) can drop them
+    all with a single invalidate_tag() call. The in-process store holds at
+    most max_entries keys, evicting the least recently used first.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, max_entries: int = LOCAL_CACHE_MAX_ENTRIES):
+        self._redis = None
+        # key -> (expires_at, value, tags), least recently used first
+        self._local: Dict[str, Tuple[float, Any, Tuple[str, ...]]] = OrderedDict()
+        self._local_tags: Dict[str, Set[str]] = {}
+        self._max_entries = max_entries
+        self._next_sweep = 0.0
+
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(redis_url)
+            except ImportError:
+                logger.warning("REDIS_URL is set but the redis package is not installed; using in-process cache")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        if self._redis is not None:
+            try:
+                cached = await self._redis.get(key)
+                return json.loads(cached) if cached is not None else None
+            except Exception as e:
+                logger.warning("Redis cache read failed", exc_info=e)
+                return None
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if time.monotonic() >= expires_at:
+            self._discard_local(key)
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        """Cache value under key for ttl seconds and register it under tags"""
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.set(key, json.dumps(value), ex=ttl)
+                    for tag in tags:
+                        pipe.sadd(tag, key)
+                        pipe.expire(tag, ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Redis cache write failed", exc_info=e)
+            return
+
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep_expired(now)
+
+        tags = tuple(tags)
+        self._discard_local(key)
+        self._local[key] = (now + ttl, value, tags)
+        for tag in tags:
+            self._local_tags.setdefault(tag, set()).add(key)
+        while len(self._local) > self._max_entries:
+            self._discard_local(next(iter(self._local)))
+
+    def _discard_local(self, key: str) -> None:
+        """Drop key from the in-process store and from every tag it was registered under"""
+        entry = self._local.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._local_tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._local_tags[tag]
+
+    def _sweep_expired(self, now: float) -> None:
+        """Drop every in-process entry whose TTL has passed"""
+        for key in [key for key, (expires_at, _, _) in self._local.items() if now >= expires_at]:
+            self._discard_local(key)
+        self._next_sweep = now + LOCAL_CACHE_SWEEP_INTERVAL_SECONDS
+
+    def clear_local(self) -> None:
+        """Drop every in-process entry (e.g. when the database behind them is reset)"""
+        self._local.clear()
+        self._local_tags.clear()
+
+    async def invalidate_tag(self, tag: str) -> None:
+        """Drop every key registered under tag"""
+        if self._redis is not None:
+            try:
+                keys = await self._redis.smembers(tag)
+                await self._redis.delete(tag, *keys)
+            except Exception as e:
+                logger.warning("Redis cache invalidation failed", exc_info=e)
+            return
+
+        for key in list(self._local_tags.get(tag, ())):
+            self._discard_local(key)
+
+
+# Singleton instance
+response_cache = ResponseCache(os.getenv("REDIS_URL"))
+
+# Tag on every cached service listing; any route that writes Service invalidates it
+SERVICES_CACHE_TAG = "services"
@@ -3,8 +3,9 @@ Staff management service for Healthcare Queue Management System
 """
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Row, Select, and_, insert, or_, func, select, update
 import json
 
 from app.models.models import User
@@ -12,126 +13,162 @@ from app.models.staff_models import (
     StaffProfile, StaffSchedule, StaffPerformance, StaffCommunication,
     StaffTask, StaffTraining, SystemSettings, AuditLog, Department, RolePermission
 )
-from app.services.auth_service import get_user_by_id
+from app.services.cache_service import response_cache
+
+# Dashboards poll /stats; the aggregate is cached briefly and dropped on staff profile writes
+STAFF_STATS_CACHE_KEY = "staff:stats:v2"
+STAFF_STATS_CACHE_TAG = "staff:stats"
+STAFF_STATS_CACHE_TTL_SECONDS = 60
+
+# Role permission lookups are cached per (role, resource, action) and dropped when permissions change;
+# without Redis that drop only reaches the worker handling the write, so the TTL bounds the rest
+PERMISSION_CACHE_TTL_SECONDS = 60
+PERMISSION_CACHE_TAG = "role_permissions"
+
+# Audit log listings leave out the bulky old/new value and client columns
+AUDIT_LOG_LIST_COLUMNS = (
+    AuditLog.id, AuditLog.user_id, AuditLog.action, AuditLog.resource_type,
+    AuditLog.resource_id, AuditLog.timestamp, AuditLog.success, AuditLog.error_message
+)
 
 
 class StaffService:
-    """Service for managing staff operations and data."""
+    """
+    Service for managing staff operations and data.
+
+    Staff-facing methods take an AsyncSession and only flush their writes;
+    the calling route owns the transaction (see unit_of_work). System
+    settings, departments and audit logging still take a sync Session for
+    the admin routes and commit themselves.
+    """
 
     def __init__(self):
         pass
 
-    def create_staff_profile(self, db: Session, user_id: int, profile_data: Dict[str, Any]) -> StaffProfile:
+    async def create_staff_profile(self, db: AsyncSession, user_id: int, profile_data: Dict[str, Any]) -> StaffProfile:
         """Create a staff profile for a user."""
-        profile = StaffProfile(
-            user_id=user_id,
-            employee_id=profile_data.get("employee_id"),
-            department=profile_data.get("department"),
-            specialization=profile_data.get("specialization"),
-            license_number=profile_data.get("license_number"),
-            years_experience=profile_data.get("years_experience", 0),
-            certifications=json.dumps(profile_data.get("certifications", [])),
-            performance_rating=profile_data.get("performance_rating", 0.0),
-            is_supervisor=profile_data.get("is_supervisor", False),
-            supervisor_id=profile_data.get("supervisor_id"),
-            hire_date=profile_data.get("hire_date"),
-            contract_type=profile_data.get("contract_type", "full_time"),
-            hourly_rate=profile_data.get("hourly_rate"),
-            max_patients_per_hour=profile_data.get("max_patients_per_hour", 4),
-            languages_spoken=json.dumps(profile_data.get("languages_spoken", [])),
-            emergency_certified=profile_data.get("emergency_certified", False)
+        return (await db.execute(
+            insert(StaffProfile).values(
+                user_id=user_id,
+                employee_id=profile_data.get("employee_id"),
+                department=profile_data.get("department"),
+                specialization=profile_data.get("specialization"),
+                license_number=profile_data.get("license_number"),
+                years_experience=profile_data.get("years_experience", 0),
+                certifications=json.dumps(profile_data.get("certifications", [])),
+                performance_rating=profile_data.get("performance_rating", 0.0),
+                is_supervisor=profile_data.get("is_supervisor", False),
+                supervisor_id=profile_data.get("supervisor_id"),
+                hire_date=profile_data.get("hire_date"),
+                contract_type=profile_data.get("contract_type", "full_time"),
+                hourly_rate=profile_data.get("hourly_rate"),
+                max_patients_per_hour=profile_data.get("max_patients_per_hour", 4),
+                languages_spoken=json.dumps(profile_data.get("languages_spoken", [])),
+                emergency_certified=profile_data.get("emergency_certified", False)
+            ).returning(StaffProfile)
+        )).scalar_one()
+
+    async def get_cached_staff_stats(self) -> Optional[Dict[str, str]]:
+        """Cached /stats entry ({"body", "etag"}), or None on a miss."""
+        return await response_cache.get(STAFF_STATS_CACHE_KEY)
+
+    async def cache_staff_stats(self, entry: Dict[str, str]) -> None:
+        """Cache the serialized /stats entry until it expires or staff data changes."""
+        await response_cache.set(
+            STAFF_STATS_CACHE_KEY, entry, STAFF_STATS_CACHE_TTL_SECONDS, tags=(STAFF_STATS_CACHE_TAG,)
         )
 
-        db.add(profile)
-        db.commit()
-        db.refresh(profile)
-        return profile
+    async def invalidate_staff_stats(self) -> None:
+        """Drop the cached /stats payload after staff profile or performance writes."""
+        await response_cache.invalidate_tag(STAFF_STATS_CACHE_TAG)
 
-    def get_staff_profile(self, db: Session, user_id: int) -> Optional[StaffProfile]:
+    async def get_staff_profile(self, db: AsyncSession, user_id: int) -> Optional[StaffProfile]:
         """Get staff profile by user ID."""
-        return db.query(StaffProfile).filter(StaffProfile.user_id == user_id).first()
-
-    def update_staff_profile(self, db: Session, user_id: int, updates: Dict[str, Any]) -> Optional[StaffProfile]:
-        """Update staff profile."""
-        profile = self.get_staff_profile(db, user_id)
-        if not profile:
-            return None
-
-        for key, value in updates.items():
-            if hasattr(profile, key):
-                if key in ["certifications", "languages_spoken"]:
-                    setattr(profile, key, json.dumps(value))
-                else:
-                    setattr(profile, key, value)
-
-        profile.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(profile)
-        return profile
-
-    def get_staff_by_department(self, db: Session, department: str) -> List[Dict[str, Any]]:
-        """Get all staff in a department."""
-        staff_profiles = db.query(StaffProfile).filter(StaffProfile.department == department).all()
-
-        result = []
-        for profile in staff_profiles:
-            user = get_user_by_id(db, profile.user_id)
-            if user:
-                result.append({
-                    "id": user.id,
-                    "name": user.name,
-                    "email": user.email,
-                    "role": user.role,
-                    "profile": {
-                        "employee_id": profile.employee_id,
-                        "specialization": profile.specialization,
-                        "performance_rating": profile.performance_rating,
-                        "is_supervisor": profile.is_supervisor,
-                        "contract_type": profile.contract_type
-                    }
-                })
-
-        return result
-
-    def create_staff_schedule(self, db: Session, schedule_data: Dict[str, Any], created_by: int) -> StaffSchedule:
+        return (await db.execute(
+            select(StaffProfile).where(StaffProfile.user_id == user_id).limit(1)
+        )).scalar_one_or_none()
+
+    async def update_staff_profile(self, db: AsyncSession, user_id: int, updates: Dict[str, Any]) -> Optional[StaffProfile]:
+        """Update only the given staff profile columns in one UPDATE ... RETURNING; None if there is no profile."""
+        values = {
+            key: json.dumps(value) if key in ("certifications", "languages_spoken") else value
+            for key, value in updates.items()
+        }
+        values["updated_at"] = datetime.utcnow()
+
+        return (await db.execute(
+            update(StaffProfile)
+            .where(StaffProfile.user_id == user_id)
+            .values(**values)
+            .returning(StaffProfile)
+            .execution_options(populate_existing=True)
+        )).scalar_one_or_none()
+
+    async def get_staff_by_department(self, db: AsyncSession, department: str) -> List[Dict[str, Any]]:
+        """Get all staff in a department, with user details joined in one query."""
+        rows = (await db.execute(
+            select(
+                User.id, User.name, User.email, User.role,
+                StaffProfile.employee_id, StaffProfile.specialization, StaffProfile.performance_rating,
+                StaffProfile.is_supervisor, StaffProfile.contract_type
+            )
+            .join(User, User.id == StaffProfile.user_id)
+            .where(StaffProfile.department == department)
+        )).all()
+
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "email": row.email,
+                "role": row.role,
+                "profile": {
+                    "employee_id": row.employee_id,
+                    "specialization": row.specialization,
+                    "performance_rating": row.performance_rating,
+                    "is_supervisor": row.is_supervisor,
+                    "contract_type": row.contract_type
+                }
+            }
+            for row in rows
+        ]
+
+    async def create_staff_schedule(self, db: AsyncSession, schedule_data: Dict[str, Any], created_by: int) -> StaffSchedule:
         """Create a staff schedule."""
-        schedule = StaffSchedule(
-            staff_id=schedule_data["staff_id"],
-            shift_date=schedule_data["shift_date"],
-            shift_type=schedule_data.get("shift_type", "morning"),
-            start_time=schedule_data["start_time"],
-            end_time=schedule_data["end_time"],
-            break_duration=schedule_data.get("break_duration", 30),
-            is_active=schedule_data.get("is_active", True),
-            assigned_service_id=schedule_data.get("assigned_service_id"),
-            notes=schedule_data.get("notes"),
-            created_by=created_by
-        )
-
-        db.add(schedule)
-        db.commit()
-        db.refresh(schedule)
-        return schedule
-
-    def get_staff_schedule(self, db: Session, staff_id: int, start_date: datetime, end_date: datetime) -> List[StaffSchedule]:
+        return (await db.execute(
+            insert(StaffSchedule).values(
+                staff_id=schedule_data["staff_id"],
+                shift_date=schedule_data["shift_date"],
+                shift_type=schedule_data.get("shift_type", "morning"),
+                start_time=schedule_data["start_time"],
+                end_time=schedule_data["end_time"],
+                break_duration=schedule_data.get("break_duration", 30),
+                is_active=schedule_data.get("is_active", True),
+                assigned_service_id=schedule_data.get("assigned_service_id"),
+                notes=schedule_data.get("notes"),
+                created_by=created_by
+            ).returning(StaffSchedule)
+        )).scalar_one()
+
+    async def get_staff_schedule(self, db: AsyncSession, staff_id: int, start_date: datetime, end_date: datetime) -> List[StaffSchedule]:
         """Get staff schedule for a date range."""
-        return db.query(StaffSchedule).filter(
+        return (await db.execute(select(StaffSchedule).where(
             and_(
                 StaffSchedule.staff_id == staff_id,
                 StaffSchedule.shift_date >= start_date,
                 StaffSchedule.shift_date <= end_date,
                 StaffSchedule.is_active == True
             )
-        ).all()
+        ))).scalars().all()
 
-    def update_staff_performance(self, db: Session, staff_id: int, date: datetime, metrics: Dict[str, Any]) -> StaffPerformance:
-        """Update or create staff performance record."""
-        performance = db.query(StaffPerformance).filter(
+    async def update_staff_performance(self, db: AsyncSession, staff_id: int, date: datetime, metrics: Dict[str, Any]) -> StaffPerformance:
+        """Update or create staff performance record; callers invalidate cached stats after committing."""
+        performance = (await db.execute(select(StaffPerformance).where(
             and_(
                 StaffPerformance.staff_id == staff_id,
                 func.date(StaffPerformance.date) == date.date()
             )
-        ).first()
+        ).limit(1))).scalar_one_or_none()
 
         if performance:
             # Update existing record
@@ -147,66 +184,67 @@ class StaffService:
             )
             db.add(performance)
 
-        db.commit()
-        db.refresh(performance)
+        await db.flush()
+        await db.refresh(performance)
         return performance
 
-    def get_staff_performance(self, db: Session, staff_id: int, start_date: datetime, end_date: datetime) -> List[StaffPerformance]:
+    async def get_staff_performance(self, db: AsyncSession, staff_id: int, start_date: datetime, end_date: datetime) -> List[StaffPerformance]:
         """Get staff performance metrics for a date range."""
-        return db.query(StaffPerformance).filter(
+        return (await db.execute(select(StaffPerformance).where(
             and_(
                 StaffPerformance.staff_id == staff_id,
                 StaffPerformance.date >= start_date,
                 StaffPerformance.date <= end_date
             )
-        ).order_by(StaffPerformance.date).all()
+        ).order_by(StaffPerformance.date))).scalars().all()
 
-    def send_staff_message(self, db: Session, message_data: Dict[str, Any]) -> StaffCommunication:
+    async def send_staff_message(self, db: AsyncSession, message_data: Dict[str, Any]) -> StaffCommunication:
         """Send a message to staff member(s)."""
-        message = StaffCommunication(
-            sender_id=message_data["sender_id"],
-            recipient_id=message_data.get("recipient_id"),
-            subject=message_data["subject"],
-            message=message_data["message"],
-            message_type=message_data.get("message_type", "direct"),
-            priority=message_data.get("priority", "normal"),
-            department_filter=message_data.get("department_filter"),
-            role_filter=message_data.get("role_filter"),
-            expires_at=message_data.get("expires_at")
-        )
-
-        db.add(message)
-        db.commit()
-        db.refresh(message)
-        return message
-
-    def get_staff_messages(self, db: Session, user_id: int, unread_only: bool = False) -> List[StaffCommunication]:
-        """Get messages for a staff member."""
-        query = db.query(StaffCommunication).filter(
+        return (await db.execute(
+            insert(StaffCommunication).values(
+                sender_id=message_data["sender_id"],
+                recipient_id=message_data.get("recipient_id"),
+                subject=message_data["subject"],
+                message=message_data["message"],
+                message_type=message_data.get("message_type", "direct"),
+                priority=message_data.get("priority", "normal"),
+                department_filter=message_data.get("department_filter"),
+                role_filter=message_data.get("role_filter"),
+                expires_at=message_data.get("expires_at")
+            ).returning(StaffCommunication)
+        )).scalar_one()
+
+    async def get_staff_messages(self, db: AsyncSession, user_id: int, unread_only: bool = False) -> List[Row]:
+        """Get (message, sender_name) rows for a staff member; sender names are joined in the same query."""
+        department = await self._get_user_department(db, user_id)
+        role = await self._get_user_role(db, user_id)
+        query = select(StaffCommunication, User.name.label("sender_name")).outerjoin(
+            User, User.id == StaffCommunication.sender_id
+        ).where(
             or_(
                 StaffCommunication.recipient_id == user_id,
                 and_(
                     StaffCommunication.recipient_id.is_(None),
                     or_(
                         StaffCommunication.department_filter.is_(None),
-                        StaffCommunication.department_filter == self._get_user_department(db, user_id)
+                        StaffCommunication.department_filter == department
                     ),
                     or_(
                         StaffCommunication.role_filter.is_(None),
-                        StaffCommunication.role_filter == self._get_user_role(db, user_id)
+                        StaffCommunication.role_filter == role
                     )
                 )
             )
         )
 
         if unread_only:
-            query = query.filter(StaffCommunication.is_read == False)
+            query = query.where(StaffCommunication.is_read == False)
 
-        return query.order_by(StaffCommunication.created_at.desc()).all()
+        return (await db.execute(query.order_by(StaffCommunication.created_at.desc()))).all()
 
-    def mark_message_read(self, db: Session, message_id: int, user_id: int) -> bool:
+    async def mark_message_read(self, db: AsyncSession, message_id: int, user_id: int) -> bool:
         """Mark a message as read."""
-        message = db.query(StaffCommunication).filter(
+        message = (await db.execute(select(StaffCommunication).where(
             and_(
                 StaffCommunication.id == message_id,
                 or_(
@@ -214,66 +252,80 @@ class StaffService:
                     StaffCommunication.recipient_id.is_(None)
                 )
             )
-        ).first()
+        ).limit(1))).scalar_one_or_none()
 
         if message:
             message.is_read = True
             message.read_at = datetime.utcnow()
-            db.commit()
+            await db.flush()
             return True
         return False
 
-    def create_staff_task(self, db: Session, task_data: Dict[str, Any]) -> StaffTask:
+    async def create_staff_task(self, db: AsyncSession, task_data: Dict[str, Any]) -> StaffTask:
         """Create a task for staff member."""
-        task = StaffTask(
-            title=task_data["title"],
-            description=task_data.get("description"),
-            assigned_to=task_data["assigned_to"],
-            assigned_by=task_data["assigned_by"],
-            task_type=task_data.get("task_type", "other"),
-            priority=task_data.get("priority", "normal"),
-            status=task_data.get("status", "pending"),
-            due_date=task_data.get("due_date"),
-            estimated_hours=task_data.get("estimated_hours"),
-            department=task_data.get("department"),
-            service_id=task_data.get("service_id"),
-            patient_id=task_data.get("patient_id"),
-            notes=task_data.get("notes")
-        )
-
-        db.add(task)
-        db.commit()
-        db.refresh(task)
-        return task
-
-    def get_staff_tasks(self, db: Session, staff_id: int, status_filter: Optional[str] = None) -> List[StaffTask]:
-        """Get tasks assigned to a staff member."""
-        query = db.query(StaffTask).filter(StaffTask.assigned_to == staff_id)
+        return (await db.execute(
+            insert(StaffTask).values(
+                title=task_data["title"],
+                description=task_data.get("description"),
+                assigned_to=task_data["assigned_to"],
+                assigned_by=task_data["assigned_by"],
+                task_type=task_data.get("task_type", "other"),
+                priority=task_data.get("priority", "normal"),
+                status=task_data.get("status", "pending"),
+                due_date=task_data.get("due_date"),
+                estimated_hours=task_data.get("estimated_hours"),
+                department=task_data.get("department"),
+                service_id=task_data.get("service_id"),
+                patient_id=task_data.get("patient_id"),
+                notes=task_data.get("notes")
+            ).returning(StaffTask)
+        )).scalar_one()
+
+    async def get_staff_tasks(self, db: AsyncSession, staff_id: int, status_filter: Optional[str] = None) -> List[StaffTask]:
+        """Get tasks assigned to a staff member, with assigner names preloaded."""
+        query = select(StaffTask).options(
+            selectinload(StaffTask.assigner).load_only(User.name)
+        ).where(StaffTask.assigned_to == staff_id)
 
         if status_filter:
-            query = query.filter(StaffTask.status == status_filter)
+            query = query.where(StaffTask.status == status_filter)
 
-        return query.order_by(StaffTask.created_at.desc()).all()
+        return (await db.execute(query.order_by(StaffTask.created_at.desc()))).scalars().all()
 
-    def update_task_status(self, db: Session, task_id: int, status: str, staff_id: int) -> Optional[StaffTask]:
+    async def update_task_status(self, db: AsyncSession, task_id: int, status: str, staff_id: int) -> Optional[StaffTask]:
         """Update task status."""
-        task = db.query(StaffTask).filter(
+        task = (await db.execute(select(StaffTask).where(
             and_(
                 StaffTask.id == task_id,
                 StaffTask.assigned_to == staff_id
             )
-        ).first()
+        ).limit(1))).scalar_one_or_none()
 
         if task:
             task.status = status
             if status == "completed":
                 task.completed_at = datetime.utcnow()
             task.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(task)
+            await db.flush()
+            await db.refresh(task)
 
         return task
 
+    async def bulk_update_task_status(self, db: AsyncSession, task_ids: List[int], status: str, staff_id: int) -> int:
+        """Update the status of a staff member's tasks in one statement; returns the number updated."""
+        now = datetime.utcnow()
+        values = {"status": status, "updated_at": now}
+        if status == "completed":
+            values["completed_at"] = now
+
+        result = await db.execute(
+            update(StaffTask)
+            .where(StaffTask.id.in_(task_ids), StaffTask.assigned_to == staff_id)
+            .values(**values)
+        )
+        await db.flush()
+        return result.rowcount
+
     def get_system_settings(self, db: Session, category: Optional[str] = None) -> Dict[str, Any]:
         """Get system settings."""
         query = db.query(SystemSettings)
@@ -315,44 +367,70 @@ class StaffService:
         db.refresh(audit_log)
         return audit_log
 
-    def get_audit_logs(self, db: Session, filters: Dict[str, Any] = None, limit: int = 100) -> List[AuditLog]:
-        """Get audit logs with optional filters."""
-        query = db.query(AuditLog)
+    def audit_logs_query(self, filters: Dict[str, Any] = None, limit: int = 100) -> Select:
+        """
+        Newest-first audit log query with optional filters, selecting
+        only AUDIT_LOG_LIST_COLUMNS.
+
+        Pages are keyed on id: pass the smallest id of the previous page as
+        filters["before_id"] to get the next one.
+        """
+        query = select(*AUDIT_LOG_LIST_COLUMNS)
 
         if filters:
             if "user_id" in filters:
-                query = query.filter(AuditLog.user_id == filters["user_id"])
+                query = query.where(AuditLog.user_id == filters["user_id"])
             if "action" in filters:
-                query = query.filter(AuditLog.action == filters["action"])
+                query = query.where(AuditLog.action == filters["action"])
             if "resource_type" in filters:
-                query = query.filter(AuditLog.resource_type == filters["resource_type"])
+                query = query.where(AuditLog.resource_type == filters["resource_type"])
             if "start_date" in filters:
-                query = query.filter(AuditLog.timestamp >= filters["start_date"])
+                query = query.where(AuditLog.timestamp >= filters["start_date"])
             if "end_date" in filters:
-                query = query.filter(AuditLog.timestamp <= filters["end_date"])
+                query = query.where(AuditLog.timestamp <= filters["end_date"])
+            if "before_id" in filters:
+                query = query.where(AuditLog.id < filters["before_id"])
 
-        return query.order_by(AuditLog.timestamp.desc()).limit(limit).all()
+        return query.order_by(AuditLog.id.desc()).limit(limit)
 
-    def check_permission(self, db: Session, user_id: int, resource: str, action: str) -> bool:
+    async def get_audit_logs(self, db: AsyncSession, filters: Dict[str, Any] = None, limit: int = 100) -> List[Row]:
+        """Get audit log rows (AUDIT_LOG_LIST_COLUMNS) with optional filters."""
+        return (await db.execute(self.audit_logs_query(filters, limit))).all()
+
+    async def check_permission(self, db: AsyncSession, user_id: int, resource: str, action: str) -> bool:
         """Check if user has permission for an action on a resource."""
-        user = get_user_by_id(db, user_id)
+        user = await db.get(User, user_id)
         if not user:
             return False
+        return await self.role_allows(db, user.role, resource, action)
 
+    async def role_allows(self, db: AsyncSession, role: str, resource: str, action: str) -> bool:
+        """Check if a role has permission for an action on a resource."""
         # Admins have all permissions
-        if user.role == "admin":
+        if role == "admin":
             return True
 
+        cache_key = f"perm:{role}:{resource}:{action}"
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # Check role-based permissions
-        permission = db.query(RolePermission).filter(
+        permission = (await db.execute(select(RolePermission.allowed).where(
             and_(
-                RolePermission.role == user.role,
+                RolePermission.role == role,
                 RolePermission.resource == resource,
                 RolePermission.action == action
             )
-        ).first()
+        ).limit(1))).scalar_one_or_none()
+
+        allowed = bool(permission)
+        await response_cache.set(cache_key, allowed, PERMISSION_CACHE_TTL_SECONDS, tags=(PERMISSION_CACHE_TAG,))
+        return allowed
 
-        return permission.allowed if permission else False
+    async def invalidate_permissions(self) -> None:
+        """Drop cached role permission lookups after permissions change."""
+        await response_cache.invalidate_tag(PERMISSION_CACHE_TAG)
 
     def get_departments(self, db: Session, active_only: bool = True) -> List[Department]:
         """Get all departments."""
@@ -378,14 +456,14 @@ class StaffService:
         db.refresh(department)
         return department
 
-    def _get_user_department(self, db: Session, user_id: int) -> Optional[str]:
+    async def _get_user_department(self, db: AsyncSession, user_id: int) -> Optional[str]:
         """Get user's department."""
-        profile = self.get_staff_profile(db, user_id)
+        profile = await self.get_staff_profile(db, user_id)
         return profile.department if profile else None
 
-    def _get_user_role(self, db: Session, user_id: int) -> Optional[str]:
+    async def _get_user_role(self, db: AsyncSession, user_id: int) -> Optional[str]:
         """Get user's role."""
-        user = get_user_by_id(db, user_id)
+        user = await db.get(User, user_id)
         return user.role if user else None
 
     def _parse_setting_value(self, setting: SystemSettings) -> Any:
@@ -5,7 +5,7 @@ Simple version that matches the actual database models
 
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import random
 
 # Add backend to path
@@ -247,8 +247,8 @@ def main():
                     schedule = Schedule(
                         staff_id=staff.id,
                         day_of_week=day,
-                        start_time="08:00",
-                        end_time="17:00" if random.random() > 0.3 else "14:00",
+                        start_time=time(8, 0),
+                        end_time=time(17, 0) if random.random() > 0.3 else time(14, 0),
                         is_available=True
                     )
                     db.add(schedule)
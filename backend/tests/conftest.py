@@ -11,9 +11,12 @@ os.environ["RATE_LIMIT_ENABLED"] = "false"
 
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.database import Base, get_async_db, get_db
 from app.main import app
+from app.services.cache_service import response_cache
 from fastapi.testclient import TestClient
 
 # Test database URL
@@ -27,6 +30,13 @@ test_engine = create_engine(
 # Create test session
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# Async engine on the same test database for AsyncSession routes. NullPool keeps
+# connections from outliving the event loop of the TestClient that opened them.
+test_async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test_queue_management.db", poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(test_async_engine, expire_on_commit=False)
+
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test."""
@@ -58,7 +68,14 @@ def client():
         finally:
             db.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Cached responses from a previous module's database must not leak into this one
+    response_cache.clear_local()
 
     with TestClient(app) as test_client:
         yield test_client
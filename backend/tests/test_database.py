@@ -0,0 +1,37 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import _async_engine_options, configure_sqlite_engine
+
+
+def test_sqlite_connections_use_wal(tmp_path):
+    """Test that configured SQLite engines open connections in WAL mode."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    configure_sqlite_engine(engine)
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+    engine.dispose()
+
+
+def test_async_sqlite_engine_is_pooled_with_wal(tmp_path):
+    """Test that the aiosqlite engine keeps pooled connections configured for WAL."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'async_wal.db'}"
+    async_engine = create_async_engine(url, **_async_engine_options(url))
+    configure_sqlite_engine(async_engine.sync_engine)
+
+    async def check():
+        async with async_engine.connect() as conn:
+            mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+        checked_in = async_engine.pool.checkedin()
+        await async_engine.dispose()
+        return mode, checked_in
+
+    mode, checked_in = asyncio.run(check())
+    assert mode == "wal"
+    # The connection went back to the pool instead of being closed
+    assert checked_in == 1
@@ -1,4 +1,6 @@
 import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from app.models.models import Service, QueueEntry
@@ -261,4 +263,254 @@ def test_priority_queue_ordering(client: TestClient, db: Session):
     if urgent_positions:
         min_urgent_pos = min(p["position"] for p in urgent_positions)
         max_normal_pos = max((p["position"] for p in normal_positions), default=float('inf'))
-        assert min_urgent_pos < max_normal_pos
\ No newline at end of file
+        assert min_urgent_pos < max_normal_pos
+
+def test_join_queue_unknown_service(client: TestClient, db: Session):
+    """Test joining a queue for a service that does not exist."""
+    queue_data = {
+        "service_id": 999999,
+        "patient_name": "Ghost Patient",
+        "patient_email": "ghost@example.com",
+        "priority": "normal"
+    }
+
+    response = client.post("/api/queue/join", json=queue_data)
+    assert response.status_code == 404
+
+def test_join_queue_assigns_sequential_numbers(client: TestClient, db: Session):
+    """Test that consecutive joins receive increasing queue numbers."""
+    service_data = {
+        "name": "Dermatology",
+        "description": "Skin care",
+        "department": "Dermatology",
+        "estimated_wait_time": 20
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    numbers = []
+    for i in range(2):
+        queue_data = {
+            "service_id": service_id,
+            "patient_name": f"Derm Patient {i+1}",
+            "patient_email": f"derm{i+1}@example.com",
+            "priority": "normal"
+        }
+        response = client.post("/api/queue/join", json=queue_data)
+        assert response.status_code == 200
+        numbers.append(response.json()["queue_number"])
+
+    assert numbers[1] == numbers[0] + 1
+
+def test_join_queue_reuses_existing_patient(client: TestClient, db: Session):
+    """Test that joining twice with the same email reuses the patient record."""
+    service_data = {
+        "name": "Radiology",
+        "description": "Imaging services",
+        "department": "Radiology",
+        "estimated_wait_time": 25
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    queue_data = {
+        "service_id": service_id,
+        "patient_name": "Repeat Patient",
+        "patient_email": "repeat@example.com",
+        "priority": "normal"
+    }
+    assert client.post("/api/queue/join", json=queue_data).status_code == 200
+    assert client.post("/api/queue/join", json=queue_data).status_code == 200
+
+    response = client.get(f"/api/queue/service/{service_id}")
+    patient_ids = {entry["patient_id"] for entry in response.json()}
+    assert len(patient_ids) == 1
+
+def test_join_queue_increments_service_queue_length(client: TestClient, db: Session):
+    """Test that each join increments the service queue length."""
+    service_data = {
+        "name": "Neurology",
+        "description": "Brain and nerve care",
+        "department": "Neurology",
+        "estimated_wait_time": 35
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    for i in range(3):
+        queue_data = {
+            "service_id": service_id,
+            "patient_name": f"Neuro Patient {i+1}",
+            "patient_email": f"neuro{i+1}@example.com",
+            "priority": "normal"
+        }
+        client.post("/api/queue/join", json=queue_data)
+
+    response = client.get(f"/api/services/{service_id}")
+    assert response.json()["queue_length"] == 3
+
+def test_join_queue_refreshes_cached_service(client: TestClient, db: Session):
+    """Test that a cached service detail picks up the new queue length after a join."""
+    service_data = {
+        "name": "Oncology",
+        "description": "Cancer care",
+        "department": "Oncology",
+        "estimated_wait_time": 40
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    before = client.get(f"/api/services/{service_id}")
+    assert before.json()["queue_length"] == 0
+
+    queue_data = {
+        "service_id": service_id,
+        "patient_name": "Onco Patient",
+        "patient_email": "onco@example.com",
+        "priority": "normal"
+    }
+    assert client.post("/api/queue/join", json=queue_data).status_code == 200
+
+    after = client.get(f"/api/services/{service_id}", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.json()["queue_length"] == 1
+
+def test_predict_wait_time_reuses_hourly_prediction():
+    """Test that model predictions are cached per service, priority and hour."""
+    from app.routes import queue as queue_routes
+
+    predictor = MagicMock()
+    predictor.predict_wait_time.return_value = MagicMock(predicted_wait_time=40)
+    service = Service(id=4242, name="Cardiology", current_wait_time=30)
+
+    with patch.object(queue_routes, "wait_time_predictor", predictor), \
+         patch.dict(queue_routes._prediction_cache, clear=True):
+        first = queue_routes.predict_wait_time(service, "high")
+        second = queue_routes.predict_wait_time(service, "high")
+        queue_routes.predict_wait_time(service, "low")
+
+    assert first == second == 28
+    assert predictor.predict_wait_time.call_count == 2
+
+def test_service_queue_positions(client: TestClient, db: Session):
+    """Test that service queue positions count only waiting patients ahead."""
+    service_data = {
+        "name": "Ophthalmology",
+        "description": "Eye care",
+        "department": "Ophthalmology",
+        "estimated_wait_time": 15
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    for i in range(3):
+        queue_data = {
+            "service_id": service_id,
+            "patient_name": f"Eye Patient {i+1}",
+            "patient_email": f"eye{i+1}@example.com",
+            "priority": "normal"
+        }
+        client.post("/api/queue/join", json=queue_data)
+
+    response = client.get(f"/api/queue/service/{service_id}")
+    assert [entry["position"] for entry in response.json()] == [1, 2, 3]
+
+    client.post("/api/queue/call-next", json={"service_id": service_id, "counter_name": "Counter B"})
+
+    response = client.get(f"/api/queue/service/{service_id}")
+    entries = response.json()
+    waiting = [entry["position"] for entry in entries if entry["status"] == "waiting"]
+    assert waiting == [1, 2]
+
+def test_queue_status_position_updates_after_call(client: TestClient, db: Session):
+    """Test that stored positions move up when a patient ahead is called."""
+    service_data = {
+        "name": "Urology",
+        "description": "Urinary care",
+        "department": "Urology",
+        "estimated_wait_time": 20
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    joined = []
+    for i in range(3):
+        queue_data = {
+            "service_id": service_id,
+            "patient_name": f"Uro Patient {i+1}",
+            "patient_email": f"uro{i+1}@example.com",
+            "priority": "normal"
+        }
+        joined.append(client.post("/api/queue/join", json=queue_data).json())
+
+    assert [entry["position"] for entry in joined] == [1, 2, 3]
+
+    client.post("/api/queue/call-next", json={"service_id": service_id, "counter_name": "Counter C"})
+    client.put(f"/api/queue/{joined[1]['id']}/status", json={"status": "completed"})
+
+    response = client.get(f"/api/queue/status/{joined[2]['queue_number']}")
+    assert response.json()["position"] == 1
+
+def test_completing_entry_sets_completed_at(client: TestClient, db: Session):
+    """Test that completing an entry stamps completed_at in UTC."""
+    service_data = {
+        "name": "Physiotherapy",
+        "description": "Physical therapy",
+        "department": "Physiotherapy",
+        "estimated_wait_time": 30
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    queue_data = {
+        "service_id": service_id,
+        "patient_name": "Physio Patient",
+        "patient_email": "physio@example.com",
+        "priority": "normal"
+    }
+    entry_id = client.post("/api/queue/join", json=queue_data).json()["id"]
+
+    response = client.put(f"/api/queue/{entry_id}/status", json={"status": "completed"})
+    assert response.status_code == 200
+
+    entry = db.get(QueueEntry, entry_id)
+    assert entry.status == "completed"
+    assert entry.created_at <= entry.completed_at <= datetime.utcnow()
+
+def test_call_next_patient_order_and_empty_queue(client: TestClient, db: Session):
+    """Test that call-next pops patients in arrival order and 404s when empty."""
+    service_data = {
+        "name": "Dental",
+        "description": "Dental care",
+        "department": "Dental",
+        "estimated_wait_time": 20
+    }
+
+    service_response = client.post("/api/services/", json=service_data)
+    service_id = service_response.json()["id"]
+
+    joined = []
+    for i in range(2):
+        queue_data = {
+            "service_id": service_id,
+            "patient_name": f"Dental Patient {i+1}",
+            "patient_email": f"dental{i+1}@example.com",
+            "priority": "normal"
+        }
+        joined.append(client.post("/api/queue/join", json=queue_data).json())
+
+    call_data = {"service_id": service_id, "counter_name": "Counter D"}
+    called = [client.post("/api/queue/call-next", json=call_data).json() for _ in range(2)]
+
+    assert [c["called_patient"]["id"] for c in called] == [j["id"] for j in joined]
+    assert all(c["called_patient"]["status"] == "called" for c in called)
+
+    response = client.post("/api/queue/call-next", json=call_data)
+    assert response.status_code == 404
@@ -0,0 +1,269 @@
+from fastapi.testclient import TestClient
+
+
+def _current_user_id(api_client: TestClient) -> int:
+    response = api_client.get("/api/auth/me")
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_get_available_slots_without_schedules(admin_client: TestClient):
+    """Test that a day with no schedules yields an empty slot list."""
+    # Runs before any schedules are created in this module's database
+    response = admin_client.get("/api/scheduling/available/1", params={"date": "2025-01-06"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_create_schedule(admin_client: TestClient):
+    """Test creating a schedule for a staff member."""
+    staff_id = _current_user_id(admin_client)
+
+    schedule_data = {
+        "staff_id": staff_id,
+        "day_of_week": 0,
+        "start_time": "09:00:00",
+        "end_time": "11:00:00"
+    }
+
+    response = admin_client.post("/api/scheduling/", json=schedule_data)
+    assert response.status_code == 200
+
+    schedule = response.json()["schedule"]
+    assert schedule["staff_id"] == staff_id
+    assert schedule["day_of_week"] == 0
+    assert schedule["start_time"] == "09:00:00"
+    assert schedule["end_time"] == "11:00:00"
+    assert schedule["is_available"] is True
+
+
+def test_create_schedule_unknown_staff(admin_client: TestClient):
+    """Test that scheduling a non-existent staff member returns 404."""
+    schedule_data = {
+        "staff_id": 999999,
+        "day_of_week": 1,
+        "start_time": "09:00:00",
+        "end_time": "10:00:00"
+    }
+
+    response = admin_client.post("/api/scheduling/", json=schedule_data)
+    assert response.status_code == 404
+
+
+def test_create_schedule_for_patient(auth_client: TestClient):
+    """Test that a patient cannot be given a staff schedule."""
+    patient_id = _current_user_id(auth_client)
+
+    schedule_data = {
+        "staff_id": patient_id,
+        "day_of_week": 1,
+        "start_time": "09:00:00",
+        "end_time": "10:00:00"
+    }
+
+    response = auth_client.post("/api/scheduling/", json=schedule_data)
+    assert response.status_code == 404
+
+def test_get_staff_schedule(admin_client: TestClient):
+    """Test listing the schedules of a staff member."""
+    staff_id = _current_user_id(admin_client)
+
+    for day in (2, 3):
+        admin_client.post("/api/scheduling/", json={
+            "staff_id": staff_id,
+            "day_of_week": day,
+            "start_time": "08:00:00",
+            "end_time": "12:00:00"
+        })
+
+    response = admin_client.get(f"/api/scheduling/staff/{staff_id}")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert isinstance(data, list)
+    assert {entry["day_of_week"] for entry in data} == {2, 3}
+    for entry in data:
+        assert entry["start_time"] == "08:00:00"
+        assert entry["end_time"] == "12:00:00"
+        assert entry["is_available"] is True
+        assert entry["created_at"] is not None
+
+
+def test_update_schedule(admin_client: TestClient):
+    """Test updating a schedule's availability and hours."""
+    staff_id = _current_user_id(admin_client)
+
+    create_response = admin_client.post("/api/scheduling/", json={
+        "staff_id": staff_id,
+        "day_of_week": 4,
+        "start_time": "09:00:00",
+        "end_time": "17:00:00"
+    })
+    schedule_id = create_response.json()["schedule"]["id"]
+
+    response = admin_client.put(f"/api/scheduling/{schedule_id}", json={
+        "end_time": "13:00:00",
+        "is_available": False
+    })
+    assert response.status_code == 200
+
+    schedule = response.json()["schedule"]
+    assert schedule["end_time"] == "13:00:00"
+    assert schedule["is_available"] is False
+
+
+def test_get_available_slots(admin_client: TestClient):
+    """Test that 30-minute slots are generated from schedules for the date."""
+    staff_id = _current_user_id(admin_client)
+
+    admin_client.post("/api/scheduling/", json={
+        "staff_id": staff_id,
+        "day_of_week": 5,
+        "start_time": "10:00:00",
+        "end_time": "11:30:00"
+    })
+
+    # 2025-01-04 is a Saturday (day_of_week 5)
+    response = admin_client.get("/api/scheduling/available/1", params={"date": "2025-01-04"})
+    assert response.status_code == 200
+
+    slots = [slot for slot in response.json() if slot.get("staff_id") == staff_id]
+    assert [(slot["start_time"], slot["end_time"]) for slot in slots] == [
+        ("10:00", "10:30"),
+        ("10:30", "11:00"),
+        ("11:00", "11:30"),
+    ]
+    assert all(slot["staff_name"] == "Test Admin User" for slot in slots)
+
+
+def test_get_available_slots_invalid_date(admin_client: TestClient):
+    """Test that a malformed date is rejected."""
+    response = admin_client.get("/api/scheduling/available/1", params={"date": "04/01/2025"})
+    assert response.status_code == 400
+
+
+def test_available_slots_refresh_after_schedule_change(admin_client: TestClient):
+    """Test that cached slot listings are invalidated by schedule writes."""
+    staff_id = _current_user_id(admin_client)
+    params = {"date": "2025-01-05"}  # Sunday (day_of_week 6)
+
+    admin_client.get("/api/scheduling/available/1", params=params)
+
+    admin_client.post("/api/scheduling/", json={
+        "staff_id": staff_id,
+        "day_of_week": 6,
+        "start_time": "14:00:00",
+        "end_time": "15:00:00"
+    })
+
+    response = admin_client.get("/api/scheduling/available/1", params=params)
+    slots = [slot for slot in response.json() if slot.get("staff_id") == staff_id]
+    assert [slot["start_time"] for slot in slots] == ["14:00", "14:30"]
+
+
+def test_create_schedules_bulk(admin_client: TestClient):
+    """Test creating a week of schedules in one request."""
+    staff_id = _current_user_id(admin_client)
+
+    week = [
+        {"staff_id": staff_id, "day_of_week": day, "start_time": "08:00:00", "end_time": "16:00:00"}
+        for day in range(7)
+    ]
+
+    response = admin_client.post("/api/scheduling/bulk", json=week)
+    assert response.status_code == 200
+
+    created = response.json()["schedules"]
+    assert len(created) == 7
+    assert [s["day_of_week"] for s in created] == list(range(7))
+    assert all(s["staff_id"] == staff_id for s in created)
+    assert all(s["id"] for s in created)
+
+
+def test_create_schedules_bulk_unknown_staff(admin_client: TestClient):
+    """Test that a bulk request naming an unknown staff member creates nothing."""
+    staff_id = _current_user_id(admin_client)
+
+    batch = [
+        {"staff_id": staff_id, "day_of_week": 0, "start_time": "08:00:00", "end_time": "16:00:00"},
+        {"staff_id": 999999, "day_of_week": 1, "start_time": "08:00:00", "end_time": "16:00:00"}
+    ]
+
+    response = admin_client.post("/api/scheduling/bulk", json=batch)
+    assert response.status_code == 404
+
+    schedules = admin_client.get(f"/api/scheduling/staff/{staff_id}").json()
+    assert schedules == []
+
+
+def test_get_staff_schedule_permissions(admin_client: TestClient, auth_client: TestClient):
+    """Test that patients may only view their own schedule."""
+    staff_id = _current_user_id(admin_client)
+    patient_id = _current_user_id(auth_client)
+
+    response = auth_client.get(f"/api/scheduling/staff/{staff_id}")
+    assert response.status_code == 403
+
+    response = auth_client.get(f"/api/scheduling/staff/{patient_id}")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_scheduling_requires_authentication(client: TestClient):
+    """Test that scheduling endpoints reject anonymous requests."""
+    response = client.get("/api/scheduling/available/1", params={"date": "2025-01-06"})
+    assert response.status_code == 401
+
+
+def test_large_slot_listing_is_gzipped(admin_client: TestClient):
+    """Test that large JSON responses are gzip-compressed when the client accepts it."""
+    staff_id = _current_user_id(admin_client)
+
+    admin_client.post("/api/scheduling/", json={
+        "staff_id": staff_id,
+        "day_of_week": 4,
+        "start_time": "00:00:00",
+        "end_time": "23:30:00"
+    })
+
+    # 2025-01-03 is a Friday (day_of_week 4)
+    response = admin_client.get(
+        "/api/scheduling/available/1",
+        params={"date": "2025-01-03"},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) >= 47
+
+
+def test_get_staff_schedule_unknown_staff(admin_client: TestClient):
+    """Test that listing schedules of a non-existent staff member returns 404."""
+    response = admin_client.get("/api/scheduling/staff/999999")
+    assert response.status_code == 404
+
+
+def test_local_response_cache_is_bounded():
+    """Test that the in-process cache evicts least recently used and expired keys with their tags."""
+    import asyncio
+    from app.services import cache_service
+
+    async def scenario():
+        cache = cache_service.ResponseCache(max_entries=2)
+        await cache.set("slots:1:2025-01-06", [1], 30, tags=("slots:day:0",))
+        await cache.set("slots:2:2025-01-06", [2], 30, tags=("slots:day:0",))
+        assert await cache.get("slots:1:2025-01-06") == [1]
+        await cache.set("slots:3:2025-01-07", [3], 30, tags=("slots:day:1",))
+
+        # slots:2 was least recently used
+        assert await cache.get("slots:2:2025-01-06") is None
+        assert cache._local_tags == {"slots:day:0": {"slots:1:2025-01-06"}, "slots:day:1": {"slots:3:2025-01-07"}}
+
+        # Expired keys are swept by the next write even if never read again
+        await cache.set("slots:4:2025-01-08", [4], -1, tags=("slots:day:2",))
+        cache._next_sweep = 0.0
+        await cache.set("slots:5:2025-01-08", [5], 30, tags=("slots:day:2",))
+        assert "slots:4:2025-01-08" not in cache._local
+        assert cache._local_tags["slots:day:2"] == {"slots:5:2025-01-08"}
+        assert len(cache._local) == 2
+
+    asyncio.run(scenario())
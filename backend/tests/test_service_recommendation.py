@@ -0,0 +1,325 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import orjson
+from fastapi.responses import ORJSONResponse
+import pytest
+
+from app.routes import service_recommendation
+from app.routes.service_recommendation import (
+    InferenceBatcher,
+    IntelligentServiceRecommender,
+    ServiceRecommendationRequest,
+    recommender,
+)
+
+
+class _StubVectorizer:
+    def transform(self, texts):
+        return [[len(text)] for text in texts]
+
+
+class _StubClassifier:
+    """Fixed probabilities over four departments; counts model calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, rows):
+        self.calls += 1
+        return np.array([[0.1, 0.6, 0.2, 0.1]] * len(rows))
+
+
+class _StubEncoder:
+    classes_ = np.array(["Cardiology", "Neurology", "Orthopedics", "Radiology"])
+
+
+def _recommender_with_stub_model():
+    stub = IntelligentServiceRecommender()
+    stub.symptom_classifier = _StubClassifier()
+    stub.tfidf_vectorizer = _StubVectorizer()
+    stub.department_encoder = _StubEncoder()
+    stub._model_ready = True
+    return stub
+
+
+def test_scan_terms_finds_overlapping_phrases():
+    """Test that nested phrases like 'chest' and 'chest pain' are both found."""
+    found = recommender._scan_terms("chest pain and shortness of breath")
+    assert found == {"chest", "chest pain", "shortness of breath"}
+
+
+def test_scan_terms_requires_word_start():
+    """Test that phrases are not matched in the middle of unrelated words."""
+    # "ct" must not match inside "doctor" or "infection"
+    assert recommender._scan_terms("my doctor suspects an infection") == set()
+    # ...but a phrase may run into a longer word
+    assert "seizure" in recommender._scan_terms("seizures at night")
+
+
+def test_department_matches_keep_knowledge_base_order():
+    """Test that matches are grouped per department in knowledge base order."""
+    found = recommender._scan_terms("chest pain and shortness of breath")
+    matches = recommender._department_matches(found)
+
+    assert list(matches) == ["Emergency", "Cardiology"]
+    assert matches["Cardiology"] == (["chest"], ["chest pain", "shortness of breath"])
+
+
+def test_apply_medical_rules():
+    """Test the rule-based department selection."""
+    assert recommender._apply_medical_rules("severe headache")["method"] == "emergency_rule"
+
+    rule = recommender._apply_medical_rules("knee pain after a fall")
+    assert rule["department"] == "Orthopedics"
+    assert rule["confidence"] == 0.8
+
+    assert recommender._apply_medical_rules("feeling tired")["department"] == "Internal Medicine"
+
+
+def test_recommend_service_rule_based():
+    """Test a full recommendation without the ML model."""
+    result = recommender.recommend_service(
+        ServiceRecommendationRequest(symptoms="  Routine CHECKUP  ")
+    )
+
+    assert result.recommended_department == "Internal Medicine"
+    assert result.symptoms_analyzed == "routine checkup"
+    assert result.reasoning == "Recommended Internal Medicine based on symptoms: checkup, routine"
+
+
+def test_recommend_service_is_cached():
+    """Test that repeated symptom strings reuse the cached recommendation."""
+    recommender._recommend_cached.cache_clear()
+    request = ServiceRecommendationRequest(symptoms="Knee pain", age_group="adult")
+
+    first = recommender.recommend_service(request)
+    second = recommender.recommend_service(ServiceRecommendationRequest(symptoms="knee pain ", age_group="adult"))
+    third = recommender.recommend_service(ServiceRecommendationRequest(symptoms="KNEE \t  pain", age_group="adult"))
+
+    info = recommender._recommend_cached.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+    assert third.symptoms_analyzed == "knee pain"
+    assert second.recommended_department == first.recommended_department == "Orthopedics"
+    assert second.alternative_departments == first.alternative_departments
+
+
+def test_inference_batcher_coalesces_concurrent_calls():
+    """Test that calls queued while a batch runs are served by one batched call."""
+    release = threading.Event()
+    batches = []
+
+    def predict_batch(texts):
+        batches.append(list(texts))
+        if len(batches) == 1:
+            release.wait(5)  # hold the first batch so the others queue up
+        return [text.upper() for text in texts]
+
+    batcher = InferenceBatcher(predict_batch)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(batcher.predict, "a")
+        while not batches:
+            time.sleep(0.001)
+        rest = [pool.submit(batcher.predict, text) for text in "bcd"]
+        while batcher._queue.qsize() < 3:
+            time.sleep(0.001)
+        release.set()
+
+        assert first.result(timeout=5) == "A"
+        assert sorted(future.result(timeout=5) for future in rest) == ["B", "C", "D"]
+
+    assert batches[0] == ["a"]
+    assert sorted(batches[1]) == ["b", "c", "d"]
+
+
+def test_inference_batcher_propagates_errors():
+    """Test that a failing batch raises in every waiting caller."""
+    def predict_batch(texts):
+        raise ValueError("model failure")
+
+    batcher = InferenceBatcher(predict_batch)
+    with pytest.raises(ValueError, match="model failure"):
+        batcher.predict("a")
+
+
+def test_ml_inference_runs_once_per_recommendation():
+    """Test that the ML probabilities are shared by the primary and alternative picks."""
+    stub = _recommender_with_stub_model()
+
+    result = stub.recommend_service(ServiceRecommendationRequest(symptoms="feeling dizzy and tired"))
+
+    assert stub.symptom_classifier.calls == 1
+    assert result.recommended_department == "Neurology"
+    assert result.recommendation_method == "ml"
+    assert result.alternative_departments == [
+        {"department": "Orthopedics", "confidence": 0.2},
+        {"department": "Cardiology", "confidence": 0.1},
+        {"department": "Radiology", "confidence": 0.1},
+    ]
+
+
+def test_department_scores_weight_keywords_and_symptoms():
+    """Test that per-department rule scores sum keyword and symptom weights."""
+    found = recommender._scan_terms("chest pain and shortness of breath")
+    scores = dict(zip(recommender._dept_names, recommender._department_scores(found)))
+    keyword_scores = dict(zip(recommender._dept_names, recommender._department_scores(found, keywords_only=True)))
+
+    assert scores["Cardiology"] == pytest.approx(0.1 + 0.2 + 0.2)
+    assert keyword_scores["Cardiology"] == pytest.approx(0.1)
+    assert scores["Orthopedics"] == 0
+
+
+def test_automaton_scan_matches_regex_scan():
+    """Test that the Aho-Corasick scanner finds the same phrases as the regex fallback."""
+    pytest.importorskip("ahocorasick")
+    regex_only = IntelligentServiceRecommender()
+    regex_only._term_automaton = None
+
+    for text in ("chest pain and shortness of breath", "my doctor suspects an infection", "seizures at night"):
+        assert recommender._scan_terms(text) == regex_only._scan_terms(text)
+
+
+def test_recommend_endpoint_uses_process_pool(monkeypatch):
+    """Test that the endpoint can run inference in a worker process."""
+    monkeypatch.setattr(service_recommendation, "RECOMMENDER_PROCESS_WORKERS", 1)
+    try:
+        result = asyncio.run(service_recommendation.recommend_service(
+            ServiceRecommendationRequest(symptoms="knee pain")
+        ))
+        assert service_recommendation._process_pool is not None
+        assert result.recommended_department == "Orthopedics"
+    finally:
+        asyncio.run(service_recommendation.shutdown_process_pool())
+
+
+def test_numpy_tfidf_transform_matches_vectorizer():
+    """Test that the NumPy TF-IDF transform reproduces the fitted vectorizer."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    corpus = ["chest pain and fever", "knee pain after a fall", "severe headache and fever", "chest pressure"]
+    queries = ["fever with chest pain", "knee knee pain", "nothing known", ""]
+    stub = IntelligentServiceRecommender()
+
+    for options in ({}, {"sublinear_tf": True, "norm": "l1"}):
+        vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), **options).fit(corpus)
+        stub._tfidf_params = stub._export_tfidf(vectorizer)
+
+        expected = vectorizer.transform(queries).toarray()
+        np.testing.assert_allclose(stub._tfidf_transform(queries), expected)
+
+    for options in ({"binary": True}, {"tokenizer": str.split}, {"analyzer": "char"}, {"use_idf": False}):
+        vectorizer = TfidfVectorizer(**options).fit(corpus)
+        assert stub._export_tfidf(vectorizer) is None
+
+
+def test_model_status_reloads_results_only_when_files_change(tmp_path, monkeypatch):
+    """Test that the model status snapshot is cached until a model file's mtime changes."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "models").mkdir()
+    for path in (service_recommendation.MODEL_PATH, service_recommendation.VECTORIZER_PATH,
+                 service_recommendation.ENCODER_PATH):
+        (tmp_path / path).write_bytes(b"")
+    joblib.dump({"model_performance": {"accuracy": 0.9}, "dataset_size": 10}, service_recommendation.RESULTS_PATH)
+    service_recommendation._model_files_snapshot.cache_clear()
+
+    status = service_recommendation._model_status()
+    assert status["model_available"] is True
+    assert status["accuracy"] == 0.9
+    service_recommendation._model_status()
+    assert service_recommendation._model_files_snapshot.cache_info().hits == 1
+
+    joblib.dump({"model_performance": {"accuracy": 0.95}, "dataset_size": 12}, service_recommendation.RESULTS_PATH)
+    os.utime(service_recommendation.RESULTS_PATH, ns=(1, 1))
+    assert service_recommendation._model_status()["accuracy"] == 0.95
+
+
+def test_static_listings_are_preserialized():
+    """Test that the department and keyword listings are served from prebuilt JSON."""
+    departments = asyncio.run(service_recommendation.get_all_departments())
+    keywords = asyncio.run(service_recommendation.get_symptom_keywords())
+
+    assert departments.media_type == keywords.media_type == "application/json"
+    assert orjson.loads(departments.body) == recommender.get_all_departments()
+    assert orjson.loads(keywords.body)["total_departments"] == len(recommender.department_specialties)
+
+
+def test_recommend_endpoint_serializes_with_orjson():
+    """Test that /recommend responds through ORJSONResponse."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.include_router(service_recommendation.router, prefix="/api/service-recommendation")
+    response = TestClient(app).post("/api/service-recommendation/recommend", json={"symptoms": "knee pain"})
+
+    assert response.status_code == 200
+    assert response.json()["recommended_department"] == "Orthopedics"
+    route = next(route for route in app.routes if route.path.endswith("/recommend"))
+    assert route.response_class is ORJSONResponse
+
+
+def test_timestamp_is_reused_within_resolution(monkeypatch):
+    """Test that response timestamps are only reformatted once per resolution window."""
+    clock = [1000.0]
+    monkeypatch.setattr(service_recommendation, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    monkeypatch.setattr(service_recommendation, "_timestamp_cache", (float("-inf"), ""))
+
+    first = service_recommendation._now_iso()
+    clock[0] += service_recommendation.TIMESTAMP_RESOLUTION_SECONDS / 2
+    assert service_recommendation._now_iso() is first
+
+    time.sleep(0.001)
+    clock[0] += service_recommendation.TIMESTAMP_RESOLUTION_SECONDS
+    assert service_recommendation._now_iso() > first
+
+
+def test_alternatives_take_next_most_likely_classes():
+    """Test that ML alternatives are the next most likely classes among many, primary excluded."""
+    classes = [f"Dept {i}" for i in range(10)]
+    probs = [0.02, 0.05, 0.3, 0.01, 0.12, 0.2, 0.04, 0.12, 0.1, 0.04]
+    ml_recommendation = {"classes": classes, "all_probs": probs}
+
+    alternatives = recommender._get_alternative_departments("", "Dept 2", set(), ml_recommendation)
+    assert alternatives == [
+        {"department": "Dept 5", "confidence": 0.2},
+        {"department": "Dept 4", "confidence": 0.12},
+        {"department": "Dept 7", "confidence": 0.12},
+    ]
+
+    # A rule-based primary that is not the ML favourite is skipped too
+    alternatives = recommender._get_alternative_departments("", "Dept 5", set(), ml_recommendation)
+    assert [alt["department"] for alt in alternatives] == ["Dept 4", "Dept 7"]
+
+
+def test_emergency_skips_ml_inference():
+    """Test that emergency keywords short-circuit before the model is called."""
+    stub = _recommender_with_stub_model()
+
+    result = stub.recommend_service(ServiceRecommendationRequest(symptoms="Severe headache after a fall"))
+
+    assert stub.symptom_classifier.calls == 0
+    assert result.recommended_department == "Emergency"
+    assert result.recommendation_method == "emergency_rule"
+
+
+def test_model_loads_once_on_first_use(monkeypatch):
+    """Test that the model is loaded lazily, once, even under concurrent first requests."""
+    loads = []
+    monkeypatch.setattr(IntelligentServiceRecommender, "_load_model", lambda self: loads.append(time.sleep(0.05)))
+
+    lazy = IntelligentServiceRecommender()
+    assert loads == []
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(
+            lazy.recommend_service, [ServiceRecommendationRequest(symptoms="knee pain")] * 4
+        ))
+
+    assert len(loads) == 1
+    assert {result.recommended_department for result in results} == {"Orthopedics"}
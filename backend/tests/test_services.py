@@ -18,6 +18,8 @@ def test_create_service(client: TestClient):
     assert data["name"] == service_data["name"]
     assert data["department"] == service_data["department"]
     assert data["estimated_wait_time"] == service_data["estimated_wait_time"]
+    assert data["staff_count"] == 1
+    assert data["queue_length"] == 0
 
 def test_get_all_services(client: TestClient):
     """Test getting all services."""
@@ -65,6 +67,7 @@ def test_get_service_by_id(client: TestClient):
     data = response.json()
     assert data["id"] == service_id
     assert data["name"] == service_data["name"]
+    assert data["counters"] == []
 
 def test_get_service_counters(client: TestClient):
     """Test getting counters for a service."""
@@ -85,6 +88,30 @@ def test_get_service_counters(client: TestClient):
     assert isinstance(data, list)
     # Should return counters associated with this service
 
+def test_get_service_includes_counters(client: TestClient):
+    """Test that a service's counters are returned inline with the service."""
+    from app.models.models import ServiceCounter
+    from tests.conftest import TestingSessionLocal
+
+    create_response = client.post("/api/services/", json={
+        "name": "Triage",
+        "description": "Initial assessment",
+        "department": "Emergency",
+        "estimated_wait_time": 10
+    })
+    service_id = create_response.json()["id"]
+
+    with TestingSessionLocal() as session:
+        session.add_all([
+            ServiceCounter(name="Desk 1", service_id=service_id),
+            ServiceCounter(name="Desk 2", service_id=service_id, staff_member="Nurse Joy")
+        ])
+        session.commit()
+
+    counters = client.get(f"/api/services/{service_id}").json()["counters"]
+    assert [counter["name"] for counter in counters] == ["Desk 1", "Desk 2"]
+    assert counters[1]["staff_member"] == "Nurse Joy"
+
 def test_service_not_found(client: TestClient):
     """Test getting a non-existent service."""
     response = client.get("/api/services/99999")
@@ -485,3 +512,40 @@ def test_update_checkin_status(admin_client: TestClient):
 
     data = response.json()
     assert data["status"] == "no_show"
+
+def test_get_services_pagination(client: TestClient):
+    """Test limit/offset paging of the services listing."""
+    everything = client.get("/api/services/").json()
+    assert len(everything) >= 2
+
+    page = client.get("/api/services/", params={"limit": 1, "offset": 1}).json()
+    assert [service["id"] for service in page] == [everything[1]["id"]]
+
+def test_get_services_etag(client: TestClient):
+    """Test that an unchanged listing is answered with 304 and refreshed after a write."""
+    response = client.get("/api/services/")
+    etag = response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+
+    response = client.get("/api/services/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post("/api/services/", json={
+        "name": "Cardiology",
+        "description": "Heart care",
+        "department": "Cardiology",
+        "estimated_wait_time": 30
+    })
+    response = client.get("/api/services/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert any(service["name"] == "Cardiology" for service in response.json())
+
+def test_services_listing_without_trailing_slash(client: TestClient):
+    """Test that the slash-less alias serves the listing but is left out of the schema."""
+    response = client.get("/api/services")
+    assert response.status_code == 200
+    assert response.json() == client.get("/api/services/").json()
+
+    paths = client.get("/openapi.json").json()["paths"]
+    assert "/api/services/" in paths
+    assert "/api/services" not in paths
@@ -0,0 +1,550 @@
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.models.staff_models import AuditLog, StaffCommunication, StaffPerformance, StaffProfile
+from app.services.staff_service import staff_service
+from tests.conftest import TestingSessionLocal, test_async_engine
+
+
+def _current_user_id(api_client: TestClient) -> int:
+    response = api_client.get("/api/auth/me")
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+class _QueryCounter:
+    """Count and record SQL statements executed on the async test engine"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, *args):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(test_async_engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(test_async_engine.sync_engine, "before_cursor_execute", self)
+
+
+def test_send_and_get_staff_messages(admin_client: TestClient):
+    """Test sending messages and reading them back with sender names."""
+    admin_id = _current_user_id(admin_client)
+
+    for subject in ("Shift change", "Supplies"):
+        response = admin_client.post("/api/staff/messages", json={
+            "recipient_id": admin_id,
+            "subject": subject,
+            "message": "Please review"
+        })
+        assert response.status_code == 200
+        assert response.json()["sender_name"] == "Test Admin User"
+
+    response = admin_client.get("/api/staff/messages")
+    assert response.status_code == 200
+
+    messages = response.json()
+    assert {msg["subject"] for msg in messages} >= {"Shift change", "Supplies"}
+    assert all(msg["sender_name"] == "Test Admin User" for msg in messages)
+
+
+def test_get_staff_messages_query_count_is_constant(admin_client: TestClient):
+    """Test that reading an inbox does not issue one sender query per message."""
+    admin_id = _current_user_id(admin_client)
+
+    def inbox_queries():
+        with _QueryCounter() as counter:
+            assert admin_client.get("/api/staff/messages").status_code == 200
+        return counter.count
+
+    before = inbox_queries()
+    for i in range(3):
+        admin_client.post("/api/staff/messages", json={
+            "recipient_id": admin_id, "subject": f"Extra {i}", "message": "-"
+        })
+    assert inbox_queries() == before
+
+
+def test_create_and_get_staff_tasks(admin_client: TestClient):
+    """Test creating tasks and listing them with assignee and assigner names."""
+    admin_id = _current_user_id(admin_client)
+
+    response = admin_client.post("/api/staff/tasks", json={
+        "title": "Restock ward 3",
+        "assigned_to": admin_id,
+        "priority": "high"
+    })
+    assert response.status_code == 200
+    task = response.json()
+    assert task["status"] == "pending"
+    assert task["assignee_name"] == task["assigner_name"] == "Test Admin User"
+
+    response = admin_client.get("/api/staff/tasks")
+    assert response.status_code == 200
+    tasks = response.json()
+    assert "Restock ward 3" in {t["title"] for t in tasks}
+    assert all(t["assignee_name"] == "Test Admin User" for t in tasks)
+
+
+def test_get_my_tasks_query_count_is_constant(admin_client: TestClient):
+    """Test that listing tasks does not issue user lookups per task."""
+    admin_id = _current_user_id(admin_client)
+
+    def task_list_queries():
+        with _QueryCounter() as counter:
+            assert admin_client.get("/api/staff/tasks").status_code == 200
+        return counter.count
+
+    admin_client.post("/api/staff/tasks", json={"title": "First", "assigned_to": admin_id})
+    before = task_list_queries()
+    for i in range(3):
+        admin_client.post("/api/staff/tasks", json={"title": f"Extra {i}", "assigned_to": admin_id})
+    assert task_list_queries() == before
+
+
+def test_staff_stats(admin_client: TestClient):
+    """Test the staff statistics aggregate."""
+    response = admin_client.get("/api/staff/stats")
+    assert response.status_code == 200
+    assert response.json() == {
+        "total_staff": 0,
+        "active_staff": 0,
+        "supervisors": 0,
+        "departments": {},
+        "avg_performance": 0.0,
+        "emergency_certified": 0
+    }
+
+    admin_id = _current_user_id(admin_client)
+    with TestingSessionLocal() as session:
+        session.add_all([
+            StaffProfile(user_id=admin_id, employee_id="EMP-A", department="Cardiology",
+                         is_supervisor=True, emergency_certified=True, hire_date=datetime(2024, 1, 1)),
+            StaffProfile(user_id=None, employee_id="EMP-B", department="Cardiology",
+                         hire_date=datetime(2024, 1, 1)),
+            StaffProfile(user_id=None, employee_id="EMP-C", department="Radiology",
+                         emergency_certified=True, hire_date=datetime(2024, 1, 1))
+        ])
+        session.commit()
+
+    # Direct inserts bypass the routes, so the cached aggregate is served until invalidated
+    assert admin_client.get("/api/staff/stats").json()["total_staff"] == 0
+    asyncio.run(staff_service.invalidate_staff_stats())
+
+    stats = admin_client.get("/api/staff/stats").json()
+    assert stats["total_staff"] == 3
+    assert stats["active_staff"] == 1
+    assert stats["supervisors"] == 1
+    assert stats["emergency_certified"] == 2
+    assert stats["departments"] == {"Cardiology": 2, "Radiology": 1}
+
+
+def test_mark_message_read_and_user_permissions(admin_client: TestClient):
+    """Test marking a message read and reading a user's permissions."""
+    admin_id = _current_user_id(admin_client)
+
+    message_id = admin_client.post("/api/staff/messages", json={
+        "recipient_id": admin_id,
+        "subject": "Read me",
+        "message": "Ack"
+    }).json()["id"]
+
+    assert admin_client.put(f"/api/staff/messages/{message_id}/read").status_code == 200
+    assert admin_client.put("/api/staff/messages/999999/read").status_code == 404
+
+    unread = admin_client.get("/api/staff/messages", params={"unread_only": True}).json()
+    assert message_id not in {m["id"] for m in unread}
+
+    response = admin_client.get(f"/api/staff/permissions/{admin_id}")
+    assert response.status_code == 200
+    assert response.json()["permissions"] == ["all"]
+    assert admin_client.get("/api/staff/permissions/999999").status_code == 404
+
+
+def test_staff_profile_lists_round_trip(admin_client: TestClient):
+    """Test that JSON-text list columns come back as lists on profile endpoints."""
+    response = admin_client.post("/api/staff/profile", json={
+        "employee_id": "EMP-PROFILE",
+        "department": "Pediatrics",
+        "hire_date": "2024-03-01T00:00:00",
+        "certifications": ["BLS"]
+    })
+    assert response.status_code == 200
+    assert response.json()["certifications"] == ["BLS"]
+    assert response.json()["languages_spoken"] == []
+
+    response = admin_client.put("/api/staff/profile", json={
+        "certifications": ["BLS", "ACLS"],
+        "languages_spoken": ["en", "fr"]
+    })
+    assert response.status_code == 200
+    assert response.json()["certifications"] == ["BLS", "ACLS"]
+
+    response = admin_client.get("/api/staff/profile")
+    assert response.status_code == 200
+    assert response.json()["languages_spoken"] == ["en", "fr"]
+    assert response.json()["department"] == "Pediatrics"
+
+    # Unknown or read-only fields are rejected up front
+    response = admin_client.put("/api/staff/profile", json={"user_id": 1})
+    assert response.status_code == 422
+    response = admin_client.put("/api/staff/profile", json={"nickname": "Doc"})
+    assert response.status_code == 422
+
+    response = admin_client.get("/api/staff/admin/all-profiles")
+    assert response.status_code == 200
+    profiles = {p["employee_id"]: p for p in response.json()}
+    assert profiles["EMP-PROFILE"]["certifications"] == ["BLS", "ACLS"]
+    # Inserted by test_staff_stats without a user or list columns
+    assert profiles["EMP-B"]["user_id"] is None
+    assert profiles["EMP-B"]["certifications"] == []
+
+
+def test_staff_routes_use_orjson():
+    """Test that staff routes serialize through orjson."""
+    staff_routes = [
+        route for route in app.routes
+        if getattr(route, "path", "").startswith("/api/staff/")
+    ]
+    assert staff_routes
+    assert all(route.response_class is ORJSONResponse for route in staff_routes)
+
+
+def test_all_profiles_keyset_pages_and_ndjson(admin_client: TestClient):
+    """Test paging staff profiles by id and streaming them as NDJSON."""
+    with TestingSessionLocal() as session:
+        session.add_all([
+            StaffProfile(employee_id=f"EMP-PAGE-{i}", department="Laboratory", hire_date=datetime(2024, 1, 1))
+            for i in range(5)
+        ])
+        session.commit()
+
+    all_ids = [p["id"] for p in admin_client.get(
+        "/api/staff/admin/all-profiles", params={"limit": 1000}
+    ).json()]
+    assert all_ids == sorted(all_ids)
+
+    first = admin_client.get("/api/staff/admin/all-profiles", params={"limit": 2}).json()
+    second = admin_client.get(
+        "/api/staff/admin/all-profiles", params={"limit": 2, "after_id": first[-1]["id"]}
+    ).json()
+    assert [p["id"] for p in first + second] == all_ids[:4]
+
+    response = admin_client.get(
+        "/api/staff/admin/all-profiles",
+        params={"limit": 1000},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [p["id"] for p in lines] == all_ids
+    assert all(isinstance(p["certifications"], list) for p in lines)
+
+
+def test_audit_logs_keyset_pages_and_ndjson(admin_client: TestClient):
+    """Test paging audit logs newest first and streaming them as NDJSON."""
+    with TestingSessionLocal() as session:
+        session.add_all([
+            AuditLog(action=f"staff-test-{i}", resource_type="staff_test") for i in range(3)
+        ])
+        session.commit()
+
+    params = {"resource_type": "staff_test", "limit": 2}
+    first = admin_client.get("/api/staff/admin/audit-logs", params=params).json()
+    assert [log["action"] for log in first] == ["staff-test-2", "staff-test-1"]
+
+    second = admin_client.get(
+        "/api/staff/admin/audit-logs", params={**params, "before_id": first[-1]["id"]}
+    ).json()
+    assert [log["action"] for log in second] == ["staff-test-0"]
+
+    response = admin_client.get(
+        "/api/staff/admin/audit-logs",
+        params={"resource_type": "staff_test"},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    actions = [json.loads(line)["action"] for line in response.text.splitlines()]
+    assert actions == ["staff-test-2", "staff-test-1", "staff-test-0"]
+
+
+def test_role_permission_changes_apply_to_cached_checks(admin_client: TestClient, auth_client: TestClient):
+    """Test that cached role permission checks pick up admin permission changes."""
+    assert auth_client.get("/api/staff/department/Cardiology").status_code == 403
+
+    response = admin_client.post("/api/admin/permissions", json={
+        "role": "patient",
+        "resource": "staff",
+        "action": "read",
+        "allowed": True
+    })
+    assert response.status_code == 200
+    assert auth_client.get("/api/staff/department/Cardiology").status_code == 200
+
+    response = admin_client.put(
+        f"/api/admin/permissions/{response.json()['id']}", params={"allowed": False}
+    )
+    assert response.status_code == 200
+    assert auth_client.get("/api/staff/department/Cardiology").status_code == 403
+
+
+def test_permission_checks_are_cached(auth_client: TestClient):
+    """Test that repeated permission checks for a role skip the permissions table."""
+    auth_client.get("/api/staff/department/Radiology")
+    with _QueryCounter() as counter:
+        assert auth_client.get("/api/staff/department/Radiology").status_code == 403
+    # Only the current-user lookup runs; the denied role check comes from the cache
+    assert counter.count == 1
+
+
+def test_permission_cache_entries_expire_within_a_minute(auth_client: TestClient):
+    """Test that cached permission checks live at most 60 seconds, bounding stale grants in other workers."""
+    import time
+    from app.services.cache_service import response_cache
+
+    response_cache.clear_local()
+    assert auth_client.get("/api/staff/department/Oncology").status_code == 403
+
+    expiries = [expires_at for key, (expires_at, _, _) in response_cache._local.items() if key.startswith("perm:")]
+    assert expiries
+    assert all(expires_at - time.monotonic() <= 60 for expires_at in expiries)
+
+
+def test_staff_schedule_and_performance_lists(admin_client: TestClient):
+    """Test the schedule and performance list endpoints for a date range."""
+    admin_id = _current_user_id(admin_client)
+
+    response = admin_client.post("/api/staff/schedule", json={
+        "staff_id": admin_id,
+        "shift_date": "2025-02-03T00:00:00",
+        "start_time": "2025-02-03T08:00:00",
+        "end_time": "2025-02-03T16:00:00"
+    })
+    assert response.status_code == 200
+
+    with TestingSessionLocal() as session:
+        session.add_all([
+            StaffPerformance(staff_id=admin_id, date=datetime(2025, 2, day), total_score=score)
+            for day, score in ((4, 0.9), (3, 0.7))
+        ])
+        session.commit()
+
+    date_range = {"start_date": "2025-02-01T00:00:00", "end_date": "2025-02-28T00:00:00"}
+
+    response = admin_client.get(f"/api/staff/schedule/{admin_id}", params=date_range)
+    assert response.status_code == 200
+    assert [s["start_time"] for s in response.json()] == ["2025-02-03T08:00:00"]
+
+    response = admin_client.get(f"/api/staff/performance/{admin_id}", params=date_range)
+    assert response.status_code == 200
+    assert [p["total_score"] for p in response.json()] == [0.7, 0.9]
+
+
+def test_bulk_update_task_status(admin_client: TestClient, auth_client: TestClient):
+    """Test completing several tasks at once, limited to the caller's own tasks."""
+    admin_id = _current_user_id(admin_client)
+    patient_id = _current_user_id(auth_client)
+
+    own_ids = [
+        admin_client.post("/api/staff/tasks", json={"title": f"Bulk {i}", "assigned_to": admin_id}).json()["id"]
+        for i in range(3)
+    ]
+    other_id = admin_client.post(
+        "/api/staff/tasks", json={"title": "Not mine", "assigned_to": patient_id}
+    ).json()["id"]
+
+    response = admin_client.put("/api/staff/tasks/status/bulk", json={
+        "task_ids": own_ids + [other_id],
+        "status": "completed"
+    })
+    assert response.status_code == 200
+    assert response.json()["updated"] == 3
+
+    tasks = {t["id"]: t for t in admin_client.get("/api/staff/tasks").json()}
+    assert all(tasks[task_id]["status"] == "completed" for task_id in own_ids)
+    assert all(tasks[task_id]["completed_at"] for task_id in own_ids)
+    assert [t["status"] for t in auth_client.get("/api/staff/tasks").json()] == ["pending"]
+
+    response = admin_client.put("/api/staff/tasks/status/bulk", json={"task_ids": own_ids, "status": "done"})
+    assert response.status_code == 422
+    response = admin_client.put("/api/staff/tasks/status/bulk", json={"task_ids": [], "status": "completed"})
+    assert response.status_code == 422
+
+
+def test_update_task_status_validates_status(admin_client: TestClient):
+    """Test that task status is parsed at the edge and unknown values are rejected."""
+    admin_id = _current_user_id(admin_client)
+    task_id = admin_client.post(
+        "/api/staff/tasks", json={"title": "Triage", "assigned_to": admin_id}
+    ).json()["id"]
+
+    response = admin_client.put(f"/api/staff/tasks/{task_id}/status", params={"status": "in_progress"})
+    assert response.status_code == 200
+    assert response.json()["message"] == "Task status updated to in_progress"
+
+    response = admin_client.put(f"/api/staff/tasks/{task_id}/status", params={"status": "done"})
+    assert response.status_code == 422
+
+
+def test_list_endpoints_load_only_needed_columns(admin_client: TestClient):
+    """Test that list endpoints skip user and audit columns the responses never use."""
+    admin_id = _current_user_id(admin_client)
+    admin_client.post("/api/staff/messages", json={"recipient_id": admin_id, "subject": "Cols", "message": "x"})
+    admin_client.post("/api/staff/tasks", json={"title": "Cols", "assigned_to": admin_id})
+
+    with _QueryCounter() as counter:
+        assert admin_client.get("/api/staff/messages").status_code == 200
+        assert admin_client.get("/api/staff/tasks").status_code == 200
+        response = admin_client.get("/api/staff/admin/audit-logs")
+        assert response.status_code == 200
+
+    list_sql = [
+        sql for sql in counter.statements
+        if "staff_communications" in sql or "staff_tasks" in sql or "audit_logs" in sql
+        or "users.id IN" in sql
+    ]
+    assert list_sql
+    assert not any("password_hash" in sql for sql in list_sql)
+    assert not any("audit_logs.old_values" in sql or "audit_logs.user_agent" in sql for sql in list_sql)
+
+
+def test_assign_role_creates_profile(admin_client: TestClient, auth_client: TestClient):
+    """Test that assigning a staff role with a department also creates the staff profile."""
+    user_id = _current_user_id(auth_client)
+
+    response = admin_client.post("/api/staff/assign-role", params={
+        "user_id": user_id, "role": "staff", "department": "Front Desk"
+    })
+    assert response.status_code == 200
+
+    permissions = admin_client.get(f"/api/staff/permissions/{user_id}").json()
+    assert permissions["role"] == "staff"
+    assert permissions["department"] == "Front Desk"
+
+    response = admin_client.post("/api/staff/assign-role", params={"user_id": 999999, "role": "staff"})
+    assert response.status_code == 404
+
+
+def test_messages_from_unknown_sender(admin_client: TestClient):
+    """Test that a message whose sender no longer exists is still listed."""
+    admin_id = _current_user_id(admin_client)
+    with TestingSessionLocal() as session:
+        session.add(StaffCommunication(
+            sender_id=999999, recipient_id=admin_id, subject="Orphan", message="x", message_type="direct"
+        ))
+        session.commit()
+
+    messages = admin_client.get("/api/staff/messages").json()
+    assert [(m["subject"], m["sender_name"]) for m in messages] == [("Orphan", "Unknown")]
+
+
+def test_get_staff_by_department(admin_client: TestClient):
+    """Test listing a department's staff with user details in a single query."""
+    admin_id = _current_user_id(admin_client)
+    with TestingSessionLocal() as session:
+        session.add_all([
+            StaffProfile(user_id=admin_id, employee_id="EMP-NEURO", department="Neurology",
+                         specialization="Stroke", is_supervisor=True, hire_date=datetime(2024, 1, 1)),
+            # Profiles without a user are left out of the listing
+            StaffProfile(user_id=None, employee_id="EMP-NEURO-2", department="Neurology",
+                         hire_date=datetime(2024, 1, 1))
+        ])
+        session.commit()
+
+    admin_client.get("/api/staff/department/Neurology")
+    with _QueryCounter() as counter:
+        response = admin_client.get("/api/staff/department/Neurology")
+    assert response.status_code == 200
+    # Current-user lookup plus the listing itself
+    assert counter.count == 2
+
+    staff = response.json()
+    assert len(staff) == 1
+    assert staff[0]["id"] == admin_id
+    assert staff[0]["name"] == "Test Admin User"
+    assert staff[0]["profile"]["employee_id"] == "EMP-NEURO"
+    assert staff[0]["profile"]["specialization"] == "Stroke"
+    assert staff[0]["profile"]["is_supervisor"] is True
+
+
+def test_stats_and_profiles_revalidate_with_etag(admin_client: TestClient):
+    """Test that /stats and the admin profile list answer matching If-None-Match with 304."""
+    for path in ("/api/staff/stats", "/api/staff/admin/all-profiles"):
+        response = admin_client.get(path)
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "private, max-age=30"
+        etag = response.headers["etag"]
+
+        response = admin_client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    profiles_etag = admin_client.get("/api/staff/admin/all-profiles").headers["etag"]
+    stats_etag = admin_client.get("/api/staff/stats").headers["etag"]
+
+    # Creating a profile changes both representations
+    response = admin_client.post("/api/staff/profile", json={
+        "employee_id": "EMP-ETAG", "department": "Oncology", "hire_date": "2024-03-01T00:00:00"
+    })
+    assert response.status_code == 200
+
+    response = admin_client.get("/api/staff/admin/all-profiles", headers={"If-None-Match": profiles_etag})
+    assert response.status_code == 200
+    assert "EMP-ETAG" in {p["employee_id"] for p in response.json()}
+    response = admin_client.get("/api/staff/stats", headers={"If-None-Match": stats_etag})
+    assert response.status_code == 200
+    assert response.json()["departments"]["Oncology"] == 1
+
+
+def test_update_staff_profile_without_profile(admin_client: TestClient):
+    """Test that updating a missing staff profile returns 404."""
+    response = admin_client.put("/api/staff/profile", json={"department": "Radiology"})
+    assert response.status_code == 404
+
+
+def test_task_names_for_another_assignee(admin_client: TestClient, auth_client: TestClient):
+    """Test assignee and assigner names when assigning a task to someone else."""
+    patient = auth_client.get("/api/auth/me").json()
+
+    response = admin_client.post("/api/staff/tasks", json={"title": "Fill form", "assigned_to": patient["id"]})
+    assert response.status_code == 200
+    assert response.json()["assignee_name"] == patient["name"]
+    assert response.json()["assigner_name"] == "Test Admin User"
+
+    tasks = auth_client.get("/api/staff/tasks").json()
+    assert [(t["assignee_name"], t["assigner_name"]) for t in tasks] == [(patient["name"], "Test Admin User")]
+
+
+def test_create_self_assigned_task_skips_name_lookup(admin_client: TestClient):
+    """Test that a self-assigned task takes both names from the current user."""
+    admin_id = _current_user_id(admin_client)
+    with _QueryCounter() as counter:
+        response = admin_client.post("/api/staff/tasks", json={"title": "Self", "assigned_to": admin_id})
+    assert response.status_code == 200
+    assert not any(sql.lstrip().startswith("SELECT users.name") for sql in counter.statements)
+
+
+def test_create_endpoints_use_insert_returning(admin_client: TestClient):
+    """Test that created rows come back from INSERT ... RETURNING without a refresh SELECT."""
+    admin_id = _current_user_id(admin_client)
+    with _QueryCounter() as counter:
+        response = admin_client.post("/api/staff/messages", json={
+            "recipient_id": admin_id, "subject": "Returning", "message": "x"
+        })
+    assert response.status_code == 200
+    assert response.json()["created_at"] is not None
+
+    inserts = [sql for sql in counter.statements if sql.startswith("INSERT INTO staff_communications")]
+    assert len(inserts) == 1 and "RETURNING" in inserts[0]
+    assert not any(sql.startswith("SELECT staff_communications") for sql in counter.statements)
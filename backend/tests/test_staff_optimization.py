@@ -0,0 +1,488 @@
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+
+from app.routes import staff_optimization
+from app.routes.staff_optimization import AdvancedStaffOptimizer
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(staff_optimization.router, prefix="/api/staff-optimization")
+    return TestClient(app)
+
+
+class _CountingScaler:
+    def __init__(self):
+        self.calls = 0
+
+    def transform(self, rows):
+        self.calls += 1
+        return np.asarray(rows, dtype=float)
+
+
+class _CountingModel:
+    """Linear stand-in for a fitted regressor; counts predict calls"""
+
+    def __init__(self, weights):
+        self.weights = np.asarray(weights, dtype=float)
+        self.calls = 0
+
+    def predict(self, rows):
+        self.calls += 1
+        return np.asarray(rows) @ self.weights
+
+
+def _optimizer_with_stub_models():
+    optimizer = AdvancedStaffOptimizer()
+    wait_weights = np.zeros(15)
+    wait_weights[5] = -2.0  # more staff, shorter waits
+    efficiency_weights = np.zeros(15)
+    efficiency_weights[7] = 0.5
+    optimizer.models = {
+        'wait_time_predictor': _CountingModel(wait_weights),
+        'efficiency_predictor': _CountingModel(efficiency_weights),
+    }
+    optimizer.scalers = {'standard': _CountingScaler()}
+    return optimizer
+
+
+def _brute_force_best(optimizer, department, metrics):
+    best = None
+    for providers in range(max(1, metrics['providers_on_shift'] - 2), min(10, metrics['providers_on_shift'] + 3)):
+        for nurses in range(max(1, metrics['nurses_on_shift'] - 3), min(20, metrics['nurses_on_shift'] + 5)):
+            p, n = np.array([providers]), np.array([nurses])
+            if not optimizer._check_constraints(p, n, metrics)[0]:
+                continue
+            performance = optimizer._predict_performance(department, p, n, metrics)
+            score = optimizer._calculate_optimization_score(p, n, performance, metrics)[0]
+            if best is None or score < best[0]:
+                best = (score, providers, nurses)
+    return best
+
+
+def test_optimize_staffing_predicts_whole_grid_in_one_call():
+    """Test that the candidate grid is scaled and predicted in a single batch per model."""
+    optimizer = _optimizer_with_stub_models()
+    metrics = {'providers_on_shift': 3, 'nurses_on_shift': 6, 'patient_count': 15, 'facility_occupancy': 0.8}
+
+    result = optimizer.optimize_staffing('Emergency', metrics)
+
+    assert optimizer.scalers['standard'].calls == 1
+    assert optimizer.models['wait_time_predictor'].calls == 1
+    assert optimizer.models['efficiency_predictor'].calls == 1
+    score, providers, nurses = _brute_force_best(optimizer, 'Emergency', metrics)
+    assert result['optimized_staffing'] == {'providers': providers, 'nurses': nurses, 'total_staff': providers + nurses}
+    assert result['optimization_score'] == float(score)
+
+
+def test_optimize_staffing_matches_scan_without_models():
+    """Test that the heuristic fallback picks the same configuration as a cell-by-cell scan."""
+    optimizer = AdvancedStaffOptimizer()
+    optimizer.models = {}
+    for metrics in (
+        {'providers_on_shift': 2, 'nurses_on_shift': 4, 'patient_count': 20, 'facility_occupancy': 0.6},
+        {'providers_on_shift': 5, 'nurses_on_shift': 12, 'patient_count': 40, 'facility_occupancy': 0.9},
+    ):
+        result = optimizer.optimize_staffing('Cardiology', metrics)
+        score, providers, nurses = _brute_force_best(optimizer, 'Cardiology', metrics)
+        assert (result['optimized_staffing']['providers'], result['optimized_staffing']['nurses']) == (providers, nurses)
+        assert all(isinstance(value, float) for value in result['performance_prediction'].values())
+
+
+def test_optimize_staffing_keeps_current_staffing_when_nothing_is_feasible():
+    """Test that an infeasible grid falls back to the current staffing with a zero score."""
+    optimizer = AdvancedStaffOptimizer()
+    optimizer.models = {}
+    # One patient: every candidate breaks the maximum staff:patient ratio
+    metrics = {'providers_on_shift': 2, 'nurses_on_shift': 3, 'patient_count': 1, 'facility_occupancy': 0.5}
+
+    result = optimizer.optimize_staffing('Radiology', metrics)
+
+    assert result['optimized_staffing'] == {'providers': 2, 'nurses': 3, 'total_staff': 5}
+    assert result['optimization_score'] == 0
+    assert result['staff_adjustments']['total_change'] == 0
+
+
+def test_prediction_features_fill_department_columns_from_cached_row():
+    """Test that feature rows combine the cached department columns with per-request values."""
+    optimizer = AdvancedStaffOptimizer()
+    metrics = {'patient_count': 15, 'facility_occupancy': 0.8, 'day_of_week': 3, 'is_weekend': 0}
+
+    features = optimizer._prepare_prediction_features('Emergency', np.array([3, 4]), np.array([6, 5]), metrics)
+
+    ratio = 9 / 15.1
+    expected = [45.0, 3, 0, 3, 6, 9, 3 / 6.1, 1 / (ratio + 0.1), ratio * 0.8, 45.0, 9.0, 0.0, 0.486, 0.8, 0.64]
+    assert features.shape == (2, 15)
+    assert np.allclose(features[0], expected)
+    assert not optimizer._dept_feature_rows.flags.writeable
+
+
+class _StubOnnxSession:
+    """Stand-in for the combined onnxruntime.InferenceSession (scaler and both models in one graph)"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def run(self, output_names, feeds):
+        self.inputs.append(feeds['X'])
+        return [feeds['X'][:, [5, 13]] * 2]
+
+
+def test_predict_performance_uses_onnx_session_when_loaded():
+    """Test that one combined ONNX call replaces the scaler and both sklearn predict calls."""
+    optimizer = _optimizer_with_stub_models()
+    optimizer.onnx_session = _StubOnnxSession()
+    metrics = {'patient_count': 15, 'facility_occupancy': 0.25}
+
+    performance = optimizer._predict_performance('Emergency', np.array([3, 4]), np.array([6, 6]), metrics)
+
+    assert optimizer.scalers['standard'].calls == 0
+    assert optimizer.models['wait_time_predictor'].calls == 0
+    assert len(optimizer.onnx_session.inputs) == 1
+    assert optimizer.onnx_session.inputs[0].dtype == np.float32
+    assert np.allclose(performance['predicted_wait_time'], [18.0, 20.0])
+    assert np.allclose(performance['predicted_efficiency'], [0.5, 0.5])
+
+
+def test_cheapest_mix_per_total_keeps_fewest_providers_in_scan_order():
+    """Test that the heuristic search only scores the nurse-heaviest mix of each staff total."""
+    providers = np.array([1, 1, 2, 2, 3])
+    nurses = np.array([3, 4, 2, 3, 3])
+
+    kept_providers, kept_nurses = AdvancedStaffOptimizer._cheapest_mix_per_total(providers, nurses)
+
+    assert kept_providers.tolist() == [1, 1, 3]
+    assert kept_nurses.tolist() == [3, 4, 3]
+
+
+def test_optimize_endpoint_returns_utc_second_precision_timestamp():
+    """Test that /optimize responds with a timezone-aware timestamp truncated to seconds."""
+    response = _client().post("/api/staff-optimization/optimize", json={
+        "department": "Emergency",
+        "current_metrics": {"providers_on_shift": 3, "nurses_on_shift": 6, "patient_count": 15, "facility_occupancy": 0.8},
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    stamp = datetime.fromisoformat(body["optimization_timestamp"])
+    assert stamp.tzinfo == timezone.utc
+    assert stamp.microsecond == 0
+    assert body["current_staffing"] == {"providers": 3, "nurses": 6, "total_staff": 9}
+    assert all(type(value) is int for value in body["current_staffing"].values())
+    assert all(type(value) is int for value in body["staff_adjustments"].values())
+
+
+def test_optimize_endpoint_rejects_fractional_staffing():
+    """Test that /optimize does not echo a fractional head count into its int fields."""
+    response = _client().post("/api/staff-optimization/optimize", json={
+        "department": "Emergency",
+        "current_metrics": {"providers_on_shift": 3.5, "nurses_on_shift": 6, "patient_count": 15},
+    })
+
+    assert response.status_code == 500
+
+
+def test_constraint_and_score_kernels_match_formulas():
+    """Test the constraint mask and score kernels against the scalar formulas."""
+    providers = np.array([1.0, 2.0, 6.0])
+    nurses = np.array([4.0, 4.0, 2.0])
+
+    mask = staff_optimization._feasible_mask(providers, nurses, 10.0, 0.2, 2.0, 0.1, 0.8)
+    scores = staff_optimization._staffing_scores(
+        providers, nurses, np.array([30.0, 20.0, 10.0]), np.array([0.5, 0.7, 0.9]),
+        np.array([0.8, 0.6, 1.0]), 75.0, 45.0
+    )
+
+    # 6 providers to 2 nurses breaks the maximum provider:nurse ratio
+    assert mask.tolist() == [True, True, False]
+    assert np.allclose(scores, [12 + 15 + 51, 8 + 9 + 66 + 1, 4 + 3 + 108 + 1])
+
+
+def test_optimize_staffing_serves_repeat_metrics_from_cache():
+    """Test that identical metrics, in any key order, reuse the memoized optimization."""
+    optimizer = _optimizer_with_stub_models()
+    metrics = {'providers_on_shift': 3, 'nurses_on_shift': 6, 'patient_count': 15, 'facility_occupancy': 0.8}
+
+    first = optimizer.optimize_staffing('Emergency', metrics)
+    second = optimizer.optimize_staffing('Emergency', dict(reversed(list(metrics.items()))))
+    optimizer.optimize_staffing('Emergency', {**metrics, 'patient_count': 20})
+
+    assert optimizer.models['wait_time_predictor'].calls == 2
+    assert second['optimized_staffing'] == first['optimized_staffing']
+    assert 'optimization_timestamp' in second
+    assert optimizer._optimize_cached.cache_info().hits == 1
+
+
+def test_fold_scaler_into_models_preserves_predictions():
+    """Test that folded linear models predict on raw features as before on scaled ones."""
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.neighbors import KNeighborsRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    raw = rng.random((300, 15)) * np.arange(1, 16) * 5 + 2
+    target = raw[:, 3] * 2 + raw[:, 5]
+    scaler = StandardScaler().fit(raw)
+    scaled = scaler.transform(raw)
+    models = [LinearRegression().fit(scaled, target), Ridge().fit(scaled, target)]
+    probe = rng.random((50, 15)) * np.arange(1, 16) * 5 + 2
+    expected = [model.predict(scaler.transform(probe)) for model in models]
+
+    assert staff_optimization._fold_scaler_into_models(scaler, models)
+    for model, before in zip(models, expected):
+        assert np.allclose(model.predict(probe), before)
+
+    knn = KNeighborsRegressor().fit(scaled, target)
+    assert not staff_optimization._fold_scaler_into_models(scaler, [LinearRegression().fit(scaled, target), knn])
+
+
+def test_tree_models_keep_the_scaler_on_integer_features():
+    """Test that tree ensembles are not folded and predict integer staffing exactly as before."""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(3)
+    # Integer-valued features put split thresholds on the float32 image of a scaled integer
+    raw = rng.integers(1, 20, size=(400, 15)).astype(float)
+    scaler = StandardScaler().fit(raw)
+    scaled = scaler.transform(raw)
+    wait_model = RandomForestRegressor(n_estimators=20, random_state=0).fit(scaled, raw[:, 0] * 3 - raw[:, 1])
+    efficiency_model = GradientBoostingRegressor(n_estimators=20, random_state=0).fit(scaled, raw[:, 1] / raw[:, 0])
+    thresholds = [tree.tree_.threshold.copy() for tree in wait_model.estimators_]
+
+    assert not staff_optimization._fold_scaler_into_models(scaler, [wait_model, efficiency_model])
+    assert all(np.array_equal(tree.tree_.threshold, before) for tree, before in zip(wait_model.estimators_, thresholds))
+
+    optimizer = AdvancedStaffOptimizer()
+    optimizer.models = {'wait_time_predictor': wait_model, 'efficiency_predictor': efficiency_model}
+    optimizer.scalers = {'standard': scaler}
+    optimizer.onnx_session = None
+    optimizer._scaler_folded = False
+    metrics = {'providers_on_shift': 5, 'nurses_on_shift': 10, 'patient_count': 30, 'facility_occupancy': 0.7}
+    grid = np.meshgrid(np.arange(1, 20), np.arange(1, 20), indexing='ij')
+    providers, nurses = grid[0].ravel().astype(float), grid[1].ravel().astype(float)
+
+    performance = optimizer._predict_performance('Emergency', providers, nurses, metrics)
+    features = scaler.transform(optimizer._prepare_prediction_features('Emergency', providers, nurses, metrics))
+    assert np.array_equal(performance['predicted_wait_time'], wait_model.predict(features))
+    assert np.array_equal(performance['predicted_efficiency'], efficiency_model.predict(features))
+
+
+def test_file_status_is_checked_at_most_once_per_interval(monkeypatch):
+    """Test that repeated /model-status calls reuse the model file snapshot."""
+    optimizer = AdvancedStaffOptimizer()
+    checked = []
+    monkeypatch.setattr(staff_optimization.os.path, "exists", lambda path: checked.append(path) or True)
+
+    first = optimizer.get_file_status()
+    second = optimizer.get_file_status()
+    assert len(checked) == len(staff_optimization.MODEL_FILES)
+    assert second == first == {name: True for name in staff_optimization.MODEL_FILES}
+
+    optimizer._file_status_checked_at -= staff_optimization.FILE_STATUS_TTL_SECONDS
+    optimizer.get_file_status()
+    assert len(checked) == 2 * len(staff_optimization.MODEL_FILES)
+
+
+def test_model_status_endpoint_reports_file_status():
+    """Test that /model-status includes the per-file status snapshot."""
+    response = _client().get("/api/staff-optimization/model-status")
+
+    assert response.status_code == 200
+    assert set(response.json()["files_status"]) == set(staff_optimization.MODEL_FILES)
+
+
+def test_cost_analysis_is_shared_with_recommendations():
+    """Test that the cost recommendation reports the same hourly change as the cost analysis."""
+    optimizer = AdvancedStaffOptimizer()
+    optimizer.models = {}
+    metrics = {'providers_on_shift': 4, 'nurses_on_shift': 4, 'patient_count': 12, 'facility_occupancy': 0.7}
+
+    result = optimizer.optimize_staffing('Pediatrics', metrics)
+    costs = result['cost_analysis']
+
+    assert costs['daily_cost_change'] == costs['cost_change'] * 8
+    assert costs['monthly_cost_change'] == costs['cost_change'] * 176
+    assert f"${abs(costs['cost_change']):.2f}/hour" in result['recommendations'][-1]
+
+
+def test_department_listing_matches_baselines():
+    """Test that the column-array department listing reproduces the baseline dicts."""
+    optimizer = AdvancedStaffOptimizer()
+
+    listing = optimizer.department_listing()
+
+    assert [dept['name'] for dept in listing] == list(optimizer.department_baselines)
+    emergency = listing[0]
+    baseline = optimizer.department_baselines['Emergency']
+    assert emergency == {
+        'name': 'Emergency',
+        'baseline_staffing': {'providers': baseline['base_providers'], 'nurses': baseline['base_nurses']},
+        'complexity_score': baseline['complexity'],
+        'average_wait_time': baseline['avg_wait_time'],
+        'patient_volume': baseline['patient_volume'],
+        'peak_hours': baseline['peak_hours'],
+        'staff_efficiency': baseline['staff_efficiency'],
+    }
+    assert type(emergency['patient_volume']) is int
+
+
+def test_score_bound_pruning_keeps_the_optimum():
+    """Test that pruning by model output ranges skips rows without changing the result."""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+    rng = np.random.default_rng(1)
+    raw = rng.random((300, 15)) * np.arange(1, 16) * 3
+    wait_model = RandomForestRegressor(n_estimators=5, random_state=0).fit(raw, raw[:, 5] * 4)
+    efficiency_model = GradientBoostingRegressor(n_estimators=5, random_state=0).fit(raw, raw[:, 7] / 10)
+    low, high = staff_optimization._output_range(wait_model)
+    predictions = wait_model.predict(rng.random((200, 15)) * 100)
+    assert low <= predictions.min() and predictions.max() <= high
+
+    def build(bounds):
+        optimizer = AdvancedStaffOptimizer()
+        optimizer.models = {'wait_time_predictor': wait_model, 'efficiency_predictor': efficiency_model}
+        optimizer._scaler_folded = True
+        optimizer._prediction_bounds = bounds
+        return optimizer
+
+    pruned = build(staff_optimization._output_range(wait_model) + staff_optimization._output_range(efficiency_model))
+    unpruned = build(None)
+    metrics = {'providers_on_shift': 5, 'nurses_on_shift': 10, 'patient_count': 30, 'facility_occupancy': 0.7}
+    grid = np.meshgrid(np.arange(3, 8), np.arange(7, 15), indexing='ij')
+    providers, nurses = grid[0].ravel().astype(float), grid[1].ravel().astype(float)
+
+    kept, _ = pruned._prune_by_score_bounds(providers, nurses, metrics)
+    assert kept.size < providers.size
+    assert pruned.optimize_staffing('Emergency', metrics)['optimized_staffing'] == \
+        unpruned.optimize_staffing('Emergency', metrics)['optimized_staffing']
+
+
+def test_optimizer_is_built_on_first_use(monkeypatch):
+    """Test that importing the routes does not build the optimizer and lightweight endpoints never do."""
+    staff_optimization.get_optimizer.cache_clear()
+    built = []
+    monkeypatch.setattr(staff_optimization, "AdvancedStaffOptimizer", lambda: built.append(1) or AdvancedStaffOptimizer())
+    client = _client()
+
+    assert client.get("/api/staff-optimization/cost-analysis").json()["cost_parameters"] == staff_optimization.COST_PARAMETERS
+    assert built == []
+
+    client.get("/api/staff-optimization/departments")
+    client.get("/api/staff-optimization/constraints")
+    assert built == [1]
+    staff_optimization.get_optimizer.cache_clear()
+
+
+def test_routes_serialize_with_orjson():
+    """Test that every staff optimization route responds through ORJSONResponse."""
+    assert all(route.response_class is ORJSONResponse for route in staff_optimization.router.routes)
+
+    response = _client().get("/api/staff-optimization/constraints")
+    assert response.status_code == 200
+    assert response.json()["department_baselines"]["Emergency"]["peak_hours"] == [8, 14, 20]
+
+
+def test_departments_endpoint_serves_prebuilt_json():
+    """Test that /departments returns the listing serialized when the optimizer was built."""
+    optimizer = AdvancedStaffOptimizer()
+    client = _client()
+    client.app.dependency_overrides[staff_optimization.get_optimizer] = lambda: optimizer
+
+    response = client.get("/api/staff-optimization/departments")
+
+    assert response.content == optimizer._departments_json
+    assert response.json() == optimizer.department_listing()
+
+
+def test_optimize_endpoint_runs_search_off_the_event_loop():
+    """Test that the CPU-bound grid search runs on a worker thread, not the event loop thread."""
+    import asyncio
+    import threading
+
+    optimizer = AdvancedStaffOptimizer()
+    search_threads = []
+    original = optimizer.optimize_staffing
+
+    def recording_optimize(*args):
+        search_threads.append(threading.get_ident())
+        return original(*args)
+
+    optimizer.optimize_staffing = recording_optimize
+    request = staff_optimization.StaffOptimizationRequest(
+        department="Emergency",
+        current_metrics={"providers_on_shift": 3, "nurses_on_shift": 6, "patient_count": 15, "facility_occupancy": 0.8},
+    )
+
+    async def call():
+        return threading.get_ident(), await staff_optimization.optimize_staffing(request, None, optimizer)
+
+    loop_thread, result = asyncio.run(call())
+
+    assert search_threads and search_threads[0] != loop_thread
+    assert result.department == "Emergency"
+
+
+def test_models_load_memory_mapped_and_fold(tmp_path, monkeypatch):
+    """Test that uncompressed model pickles load memory-mapped and still fold the scaler."""
+    import joblib
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(2)
+    raw = rng.random((100, 15)) * 10
+    scaler = StandardScaler().fit(raw)
+    (tmp_path / "models").mkdir()
+    for name, column in (("wait_time_predictor", 5), ("efficiency_predictor", 7)):
+        model = LinearRegression().fit(scaler.transform(raw), raw[:, column])
+        joblib.dump(model, tmp_path / staff_optimization.MODEL_FILES[name], compress=0)
+    joblib.dump(scaler, tmp_path / staff_optimization.MODEL_FILES['scaler'], compress=0)
+    monkeypatch.chdir(tmp_path)
+
+    optimizer = AdvancedStaffOptimizer()
+
+    assert isinstance(optimizer.scalers['standard'].mean_, np.memmap)
+    assert optimizer._scaler_folded
+    probe = rng.random((5, 15)) * 10
+    # Least squares is invariant to feature scaling, so a fit on raw features predicts the same
+    expected = LinearRegression().fit(raw, raw[:, 5]).predict(probe)
+    assert np.allclose(optimizer.models['wait_time_predictor'].predict(probe), expected)
+
+
+def test_validate_metrics_reports_missing_fields_in_order():
+    """Test that /validate-metrics lists missing fields in the documented order."""
+    client = _client()
+
+    complete = client.post("/api/staff-optimization/validate-metrics", json={
+        "providers_on_shift": 3, "nurses_on_shift": 6, "patient_count": 15, "facility_occupancy": 0.8, "hour": 9,
+    }).json()
+    partial = client.post("/api/staff-optimization/validate-metrics", json={"nurses_on_shift": 6}).json()
+
+    assert complete["valid"] is True and complete["missing_fields"] == []
+    assert partial["valid"] is False
+    assert partial["missing_fields"] == ["providers_on_shift", "patient_count", "facility_occupancy"]
+    assert partial["required_fields"] == list(staff_optimization.REQUIRED_METRIC_FIELDS)
+
+
+def test_feature_matrix_reuses_a_per_thread_buffer():
+    """Test that repeated feature builds on one thread share memory, and other threads get their own."""
+    import threading
+
+    optimizer = AdvancedStaffOptimizer()
+    metrics = {'patient_count': 15, 'facility_occupancy': 0.8}
+
+    first = optimizer._prepare_prediction_features('Emergency', np.array([3, 4]), np.array([6, 5]), metrics)
+    second = optimizer._prepare_prediction_features('Cardiology', np.array([2, 2, 3]), np.array([4, 5, 4]), metrics)
+    assert np.shares_memory(first, second)
+    assert second.shape == (3, 15) and second[0, 0] == 40.0
+
+    other = []
+    worker = threading.Thread(target=lambda: other.append(
+        optimizer._prepare_prediction_features('Emergency', np.array([3]), np.array([6]), metrics)))
+    worker.start()
+    worker.join()
+    assert not np.shares_memory(other[0], second)